@@ -0,0 +1,56 @@
+"""
+Benchmarks evaluate_predictions on one million synthetic predictions with the segment columns main.py
+breaks results down by (country, year, dev_type, org_size) and 200 bootstrap replicates.
+
+Segment labels are passed as segment_labels returns them (Categoricals, country as the plain column),
+and again as object arrays that have to be factorized. Exits non-zero when the categorical run is over
+the time budget.
+
+    python benchmarks/bench_evaluation.py [--rows 1000000] [--budget 1.0]
+"""
+import os
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.evaluation import evaluate_predictions  # noqa: E402
+from bench_forest import time_call  # noqa: E402
+
+
+def synthetic_predictions(rows: int, seed: int = 0) -> tuple:
+    rng = np.random.default_rng(seed)
+    y_true = rng.normal(0.0, 0.6, size=rows)
+    y_pred = y_true + rng.normal(0.0, 0.3, size=rows)
+    country_names = [f"Country {i}" for i in range(24)] + ["Other"]
+    countries = pd.Series(rng.choice(country_names, size=rows), name="country")
+    country_avg = pd.Series(np.linspace(20_000, 120_000, len(country_names)), index=country_names)
+    segments = pd.DataFrame({
+        "country": countries.to_numpy(),
+        "year": rng.integers(2017, 2025, size=rows),
+        "dev_type": pd.Categorical.from_codes(rng.integers(0, 16, size=rows), [f"Dev {i}" for i in range(15)] + ["(other)"]),
+        "org_size": pd.Categorical.from_codes(rng.integers(0, 5, size=rows), ["1", "10", "100", "1000", "(other)"]),
+    })
+    return y_true, y_pred, countries, country_avg, segments
+
+
+def run(rows: int, budget: float) -> bool:
+    y_true, y_pred, countries, country_avg, segments = synthetic_predictions(rows)
+    as_objects = segments.astype(object)
+    t_cat = time_call(lambda: evaluate_predictions(y_true, y_pred, countries, country_avg, segments), min_seconds=3.0)
+    t_obj = time_call(lambda: evaluate_predictions(y_true, y_pred, countries, country_avg, as_objects), min_seconds=3.0)
+    print(f"{rows:,} predictions, {segments.shape[1]} segment columns, 200 bootstrap replicates")
+    print(f"  categorical labels: {t_cat:.3f}s (budget {budget:.2f}s)")
+    print(f"  object labels:      {t_obj:.3f}s")
+    return t_cat <= budget
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds allowed for the categorical run")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.rows, args.budget) else 1)
@@ -0,0 +1,82 @@
+"""
+Benchmarks FlatForest against RandomForestRegressor.predict for batch sizes 1, 100 and 100k.
+
+Uses the weighted model saved by main.py (data/model) when present, otherwise trains a 100-tree forest
+on synthetic 0/1 indicator features shaped like the survey matrix.
+
+    python benchmarks/bench_forest.py [--model-dir data/model] [--n-jobs 1]
+"""
+import os
+import sys
+import time
+import argparse
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.flat_forest import FlatForest  # noqa: E402
+
+BATCH_SIZES = [1, 100, 100_000]
+
+
+def synthetic_forest(n_features: int = 72, n_rows: int = 100_000, seed: int = 0):
+    from sklearn.ensemble import RandomForestRegressor
+    rng = np.random.default_rng(seed)
+    X = (rng.random((n_rows, n_features)) < 0.2).astype(np.float32)
+    y = X[:, :10] @ rng.normal(size=10) + rng.normal(scale=0.5, size=n_rows)
+    return RandomForestRegressor(n_estimators=100, random_state=0, n_jobs=-1).fit(X, y)
+
+
+def time_call(fn, min_seconds: float = 1.0, max_repeats: int = 1000) -> float:
+    """
+    Returns the median wall time of fn() in seconds over enough repeats to fill min_seconds.
+    """
+    fn()
+    times = []
+    total = 0.0
+    while total < min_seconds and len(times) < max_repeats:
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+        total += times[-1]
+    return float(np.median(times))
+
+
+def run(model_dir: str, n_jobs: int) -> list:
+    path = os.path.join(model_dir, "weighted_model.joblib")
+    if os.path.exists(path):
+        import joblib
+        forest = joblib.load(path)
+        print(f"Loaded {path}")
+    else:
+        print("No saved model found; training a synthetic 100-tree forest")
+        forest = synthetic_forest()
+    forest.set_params(n_jobs=n_jobs)
+
+    start = time.perf_counter()
+    flat = FlatForest.from_sklearn(forest)
+    print(f"Export: {time.perf_counter() - start:.2f}s, {len(flat.value):,} nodes in {flat.n_trees} trees\n")
+
+    rng = np.random.default_rng(1)
+    rows = []
+    print(f"{'batch':>8}{'sklearn ms':>13}{'flat ms':>11}{'speedup':>10}{'identical':>11}")
+    for n in BATCH_SIZES:
+        X = (rng.random((n, flat.n_features)) < 0.2).astype(np.float32)
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            identical = bool(np.array_equal(forest.predict(X), flat.predict(X)))
+            t_sk = time_call(lambda: forest.predict(X))
+        t_flat = time_call(lambda: flat.predict(X))
+        rows.append({"batch": n, "sklearn_s": t_sk, "flat_s": t_flat, "identical": identical})
+        print(f"{n:>8}{t_sk * 1000:>13.3f}{t_flat * 1000:>11.3f}{t_sk / t_flat:>9.1f}x{str(identical):>11}")
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default=os.path.join("data", "model"))
+    parser.add_argument("--n-jobs", type=int, default=1, help="n_jobs for sklearn's predict")
+    args = parser.parse_args()
+    run(args.model_dir, args.n_jobs)
@@ -0,0 +1,158 @@
+"""
+End-to-end benchmark of the main.main pipeline on synthetic survey data. Runs main.pipeline_stages and
+main.train_and_report with the stage cache disabled (everything main computes on a cold cache, apart
+from the download and saving the model) and summarizes the pipeline's own instrument() records per
+stage: calls, wall and CPU time, RSS before/after and peak. The results are saved as JSON so runs can
+be compared between commits.
+
+    python benchmarks/bench_pipeline.py --rows 1000000                   # generates data if needed
+    python benchmarks/bench_pipeline.py --rows 1000000 --compare benchmarks/results/<earlier>.json
+
+The raw records are appended to $SALARY_METRICS (default benchmarks/results/metrics.jsonl) under the
+run id stored in the result file.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+from contextlib import redirect_stdout
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+# instrument() only records when instrumentation.METRICS_ENV is set as the pipeline modules are imported.
+os.environ.setdefault("SALARY_METRICS", os.path.join(RESULTS_DIR, "metrics.jsonl"))
+
+from instrumentation import METRICS_PATH, RUN_ENV, format_mb, load_metrics  # noqa: E402
+from main import pipeline_stages, train_and_report  # noqa: E402
+from stage_cache import StageCache  # noqa: E402
+from synthetic_survey import write_survey  # noqa: E402
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def stage_rows(records: list[dict]) -> list[dict]:
+    """
+    Folds instrument() records into one row per stage, in order of first call: calls, summed wall and
+    CPU seconds, RSS before the first and after the last call, and the highest peak. Calls made on
+    worker threads (the concurrent fits) have no parent stage and are listed at depth 0.
+    """
+    rows = {}
+    for record in sorted(records, key=lambda r: r["start"]):
+        row = rows.get(record["stage"])
+        if row is None:
+            row = rows[record["stage"]] = {
+                "stage": record["stage"], "depth": record["depth"], "calls": 0, "rows": record["rows_out"],
+                "seconds": 0.0, "cpu_seconds": 0.0, "rss_before_mb": record["rss_before_mb"], "peak_rss_mb": None,
+            }
+        row["calls"] += 1
+        row["seconds"] += record["wall_s"]
+        row["cpu_seconds"] += record["cpu_s"]
+        row["rss_after_mb"] = record["rss_after_mb"]
+        if record["peak_rss_mb"] is not None:
+            row["peak_rss_mb"] = max(row["peak_rss_mb"] or 0.0, record["peak_rss_mb"])
+    return list(rows.values())
+
+
+def run_pipeline(data_dir: str, engine: str = "forest", cores: Optional[int] = None) -> tuple[str, list[dict]]:
+    """
+    Runs the main.main stages on the survey archives in data_dir with the stage cache disabled and returns
+    the run id and its stage_rows. Stage output (the pipeline's progress prints) is discarded.
+    """
+    run = f"bench-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+    os.environ[RUN_ENV] = run
+    stage_cache = StageCache(enabled=False)
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        stages = pipeline_stages(stage_cache, engine=engine, data_dir=data_dir)
+        train_and_report(stage_cache, stages, cores=cores, engine=engine)
+    return run, stage_rows(load_metrics(run=run))
+
+
+def compare(current: dict, previous: dict) -> str:
+    """
+    Formats seconds and peak RSS of two result files side by side, with the current/previous ratio.
+    """
+    prev = {row["stage"]: row for row in previous["stages"]}
+    lines = [f"{'stage':<52}{'prev s':>9}{'now s':>9}{'ratio':>8}{'prev MB':>9}{'now MB':>9}"]
+    for row in current["stages"]:
+        old = prev.get(row["stage"])
+        if old is None:
+            continue
+        ratio = row["seconds"] / old["seconds"] if old["seconds"] else float("nan")
+        lines.append(
+            f"{row['stage']:<52}{old['seconds']:>9.2f}{row['seconds']:>9.2f}{ratio:>8.2f}"
+            f"{format_mb(old['peak_rss_mb'], 9)}{format_mb(row['peak_rss_mb'], 9)}"
+        )
+    return "\n".join(lines)
+
+
+def main(rows: int, data_dir: Optional[str], engine: str, cores: Optional[int], out: Optional[str], previous: Optional[str]):
+    data_dir = data_dir or os.path.join("data", "synthetic", str(rows))
+    if not os.path.isdir(data_dir) or not any(name.endswith(".zip") for name in os.listdir(data_dir)):
+        start = time.perf_counter()
+        write_survey(data_dir, rows)
+        print(f"Generated {rows:,} rows in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    run, stages = run_pipeline(data_dir, engine=engine, cores=cores)
+    result = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "rows": rows,
+        "engine": engine,
+        "cores": cores,
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "run": run,
+        "metrics_path": METRICS_PATH,
+        "total_seconds": time.perf_counter() - start,
+        "stages": stages,
+    }
+
+    print(f"{'stage':<52}{'calls':>6}{'rows':>10}{'seconds':>9}{'rss before':>12}{'rss after':>11}{'peak rss':>10}")
+    for row in stages:
+        rows_text = f"{row['rows']:,}" if row["rows"] is not None else ""
+        print(
+            f"{'  ' * row['depth'] + row['stage']:<52}{row['calls']:>6}{rows_text:>10}{row['seconds']:>9.2f}"
+            f"{format_mb(row['rss_before_mb'], 12)}{format_mb(row['rss_after_mb'], 11)}{format_mb(row['peak_rss_mb'], 10)}"
+        )
+    print(f"Total: {result['total_seconds']:.1f}s")
+
+    out = out or os.path.join(RESULTS_DIR, f"{result['commit']}-{engine}-{rows}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"Saved {out}")
+
+    if previous:
+        with open(previous, encoding="utf-8") as f:
+            print("\n" + compare(result, json.load(f)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic respondents over all years")
+    parser.add_argument("--data-dir", help="existing directory of {year}.zip archives (default data/synthetic/<rows>)")
+    parser.add_argument("--engine", default="forest", choices=("forest", "hgb"))
+    parser.add_argument("--cores", type=int, help="core budget for the concurrent fits (default: all available)")
+    parser.add_argument("--out", help="result file (default benchmarks/results/<commit>-<engine>-<rows>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+    main(args.rows, args.data_dir, args.engine, args.cores, args.out, args.compare)
@@ -0,0 +1,88 @@
+"""
+Compares the model engines (RandomForest vs histogram gradient boosting) on the temporal 2024 split:
+training time, pickled model size and test MAE for the baseline and weighted models.
+
+    python benchmarks/compare_engines.py                 # uses main.py's cached pipeline stages
+    python benchmarks/compare_engines.py --merged m.pkl  # or a pickled merged DataFrame
+"""
+import os
+import io
+import sys
+import time
+import pickle
+import argparse
+import contextlib
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import pipeline_stages, preprocess_data  # noqa: E402
+from stage_cache import StageCache  # noqa: E402
+from model.engines import ENGINES, native_categoricals  # noqa: E402
+from model.utils import prepare_train_test, feature_matrix, take_rows  # noqa: E402
+from model.base_model import train_base_model  # noqa: E402
+from model.weighted_model import compute_sample_weights, train_weighted_model  # noqa: E402
+
+
+def load_processed(engine: str, merged_path: str = None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        if merged_path:
+            return preprocess_data(pd.read_pickle(merged_path), native_categoricals(engine))
+        return pipeline_stages(StageCache(), engine=engine)["processed"]()
+
+
+def evaluate(engine: str, merged_path: str = None, n_jobs: int = -1) -> list:
+    df, country_stats, pipeline = load_processed(engine, merged_path)
+    train_rows, y_train, test_rows, y_test, test_countries, country_avg = prepare_train_test(
+        df, country_avg_salary=country_stats["mean"]
+    )
+    X_all = feature_matrix(df, pipeline.feature_names)
+    X_tr, X_te = take_rows(X_all, train_rows), take_rows(X_all, test_rows)
+    weights = compute_sample_weights(df["year"].iloc[train_rows])
+    avg = test_countries.map(country_avg).to_numpy()
+    true_usd = np.expm1(y_test.to_numpy()) * avg
+
+    fits = {
+        "baseline": lambda: train_base_model(
+            X_tr, y_train, n_jobs=n_jobs, engine=engine, categorical_features=pipeline.categorical_mask
+        ),
+        "weighted": lambda: train_weighted_model(
+            X_tr, y_train, weights, n_jobs=n_jobs, engine=engine, categorical_features=pipeline.categorical_mask
+        ),
+    }
+    rows = []
+    for name, fit in fits.items():
+        start = time.perf_counter()
+        model = fit()
+        fit_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        pred = model.predict(X_te)
+        predict_seconds = time.perf_counter() - start
+        rows.append({
+            "engine": engine,
+            "model": name,
+            "features": X_tr.shape[1],
+            "fit_s": fit_seconds,
+            "predict_s": predict_seconds,
+            "size_mb": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)) / 1e6,
+            "mae_log": mean_absolute_error(y_test, pred),
+            "mae_usd": mean_absolute_error(true_usd, np.expm1(pred) * avg),
+        })
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--merged", help="pickled merged DataFrame to preprocess instead of the stage cache")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=ENGINES)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+
+    results = []
+    for engine in args.engines:
+        results.extend(evaluate(engine, args.merged, args.n_jobs))
+    table = pd.DataFrame(results)
+    print(table.to_string(index=False, float_format="%.3f"))
@@ -0,0 +1,96 @@
+"""
+Load generator for serve.py: fires calculator profiles at POST /predict from concurrent keep-alive
+clients and reports p50/p99 latency and throughput.
+
+    python serve.py &
+    python benchmarks/load_test.py --clients 32 --requests 4000
+"""
+import json
+import time
+import random
+import argparse
+import threading
+import http.client
+
+import numpy as np
+
+COUNTRIES = ['United States', 'Germany', 'United Kingdom', 'India', 'Canada', 'France', 'Israel', 'Other']
+COMPANY_SIZES = ['Small', 'Medium', 'Large', 'Enterprise', 'Large Enterprise']
+EMPLOYMENT_TYPES = ['Full-time', 'Part-time', 'Freelance', 'Remote']
+LANGUAGES = ['Go', 'Rust', 'Scala', 'TypeScript', 'Python', 'Java', 'JavaScript', 'C#', 'PHP', 'Ruby']
+
+
+def random_profile(rng: random.Random) -> dict:
+    return {
+        "country": rng.choice(COUNTRIES),
+        "experience": rng.randint(0, 30),
+        "age": rng.randint(18, 65),
+        "companySize": rng.choice(COMPANY_SIZES),
+        "employmentType": rng.choice(EMPLOYMENT_TYPES),
+        "languages": rng.sample(LANGUAGES, rng.randint(1, 4)),
+    }
+
+
+def _client(host: str, port: int, n: int, seed: int, latencies: list, errors: list) -> None:
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    for _ in range(n):
+        body = json.dumps(random_profile(rng))
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/predict", body, {"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                errors.append(resp.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(repr(e))
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run_load(host: str = "127.0.0.1", port: int = 8000, clients: int = 16, requests: int = 2000) -> dict:
+    """
+    Sends `requests` single-profile requests split across `clients` concurrent connections.
+    """
+    latencies, errors = [], []
+    per_client = [requests // clients + (i < requests % clients) for i in range(clients)]
+    threads = [
+        threading.Thread(target=_client, args=(host, port, n, i, latencies, errors))
+        for i, n in enumerate(per_client)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    lat_ms = np.array(latencies) * 1000
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": float(np.percentile(lat_ms, 50)) if len(lat_ms) else float("nan"),
+        "p99_ms": float(np.percentile(lat_ms, 99)) if len(lat_ms) else float("nan"),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    result = run_load(args.host, args.port, args.clients, args.requests)
+    print(f"clients={result['clients']} requests={result['requests']} errors={result['errors']}")
+    print(f"throughput: {result['throughput_rps']:.1f} req/s")
+    print(f"latency p50: {result['p50_ms']:.2f} ms   p99: {result['p99_ms']:.2f} ms")
@@ -0,0 +1,264 @@
+"""
+Generates survey-shaped synthetic data for benchmarks, in the layout fetch_and_unpack leaves behind:
+data/{year}.zip with a survey_results_public.csv member (or data/{year}/{year}.csv with --csv).
+
+- Column headers are the real per-year aliases from cleaning.alias_map (e.g. HaveWorkedLanguage in 2017,
+  LanguageWorkedWith in 2018-2020, LanguageHaveWorkedWith from 2021), plus unrelated columns that the
+  ingest projection has to skip.
+- Answers use the survey's formats: ';'-joined multi-select answers with the per-year spelling variants
+  in preprocessing.MULTI_SELECT_ALIASES, experience as ranges or numbers, local-currency compensation
+  (formatted text with thousands separators in some years) and renamed countries.
+- Compensation depends on country, experience, developer type, company size and year, so the models
+  have signal to fit.
+- Rows are generated and written in fixed-size chunks, each seeded from (seed, year, chunk), so memory
+  stays flat from 100k to 10M rows and a given (rows, chunk size, seed) always produces the same files.
+
+    python benchmarks/synthetic_survey.py --rows 1000000 --out data/synthetic
+"""
+import io
+import os
+import sys
+import argparse
+import zipfile
+from typing import Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cleaning import alias_map  # noqa: E402
+from data_io import PUBLIC_CSV  # noqa: E402
+from preprocessing import MULTI_SELECT_ALIASES  # noqa: E402
+
+SURVEY_YEARS = range(2017, 2025)
+CHUNK_ROWS = 250_000
+
+# (name before 2021, name from 2021, currency, local units per USD, median USD salary, share of respondents)
+COUNTRIES = [
+    ("United States", "United States of America", "USD", 1.0, 110_000, 0.22),
+    ("India", "India", "INR", 83.0, 14_000, 0.12),
+    ("Germany", "Germany", "EUR", 0.92, 68_000, 0.08),
+    ("United Kingdom", "United Kingdom of Great Britain and Northern Ireland", "GBP", 0.79, 70_000, 0.07),
+    ("Canada", "Canada", "CAD", 1.35, 80_000, 0.04),
+    ("France", "France", "EUR", 0.92, 52_000, 0.04),
+    ("Brazil", "Brazil", "BRL", 5.0, 22_000, 0.04),
+    ("Poland", "Poland", "PLN", 4.0, 40_000, 0.04),
+    ("Netherlands", "Netherlands", "EUR", 0.92, 65_000, 0.03),
+    ("Australia", "Australia", "AUD", 1.5, 90_000, 0.03),
+    ("Spain", "Spain", "EUR", 0.92, 40_000, 0.03),
+    ("Sweden", "Sweden", "SEK", 10.5, 60_000, 0.02),
+    ("Israel", "Israel", "ILS", 3.7, 95_000, 0.02),
+    ("Switzerland", "Switzerland", "CHF", 0.9, 120_000, 0.02),
+    ("Ukraine", "Ukraine", "UAH", 37.0, 30_000, 0.02),
+    ("Pakistan", "Pakistan", "PKR", 280.0, 9_000, 0.02),
+    ("Nigeria", "Nigeria", "NGN", 900.0, 8_000, 0.01),
+    ("Japan", "Japan", "JPY", 150.0, 55_000, 0.01),
+]
+COUNTRY_SHARE = np.array([c[5] for c in COUNTRIES])
+COUNTRY_SHARE = np.r_[COUNTRY_SHARE, 1.0 - COUNTRY_SHARE.sum()]  # the rest: long-tail countries
+
+# (label before 2019, label from 2019, log-salary effect)
+DEV_TYPES = [
+    ("Back-end developer", "Developer, back-end", 0.05),
+    ("Front-end developer", "Developer, front-end", -0.05),
+    ("Full-stack developer", "Developer, full-stack", 0.0),
+    ("Mobile developer", "Developer, mobile", -0.02),
+    ("Data scientist", "Data scientist or machine learning specialist", 0.10),
+    ("DevOps specialist", "DevOps specialist", 0.08),
+    ("Embedded applications or devices developer", "Developer, embedded applications or devices", 0.0),
+    ("Engineering manager", "Engineering manager", 0.30),
+    ("Educator or academic researcher", "Academic researcher", -0.20),
+    ("C-suite executive (CEO, CTO, etc.)", "Senior Executive (C-Suite, VP, etc.)", 0.40),
+    ("Student", "Student", -0.60),
+]
+ORG_SIZES = [
+    ("Fewer than 10 employees", -0.15), ("10 to 19 employees", -0.10), ("20 to 99 employees", -0.05),
+    ("100 to 499 employees", 0.0), ("500 to 999 employees", 0.03), ("1,000 to 4,999 employees", 0.06),
+    ("5,000 to 9,999 employees", 0.08), ("10,000 or more employees", 0.12), ("I don't know", 0.0),
+]
+EDUCATION = [
+    "Bachelor’s degree (B.A., B.S., B.Eng., etc.)", "Master’s degree (M.A., M.S., M.Eng., MBA, etc.)",
+    "Some college/university study without earning a degree", "Secondary school (e.g. American high school, etc.)",
+    "Other doctoral degree (Ph.D., Ed.D., etc.)", "Professional degree (JD, MD, etc.)", "I prefer not to answer",
+]
+EMPLOYMENT = [
+    "Employed full-time", "Employed part-time", "Independent contractor, freelancer, or self-employed",
+    "Not employed, but looking for work", "Retired",
+]
+EXTRA_ITEMS = {
+    "langs_worked": ["Python", "Java", "JavaScript", "TypeScript", "C#", "C++", "Go", "Rust", "SQL", "PHP", "Kotlin"],
+    "db_worked": ["MySQL", "PostgreSQL", "Redis", "MongoDB", "SQLite", "Elasticsearch"],
+    "platform_worked": ["Docker", "Linux", "Windows", "Kubernetes", "Heroku"],
+    "webframe_worked": ["React.js", "Angular", "Vue.js", "Django", "Flask", "Express", "Spring"],
+}
+MULTI_SELECT_COLS = ["langs_worked", "langs_desired", "db_worked", "platform_worked", "webframe_worked"]
+
+
+def survey_header(canon: str, year: int) -> str:
+    """
+    The column name a survey year used for a canonical column: the first alias in 2017, the second in 2018,
+    the middle one for 2019-2020 and the last one from 2021.
+    """
+    aliases = alias_map[canon]
+    era = {2017: 0, 2018: 1, 2019: 2, 2020: 2}.get(year, len(aliases) - 1)
+    return aliases[min(era, len(aliases) - 1)]
+
+
+def _multi_select_pool(col: str, year: int) -> list[str]:
+    # Each alias group contributes one spelling per era, so the pipeline has to unify them across years.
+    base = col.replace("_desired", "_worked")
+    variants = {}
+    for raw, canon in MULTI_SELECT_ALIASES.get(base, {}).items():
+        variants.setdefault(canon, []).append(raw)
+    pool = [names[0] if year < 2020 or len(names) == 1 else names[-1] for names in variants.values()]
+    return sorted(set(pool + EXTRA_ITEMS.get(base, [])))
+
+
+def _multi_select(rng: np.random.Generator, pool: Sequence[str], n: int, missing: float) -> np.ndarray:
+    # Each row picks a subset; the subset's bitmask indexes a table of pre-joined answers.
+    p = rng.uniform(0.1, 0.45, len(pool))
+    masks = (rng.random((n, len(pool))) < p) @ (1 << np.arange(len(pool)))
+    uniques, inverse = np.unique(masks, return_inverse=True)
+    answers = np.array(
+        [";".join(item for j, item in enumerate(pool) if m >> j & 1) or None for m in uniques], dtype=object
+    )
+    out = answers[inverse]
+    out[rng.random(n) < missing] = None
+    return out
+
+
+def _experience(years: np.ndarray, survey_year: int) -> np.ndarray:
+    if survey_year < 2019:
+        edges = [(0, "Less than a year"), (1, "1 to 2 years"), (3, "3 to 5 years"), (6, "6 to 8 years"),
+                 (9, "9 to 11 years"), (12, "12 to 14 years"), (15, "15 to 17 years"), (18, "18 to 20 years"),
+                 (21, "21 to 23 years"), (24, "30 or more years")]
+        labels = np.array([label for _, label in edges], dtype=object)
+        return labels[np.searchsorted([e for e, _ in edges], years, side="right") - 1]
+    out = years.astype(str).astype(object)
+    out[years == 0] = "Less than 1 year"
+    out[years > 50] = "More than 50 years"
+    return out
+
+
+def _format_compensation(local: np.ndarray, year: int, rng: np.random.Generator) -> np.ndarray:
+    # Most years store plain numbers; 2019-2020 keep the respondent's formatting.
+    if year not in (2019, 2020):
+        return np.round(local, 0)
+    style = rng.integers(0, 3, len(local))
+    out = np.empty(len(local), dtype=object)
+    out[style == 0] = [f"{v:.0f}" for v in local[style == 0]]
+    out[style == 1] = [f"{v:,.2f}" for v in local[style == 1]]
+    out[style == 2] = [f"{v:,.2f}".replace(",", " ").replace(".", ",").replace(" ", ".") for v in local[style == 2]]
+    return out
+
+
+def generate_chunk(year: int, n: int, rng: np.random.Generator, first_id: int = 0) -> pd.DataFrame:
+    """
+    Generates n respondents of one survey year with that year's headers and answer formats.
+    """
+    h = lambda canon: survey_header(canon, year)  # noqa: E731
+
+    country_idx = rng.choice(len(COUNTRY_SHARE), size=n, p=COUNTRY_SHARE)
+    in_list = country_idx < len(COUNTRIES)
+    names = np.array([c[0] if year < 2021 else c[1] for c in COUNTRIES] + [None], dtype=object)
+    country = names[country_idx]
+    country[~in_list] = rng.choice(["Tuvalu", "Nomansland", "Lesotho", "Bhutan", "Andorra"], size=(~in_list).sum())
+    currency = np.array([c[2] for c in COUNTRIES] + ["USD"], dtype=object)[country_idx]
+    per_usd = np.array([c[3] for c in COUNTRIES] + [1.0])[country_idx]
+    base_usd = np.array([c[4] for c in COUNTRIES] + [25_000])[country_idx]
+
+    experience_total = np.minimum(rng.gamma(2.0, 5.0, n).astype(np.int64), 55)
+    experience_pro = np.minimum(experience_total, rng.gamma(1.6, 4.0, n).astype(np.int64))
+    dev_idx = rng.integers(0, len(DEV_TYPES), n)
+    org_idx = rng.integers(0, len(ORG_SIZES), n)
+
+    log_salary = (
+        np.log(base_usd)
+        + 0.35 * np.log1p(experience_pro)
+        + np.array([d[2] for d in DEV_TYPES])[dev_idx]
+        + np.array([o[1] for o in ORG_SIZES])[org_idx]
+        + 0.03 * (year - 2017)
+        + rng.normal(0.0, 0.35, n)
+        - 0.6
+    )
+    local = np.exp(log_salary) * per_usd
+    compensation = _format_compensation(local, year, rng)
+    compensation[rng.random(n) < 0.35] = None if compensation.dtype == object else np.nan
+
+    dev_labels = np.array([d[0] if year < 2019 else d[1] for d in DEV_TYPES], dtype=object)
+    columns = {
+        "Respondent": np.arange(first_id, first_id + n),
+        h("country"): country,
+        h("employment"): rng.choice(np.array(EMPLOYMENT, dtype=object), n, p=[0.75, 0.05, 0.12, 0.06, 0.02]),
+        h("education_level"): rng.choice(np.array(EDUCATION, dtype=object), n),
+        h("org_size"): np.array([o[0] for o in ORG_SIZES], dtype=object)[org_idx],
+        h("dev_type"): dev_labels[dev_idx],
+        h("years_code_total"): _experience(experience_total, year),
+        h("years_code_pro"): _experience(experience_pro, year),
+        h("currency"): currency,
+        h("compensation_total"): compensation,
+        "Hobbyist": rng.choice(np.array(["Yes", "No"], dtype=object), n),
+        "SurveyLength": rng.choice(np.array(["Appropriate in length", "Too long"], dtype=object), n),
+    }
+    for col in MULTI_SELECT_COLS:
+        columns[h(col)] = _multi_select(rng, _multi_select_pool(col, year), n, missing=0.1)
+    return pd.DataFrame(columns)
+
+
+def generate_year(year: int, rows: int, chunk_rows: int = CHUNK_ROWS, seed: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Yields one survey year as chunks of at most chunk_rows rows; chunk i is seeded by (seed, year, i).
+    """
+    for i, start in enumerate(range(0, rows, chunk_rows)):
+        rng = np.random.default_rng([seed, year, i])
+        yield generate_chunk(year, min(chunk_rows, rows - start), rng, first_id=start + 1)
+
+
+def write_survey(
+        out_dir: str,
+        rows: int,
+        years: Sequence[int] = SURVEY_YEARS,
+        as_zip: bool = True,
+        chunk_rows: int = CHUNK_ROWS,
+        seed: int = 0
+) -> dict[int, str]:
+    """
+    Writes `rows` respondents spread evenly over the years and returns {year: path}.
+    Each chunk is streamed to the CSV (inside the ZIP archive when as_zip) as soon as it is generated.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    per_year = np.full(len(years), rows // len(years))
+    per_year[:rows % len(years)] += 1
+    paths = {}
+    for year, n in zip(years, per_year):
+        if as_zip:
+            path = os.path.join(out_dir, f"{year}.zip")
+            with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as z, \
+                    z.open(PUBLIC_CSV, "w", force_zip64=True) as raw:
+                with io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+                    _write_chunks(f, generate_year(year, int(n), chunk_rows, seed))
+        else:
+            os.makedirs(os.path.join(out_dir, str(year)), exist_ok=True)
+            path = os.path.join(out_dir, str(year), f"{year}.csv")
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                _write_chunks(f, generate_year(year, int(n), chunk_rows, seed))
+        paths[year] = path
+        print(f"{year}: {n:,} rows → {path}")
+    return paths
+
+
+def _write_chunks(f, chunks: Iterator[pd.DataFrame]) -> None:
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(f, index=False, header=(i == 0))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="total respondents over all years")
+    parser.add_argument("--out", default=os.path.join("data", "synthetic"))
+    parser.add_argument("--csv", action="store_true", help="write {year}/{year}.csv instead of {year}.zip")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_survey(args.out, args.rows, as_zip=not args.csv, chunk_rows=args.chunk_rows, seed=args.seed)
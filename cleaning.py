@@ -1,9 +1,12 @@
 import os
+import sys
 import numpy as np
 import pandas as pd
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
-from data_io import DATA_DIR
+from data_io import DATA_DIR, available_years, load_year
+from instrumentation import instrument
 
 CLEAN_DIR_NAME = "clean_numeric"
 
@@ -52,20 +55,39 @@ for canon in alias_map:
 
 CANON_COLS = list(alias_map.keys())
 
+# Canonical columns whose raw dtype is left to pandas' inference at ingest: compensation is
+# numeric in most years but stored as formatted text in some, which clean_compensation_string handles.
+NUMERIC_CANON_COLS = ["compensation_total"]
 
+
+def ingest_dtypes(columns: list[str]) -> dict[str, object]:
+    """
+    Selects the raw survey headers that map onto a canonical column and assigns each an explicit dtype.
+    Free-text/multi-select answers are read as object; numeric canonical columns keep inferred dtypes.
+    """
+    dtypes = {}
+    for col in columns:
+        canon = alias_to_canon.get(col)
+        if canon is None:
+            continue
+        dtypes[col] = None if canon in NUMERIC_CANON_COLS else object
+    return dtypes
+
+
+@instrument
 def consolidate_aliases(df: pd.DataFrame) -> pd.DataFrame:
- """
+    """
     Consolidates multiple column aliases in a DataFrame into a single canonical column.
     For each set of aliases, it merges available columns into one column with a standard name.
- """
-    df = df.copy()
+    """
+    df = df.copy(deep=False)
     present = defaultdict(list)
     for col in df.columns:
         if col in alias_to_canon:
             present[alias_to_canon[col]].append(col)
 
     for canon, cols in present.items():
-        merged = df[cols[0]].copy()
+        merged = df[cols[0]]
         for alt in cols[1:]:
             merged = merged.combine_first(df[alt])
         if canon in df.columns and canon not in cols:
@@ -76,6 +98,7 @@ def consolidate_aliases(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+@instrument
 def harmonize_and_select(dfs: dict[int, pd.DataFrame]) -> dict[int, pd.DataFrame]:
     """
     Standardizes column names across multiple yearly DataFrames and selects a fixed set of canonical columns.
@@ -87,11 +110,12 @@ def harmonize_and_select(dfs: dict[int, pd.DataFrame]) -> dict[int, pd.DataFrame
         for col in CANON_COLS:
             if col not in df:
                 df[col] = np.nan
-        out[yr] = df.loc[:, CANON_COLS].copy()
+        out[yr] = df[CANON_COLS]
         print(f"{yr}: kept {out[yr].shape[1]} cols → {out[yr].shape}")
     return out
 
 
+@instrument
 def drop_empty_and_low_info(dfs: dict[int, pd.DataFrame], low_info_threshold: float = 0.05) -> dict[int, pd.DataFrame]:
     """
     Removes columns from each yearly DataFrame that are either completely empty or contain insufficient data.
@@ -109,6 +133,7 @@ def drop_empty_and_low_info(dfs: dict[int, pd.DataFrame], low_info_threshold: fl
     return out
 
 
+@instrument
 def convert_to_numeric(dfs: dict[int, pd.DataFrame]) -> dict[int, pd.DataFrame]:
     """
     Convert all columns (excluding known ID/categorical columns) in each yearly DataFrame to numeric types.
@@ -127,6 +152,7 @@ def convert_to_numeric(dfs: dict[int, pd.DataFrame]) -> dict[int, pd.DataFrame]:
     return out
 
 
+@instrument
 def save_cleaned(dfs: dict[int, pd.DataFrame], base_dir: str = DATA_DIR):
     """
     Saves each yearly cleaned DataFrame as a CSV file in a dedicated clean directory.
@@ -137,3 +163,52 @@ def save_cleaned(dfs: dict[int, pd.DataFrame], base_dir: str = DATA_DIR):
         path = os.path.join(clean_dir, f"{yr}_clean_numeric.csv")
         df.to_csv(path, index=False)
     print(f"Clean files saved to {clean_dir}")
+
+
+@instrument
+def clean_year(
+        year: int,
+        data_dir: str = DATA_DIR,
+        select=None,
+        low_info_threshold: float = 0.05,
+        save: bool = True,
+        from_zip: bool = False
+) -> pd.DataFrame:
+    """
+    Runs the full per-year chain for one survey year: load → consolidate aliases → select
+    canonical columns → drop empty/low-info columns → numeric conversion → save.
+    """
+    dfs = {year: load_year(year, data_dir, select=select, from_zip=from_zip)}
+    dfs = harmonize_and_select(dfs)
+    dfs = drop_empty_and_low_info(dfs, low_info_threshold)
+    dfs = convert_to_numeric(dfs)
+    if save:
+        save_cleaned(dfs, data_dir)
+    return dfs[year]
+
+
+@instrument
+def clean_years_parallel(
+        years=None,
+        data_dir: str = DATA_DIR,
+        workers: int | None = None,
+        select=None,
+        low_info_threshold: float = 0.05,
+        save: bool = True,
+        from_zip: bool = False
+) -> dict[int, pd.DataFrame]:
+    """
+    Runs clean_year for every year in a process pool and returns the same year → DataFrame
+    mapping as the sequential load_raw_data/harmonize_and_select/... chain.
+    Years are independent until merging, so each worker handles one year end to end.
+    """
+    years = sorted(years) if years is not None else available_years(data_dir, from_zip)
+    workers = min(workers or os.cpu_count() or 1, len(years))
+    # Flush before forking so buffered output is not duplicated by the workers.
+    sys.stdout.flush()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            yr: pool.submit(clean_year, yr, data_dir, select, low_info_threshold, save, from_zip)
+            for yr in years
+        }
+        return {yr: futures[yr].result() for yr in years}
@@ -1,40 +1,247 @@
+import io
 import os
+import json
+import time
+import hashlib
 import requests
 import zipfile
 import pandas as pd
+from contextlib import contextmanager
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 
 DATA_DIR = "data"
+CACHE_DIR_NAME = "cache"
+MANIFEST_NAME = "manifest.json"
+PUBLIC_CSV = "survey_results_public.csv"
+SURVEY_URL = "https://survey.stackoverflow.co/datasets/stack-overflow-developer-survey-{year}.zip"
 
 
-def fetch_and_unpack(years=range(2017, 2025), outdir=DATA_DIR):
+def _load_manifest(outdir: str) -> dict:
+    path = os.path.join(outdir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(outdir: str, manifest: dict) -> None:
+    path = os.path.join(outdir, MANIFEST_NAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _manifest_entry(path: str, sha256: str) -> dict:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha256}
+
+
+def _is_verified(path: str, entry) -> bool:
+    """
+    Checks a downloaded archive against its manifest entry.
+
+    - A matching size and mtime is trusted without re-reading the file.
+    - Otherwise the file is re-hashed and must match the recorded SHA-256.
+    """
+    if not entry or not os.path.exists(path):
+        return False
+    st = os.stat(path)
+    if st.st_size != entry["size"]:
+        return False
+    if st.st_mtime_ns == entry["mtime_ns"]:
+        return True
+    return file_sha256(path) == entry["sha256"]
+
+
+def archive_digests(years, outdir=DATA_DIR) -> dict[str, str]:
+    """
+    Returns the recorded SHA-256 of each year's archive from the download manifest (None if unrecorded).
+    """
+    manifest = _load_manifest(outdir)
+    return {str(yr): manifest.get(str(yr), {}).get("sha256") for yr in years}
+
+
+def _read_validator(part_path: str) -> Optional[str]:
+    try:
+        with open(f"{part_path}.validator", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _save_validator(part_path: str, response: requests.Response) -> None:
+    # If-Range needs a strong ETag; fall back to Last-Modified.
+    etag = response.headers.get("ETag")
+    validator = etag if etag and not etag.startswith("W/") else response.headers.get("Last-Modified")
+    path = f"{part_path}.validator"
+    if validator:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(validator)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _discard_partial(part_path: str) -> None:
+    for path in (part_path, f"{part_path}.validator"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _content_range_start(response: requests.Response) -> Optional[int]:
+    # "Content-Range: bytes 1000-1999/5000" -> 1000
+    value = response.headers.get("Content-Range", "")
+    unit, _, spec = value.partition(" ")
+    if unit != "bytes" or "-" not in spec:
+        return None
+    try:
+        return int(spec.split("-", 1)[0])
+    except ValueError:
+        return None
+
+
+def download_file(
+        url: str,
+        dest: str,
+        retries: int = 5,
+        backoff: float = 1.0,
+        chunk_size: int = 1 << 20,
+        timeout: float = 60
+) -> str:
+    """
+    Streams a URL to disk and returns the SHA-256 of the downloaded file.
+
+    - Writes to "{dest}.part" in chunks and only renames it to `dest` once complete.
+    - Resumes an existing partial file with an HTTP Range request guarded by If-Range (the ETag or
+      Last-Modified value of the response it came from, kept in "{dest}.part.validator"), so a remote
+      file that changed in between is downloaded again instead of being spliced onto the old bytes.
+    - Restarts from the beginning when there is no validator to resume with, when the server answers
+      with the full file (200) or 416, or when its Content-Range does not start at the partial size.
+      Restarts do not count as retries.
+    - Retries connection errors, timeouts, truncated bodies and 5xx responses with
+      exponential backoff (backoff, 2·backoff, 4·backoff, ...).
+    """
+    part_path = f"{dest}.part"
+    attempt = 0
+    while True:
+        try:
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            validator = _read_validator(part_path) if offset else None
+            if offset and validator is None:
+                _discard_partial(part_path)
+                offset = 0
+            headers = {"Range": f"bytes={offset}-", "If-Range": validator} if offset else {}
+            with requests.get(url, headers=headers, stream=True, timeout=timeout) as r:
+                if offset and (r.status_code == 416 or (r.status_code == 206 and _content_range_start(r) != offset)):
+                    # The partial file does not fit the remote one any more; start over.
+                    _discard_partial(part_path)
+                    continue
+                r.raise_for_status()
+                if r.status_code != 206:
+                    offset = 0
+                    _save_validator(part_path, r)
+
+                h = hashlib.sha256()
+                if offset:
+                    with open(part_path, "rb") as f:
+                        for chunk in iter(lambda: f.read(chunk_size), b""):
+                            h.update(chunk)
+                with open(part_path, "ab" if offset else "wb") as f:
+                    for chunk in r.iter_content(chunk_size):
+                        f.write(chunk)
+                        h.update(chunk)
+            os.replace(part_path, dest)
+            _discard_partial(part_path)
+            return h.hexdigest()
+        except (
+            requests.ConnectionError,
+            requests.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+            requests.HTTPError,
+        ) as e:
+            response = getattr(e, "response", None)
+            if response is not None and response.status_code < 500:
+                raise
+            if attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt
+            attempt += 1
+            print(f"  Retrying {url} in {delay:.1f}s ({e.__class__.__name__})")
+            time.sleep(delay)
+
+
+def _fetch_archive(yr: int, outdir: str, url_template: str, entry, retries: int, backoff: float) -> dict:
+    """
+    Makes sure "{outdir}/{yr}.zip" is present and verified, downloading it if needed,
+    and returns its (possibly refreshed) manifest entry.
+    """
+    zip_path = os.path.join(outdir, f"{yr}.zip")
+    if _is_verified(zip_path, entry):
+        print(f"✔ Zip verified: {zip_path}")
+        return _manifest_entry(zip_path, entry["sha256"])
+
+    if os.path.exists(zip_path) and entry is None and zipfile.is_zipfile(zip_path):
+        # Archive predates the manifest: record it instead of downloading again.
+        print(f"✔ Zip exists: {zip_path}")
+        return _manifest_entry(zip_path, file_sha256(zip_path))
+
+    print(f"↓ Downloading {yr}…")
+    sha256 = download_file(url_template.format(year=yr), zip_path, retries=retries, backoff=backoff)
+    return _manifest_entry(zip_path, sha256)
+
+
+def fetch_and_unpack(
+        years=range(2017, 2025),
+        outdir=DATA_DIR,
+        url_template=SURVEY_URL,
+        max_workers=None,
+        retries=5,
+        backoff=1.0,
+        extract=True
+):
     """
     Downloads and unpacks Stack Overflow Developer Survey data for the specified years.
 
-    - Downloads each year's ZIP file from the official Stack Overflow survey dataset URL.
+    - Downloads the years' ZIP files concurrently from `url_template` (the official
+      Stack Overflow survey dataset URL by default), streaming, resuming and retrying
+      as described in download_file.
+    - Records each archive's size, mtime and SHA-256 in "{outdir}/manifest.json"; later runs
+      skip archives that still match it without re-reading them, and re-download ones that don't.
+    - With extract=False, stops once the archives are verified; load_raw_data(from_zip=True)
+      then reads the survey CSV straight out of each archive.
     - Extracts the ZIP file into a folder named after the year.
     - Renames the main CSV file ("survey_results_public.csv") to "{year}.csv".
     - Removes the schema file ("survey_results_schema.csv") if it exists.
     """
     os.makedirs(outdir, exist_ok=True)
+    years = list(years)
+    manifest = _load_manifest(outdir)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(years) or 1) as pool:
+        futures = {
+            yr: pool.submit(
+                _fetch_archive, yr, outdir, url_template, manifest.get(str(yr)), retries, backoff
+            )
+            for yr in years
+        }
+        errors = []
+        for yr in years:
+            try:
+                manifest[str(yr)] = futures[yr].result()
+            except Exception as e:
+                errors.append(e)
+    _save_manifest(outdir, manifest)
+    if errors:
+        raise errors[0]
+    if not extract:
+        return
 
     for yr in years:
         zip_path = os.path.join(outdir, f"{yr}.zip")
         folder = os.path.join(outdir, str(yr))
         csv_dest = os.path.join(folder, f"{yr}.csv")
 
-        if not os.path.exists(zip_path):
-            print(f"↓ Downloading {yr}…")
-            url = (
-                f"https://survey.stackoverflow.co/"
-                f"datasets/stack-overflow-developer-survey-{yr}.zip"
-            )
-            r = requests.get(url)
-            r.raise_for_status()
-            with open(zip_path, "wb") as f:
-                f.write(r.content)
-        else:
-            print(f"✔ Zip exists: {zip_path}")
-
         if not os.path.isdir(folder):
             print(f"  Unzipping {zip_path} → {folder}")
             with zipfile.ZipFile(zip_path) as z:
@@ -42,7 +249,7 @@ def fetch_and_unpack(years=range(2017, 2025), outdir=DATA_DIR):
         else:
             print(f"✔ Already unzipped: {folder}")
 
-        pub_csv = os.path.join(folder, "survey_results_public.csv")
+        pub_csv = os.path.join(folder, PUBLIC_CSV)
         if os.path.exists(pub_csv) and not os.path.exists(csv_dest):
             print(f"🔀 Renaming {pub_csv} → {csv_dest}")
             os.rename(pub_csv, csv_dest)
@@ -52,30 +259,230 @@ def fetch_and_unpack(years=range(2017, 2025), outdir=DATA_DIR):
             os.remove(schema_csv)
 
 
-def load_raw_data(data_dir=DATA_DIR):
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
     """
-    Loads the cleaned and renamed survey CSV files for each year from the data directory.
+    Computes the SHA-256 hex digest of a file, reading it in fixed-size chunks.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
 
-    - Checks that the specified data directory exists.
-    - Iterates through subdirectories named by year (e.g., "2017", "2018", ...).
-    - Loads the CSV file named "{year}.csv" into a pandas DataFrame.
-    - Returns a dictionary mapping year → DataFrame.
+
+def _cache_paths(cache_dir: str, year: int, projection=None) -> tuple[str, str]:
+    # Each column projection gets its own files, so reading a year with another `select` neither reuses
+    # nor evicts the copy cached for the first one.
+    name = str(year)
+    if projection is not None:
+        name += "-" + hashlib.sha256(json.dumps(projection, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    base = os.path.join(cache_dir, name)
+    return f"{base}.pkl", f"{base}.json"
+
+
+class _HashingReader(io.RawIOBase):
+    """
+    Read-only stream over `raw` that feeds every byte read through it into `sha256`, so a survey
+    can be hashed on the same pass that parses it.
+    """
+
+    def __init__(self, raw, sha256):
+        self.raw = raw
+        self.sha256 = sha256
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        data = self.raw.read(len(b))
+        b[:len(data)] = data
+        self.sha256.update(data)
+        return len(data)
+
+
+def _survey_sha256(src_path: str, chunk_size: int = 1 << 20) -> str:
+    # Digest of the CSV bytes the parser reads: the file itself, or the public CSV member of an archive.
+    h = hashlib.sha256()
+    with _open_survey(src_path) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_cached(src_path: str, cache_dir: str, year: int, projection=None):
+    """
+    Returns the cached DataFrame for a year if its recorded source signature still matches, else None.
+
+    - The cached copy must also have been read with the same column projection.
+    - A matching size and mtime is trusted without re-reading the source.
+    - A matching size with a different mtime (e.g. a touched or re-extracted file) is
+      confirmed by re-hashing the survey CSV; on success the recorded mtime is refreshed.
+    """
+    data_path, meta_path = _cache_paths(cache_dir, year, projection)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+
+    if meta.get("source") != os.path.basename(src_path) or meta.get("columns") != projection:
+        return None
+    st = os.stat(src_path)
+    if st.st_size != meta["size"]:
+        return None
+    if st.st_mtime_ns != meta["mtime_ns"]:
+        if _survey_sha256(src_path) != meta["sha256"]:
+            return None
+        meta["mtime_ns"] = st.st_mtime_ns
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    return pd.read_pickle(data_path)
+
+
+def _write_cached(
+        df: pd.DataFrame,
+        src_path: str,
+        cache_dir: str,
+        year: int,
+        sha256: str,
+        projection=None,
+        st: Optional[os.stat_result] = None
+) -> None:
+    """
+    Stores a parsed year next to a small JSON record of the source file's size and mtime (`st`, taken
+    before parsing), the SHA-256 of the survey CSV computed while parsing it, and the column projection.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    data_path, meta_path = _cache_paths(cache_dir, year, projection)
+    st = st or os.stat(src_path)
+    meta = {
+        "source": os.path.basename(src_path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": sha256,
+        "columns": projection,
+    }
+    tmp_path = f"{data_path}.tmp"
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, data_path)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def _zip_member(z: zipfile.ZipFile) -> str:
+    for name in z.namelist():
+        if os.path.basename(name) == PUBLIC_CSV:
+            return name
+    raise FileNotFoundError(f"{PUBLIC_CSV} not found in {z.filename}")
+
+
+@contextmanager
+def _open_survey(src_path: str):
+    """
+    Opens a survey CSV for reading, either a plain file or the public CSV member of a ZIP archive,
+    which is decompressed as it is streamed to the parser.
+    """
+    if src_path.endswith(".zip"):
+        with zipfile.ZipFile(src_path) as z, z.open(_zip_member(z)) as f:
+            yield f
+    else:
+        with open(src_path, "rb") as f:
+            yield f
+
+
+def _read_survey_csv(src_path: str, dtypes=None, sha256=None) -> pd.DataFrame:
+    """
+    Parses one survey CSV, optionally reading only the columns listed in `dtypes` ({column: dtype}).
+    With a hashlib `sha256`, every byte of the CSV is fed into it on the same pass.
+    """
+    with _open_survey(src_path) as f:
+        if sha256 is not None:
+            f = io.BufferedReader(_HashingReader(f, sha256))
+        if dtypes is None:
+            df = pd.read_csv(f, low_memory=False)
+        else:
+            df = pd.read_csv(
+                f,
+                usecols=list(dtypes),
+                dtype={col: dt for col, dt in dtypes.items() if dt is not None},
+                low_memory=False,
+            )
+        if sha256 is not None:
+            for _ in iter(lambda: f.read(1 << 20), b""):
+                pass
+        return df
+
+
+def _survey_path(year: int, data_dir: str, from_zip: bool) -> str:
+    if from_zip:
+        return os.path.join(data_dir, f"{year}.zip")
+    return os.path.join(data_dir, str(year), f"{year}.csv")
+
+
+def available_years(data_dir=DATA_DIR, from_zip=False) -> list[int]:
+    """
+    Lists the survey years present in the data directory: subdirectories named by year,
+    or "{year}.zip" archives when from_zip is set.
     """
     if not os.path.isdir(data_dir):
         raise FileNotFoundError(
             f"Data directory '{data_dir}' not found. "
             "Did you forget to call fetch_and_unpack()?"
         )
+    names = sorted(os.listdir(data_dir))
+    if from_zip:
+        return [int(n[:-4]) for n in names if n.endswith(".zip") and n[:-4].isdigit()]
+    return [int(sub) for sub in names if sub.isdigit()]
+
+
+def load_year(year: int, data_dir=DATA_DIR, use_cache=True, select=None, from_zip=False) -> pd.DataFrame:
+    """
+    Loads a single survey year; see load_raw_data for the caching and column selection rules.
+    """
+    src_path = _survey_path(year, data_dir, from_zip)
+    if not os.path.exists(src_path):
+        raise FileNotFoundError(f"Expected data file not found: {src_path}")
 
-    dfs = {}
-    for sub in sorted(os.listdir(data_dir)):
-        if not sub.isdigit():
-            continue
-        year = int(sub)
-        csv_path = os.path.join(data_dir, sub, f"{sub}.csv")
-        if not os.path.exists(csv_path):
-            raise FileNotFoundError(f"Expected data file not found: {csv_path}")
-        print(f"→ Loading {year} from {csv_path}")
-        dfs[year] = pd.read_csv(csv_path, low_memory=False)
-
-    return dfs
+    dtypes = None
+    projection = None
+    if select is not None:
+        with _open_survey(src_path) as f:
+            header = pd.read_csv(f, nrows=0).columns.tolist()
+        dtypes = select(header)
+        projection = {col: str(dt) for col, dt in dtypes.items()}
+
+    cache_dir = os.path.join(data_dir, CACHE_DIR_NAME)
+    cached = _read_cached(src_path, cache_dir, year, projection) if use_cache else None
+    if cached is not None:
+        print(f"→ Loading {year} from cache")
+        return cached
+
+    print(f"→ Loading {year} from {src_path}")
+    if not use_cache:
+        return _read_survey_csv(src_path, dtypes)
+    st = os.stat(src_path)
+    sha256 = hashlib.sha256()
+    df = _read_survey_csv(src_path, dtypes, sha256)
+    _write_cached(df, src_path, cache_dir, year, sha256.hexdigest(), projection, st)
+    return df
+
+
+def load_raw_data(data_dir=DATA_DIR, use_cache=True, select=None, from_zip=False):
+    """
+    Loads the cleaned and renamed survey CSV files for each year from the data directory.
+
+    - Checks that the specified data directory exists.
+    - Iterates through subdirectories named by year (e.g., "2017", "2018", ...).
+    - Loads the CSV file named "{year}.csv" into a pandas DataFrame.
+    - With from_zip, streams "survey_results_public.csv" out of each "{year}.zip" archive
+      instead, so nothing needs to be extracted.
+    - If `select` is given, it receives each file's header and returns a {column: dtype}
+      mapping (dtype None = inferred); only those columns are parsed.
+    - With use_cache, keeps a typed per-year copy (one per column projection) under "{data_dir}/cache"
+      keyed by the source's size/mtime and the SHA-256 of the CSV, hashed while it is parsed, and loads
+      from it instead of re-parsing an unchanged CSV.
+    - Returns a dictionary mapping year → DataFrame.
+    """
+    return {
+        year: load_year(year, data_dir, use_cache=use_cache, select=select, from_zip=from_zip)
+        for year in available_years(data_dir, from_zip)
+    }
@@ -0,0 +1,260 @@
+import json
+from functools import partial
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import (
+    MULTI_SELECT_ALIASES, COUNTRY_ALIASES, TOP_COUNTRIES, TOP_K, TOP_K_EXCLUDE,
+    simplify_rows, simplify_and_encode, normalize_country, top_countries_from_counts,
+    top_k_counts, top_k_vocab, map_dev_type, simplify_org_size, bucket_years,
+    categorize_education, simplify_employment, map_unique
+)
+from model.utils import NON_FEATURE_COLS, add_salary_normalized
+
+
+def _is_missing(val) -> bool:
+    return val is None or (isinstance(val, float) and val != val)
+
+
+def _fill_unknown(func, val):
+    return func('Unknown' if _is_missing(val) else val)
+
+
+def _filled(func):
+    # Stages that fillna('Unknown') before mapping, so a missing answer maps like the string 'Unknown'.
+    # A partial rather than a lambda keeps fitted pipelines picklable for the stage cache.
+    return partial(_fill_unknown, func)
+
+
+# Per-column mapping from a raw survey answer to the value the row-wise preprocessing stages produce.
+VALUE_NORMALIZERS = {
+    'years_code_total': _filled(bucket_years),
+    'years_code_pro':   _filled(bucket_years),
+    'org_size':         simplify_org_size,
+    'dev_type':         _filled(map_dev_type),
+    'education_level':  _filled(categorize_education),
+    'employment':       _filled(simplify_employment),
+}
+
+
+def _split_tokens(col: str, val) -> list:
+    if _is_missing(val):
+        val = 'Unknown'
+    tokens = val if isinstance(val, (list, tuple, set)) else str(val).split(';')
+    aliases = MULTI_SELECT_ALIASES.get(col, {})
+    out = []
+    for t in tokens:
+        t = str(t).strip()
+        out.append(aliases.get(t, t))
+    return out
+
+
+def _category_code(normalize, codes: dict, val) -> float:
+    return codes.get(normalize(val) if normalize is not None else val, np.nan)
+
+
+class FeaturePipeline:
+    """
+    Fitted feature transformer: captures the country grouping, the top-k vocabularies and the feature column
+    order that simplify_and_encode learns from the whole merged frame, so single survey profiles can be
+    transformed without the training data.
+
+    - fit_transform() runs the usual preprocessing on the merged frame and records its state.
+    - transform() / transform_record() map raw answers (merged-frame column names) straight to the feature
+      layout by dictionary lookup; columns missing from a record are treated as unanswered.
+    - to_dict() / save() / load() serialize the state as compact JSON.
+    """
+
+    def __init__(
+            self,
+            top_countries: Optional[Sequence[str]] = None,
+            vocab: Optional[dict] = None,
+            feature_names: Optional[Sequence[str]] = None,
+            country_avg_salary: Optional[dict] = None,
+            native_categoricals: Optional[dict] = None
+    ):
+        self.top_countries = list(top_countries or [])
+        self.vocab = {col: (kind, list(items)) for col, (kind, items) in (vocab or {}).items()}
+        self.feature_names = list(feature_names or [])
+        self.country_avg_salary = dict(country_avg_salary or {})
+        # {column: categories}; these columns are fed to the model as category codes, not one-hot.
+        self.native_categoricals = {col: list(cats) for col, cats in (native_categoricals or {}).items()}
+        self._build_lookups()
+
+    @property
+    def categorical_mask(self) -> np.ndarray:
+        """
+        Boolean mask over feature_names marking the native categorical (category code) features.
+        """
+        return np.array([name in self.native_categoricals for name in self.feature_names], dtype=bool)
+
+    @property
+    def feature_groups(self) -> dict[str, list[str]]:
+        """
+        Maps each source field (e.g. langs_worked) to the feature columns encoding it, in feature order.
+        Native categoricals and pass-through features form groups of one.
+        """
+        groups = {}
+        for col, _, _, lookup, _ in self._encoders:
+            if lookup:
+                groups[col] = [self.feature_names[i] for i in sorted(set(lookup.values()))]
+        for col, i, _, _ in self._categoricals:
+            groups[col] = [self.feature_names[i]]
+        for name, _ in self._passthrough:
+            groups[name] = [name]
+        return groups
+
+    def _build_lookups(self) -> None:
+        position = {name: i for i, name in enumerate(self.feature_names)}
+        self._top_countries = set(self.top_countries)
+        # (column, kind, normalizer, {encoded value: feature index}, set of vocabulary items)
+        self._encoders = []
+        covered = set()
+        for col, (kind, items) in self.vocab.items():
+            values = items if kind == "multi" else items + ['Other']
+            lookup = {v: position[f"{col}_{v}"] for v in values if f"{col}_{v}" in position}
+            covered.update(lookup.values())
+            self._encoders.append((col, kind, VALUE_NORMALIZERS.get(col), lookup, set(items)))
+        # (column, feature index, normalizer, {category: code})
+        self._categoricals = []
+        for col, cats in self.native_categoricals.items():
+            if col in position:
+                covered.add(position[col])
+                codes = {c: float(i) for i, c in enumerate(cats)}
+                self._categoricals.append((col, position[col], VALUE_NORMALIZERS.get(col), codes))
+        self._passthrough = [(name, i) for name, i in position.items() if i not in covered]
+
+    def _indices(self, col: str, kind: str, normalize, lookup: dict, items: set, val) -> list:
+        if kind == "multi":
+            return [lookup[t] for t in _split_tokens(col, val) if t in lookup]
+        if normalize is not None:
+            val = normalize(val)
+        elif _is_missing(val):
+            val = 'Unknown'
+        val = str(val)
+        idx = lookup.get(val if val in items else 'Other')
+        return [] if idx is None else [idx]
+
+    def fit(self, df: pd.DataFrame, native_categoricals: Sequence[str] = ()) -> "FeaturePipeline":
+        self.fit_transform(df, native_categoricals)
+        return self
+
+    def fit_transform(
+            self,
+            df: pd.DataFrame,
+            native_categoricals: Sequence[str] = ()
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Preprocesses the merged frame exactly like simplify_and_encode + add_salary_normalized, learning
+        the pipeline state on the way. Returns the processed frame and the per-country salary stats.
+        Columns in native_categoricals are kept as category codes (see NATIVE_CATEGORICAL_COLS).
+        """
+        rows = simplify_rows(df)
+        country_counts = normalize_country(rows['country']).value_counts()
+        self.top_countries = top_countries_from_counts(country_counts, TOP_COUNTRIES)
+        self.vocab = top_k_vocab(top_k_counts(rows, TOP_K_EXCLUDE + list(native_categoricals)), TOP_K)
+        self.native_categoricals = {col: rows[col].cat.categories.tolist() for col in native_categoricals}
+
+        out = simplify_and_encode(
+            rows, top_countries=self.top_countries, vocab=self.vocab, rows_simplified=True,
+            native_categoricals=native_categoricals
+        )
+        country_stats = add_salary_normalized(out)
+        self.feature_names = [c for c in out.columns if c not in NON_FEATURE_COLS]
+        self.country_avg_salary = country_stats['mean'].to_dict()
+        self._build_lookups()
+        return out, country_stats
+
+    def country(self, val) -> str:
+        """
+        Returns the grouped country label (one of the top countries or 'Other').
+        """
+        if _is_missing(val):
+            return 'Other'
+        val = COUNTRY_ALIASES.get(val, val)
+        return val if val in self._top_countries else 'Other'
+
+    def transform_record(self, record: dict) -> np.ndarray:
+        """
+        Transforms one raw profile into a float32 feature vector ordered like feature_names.
+        """
+        x = np.zeros(len(self.feature_names), dtype=np.float32)
+        for col, kind, normalize, lookup, items in self._encoders:
+            for i in self._indices(col, kind, normalize, lookup, items, record.get(col)):
+                x[i] = 1.0
+        for col, i, normalize, codes in self._categoricals:
+            x[i] = _category_code(normalize, codes, record.get(col))
+        for name, i in self._passthrough:
+            val = record.get(name)
+            x[i] = np.nan if _is_missing(val) else float(val)
+        return x
+
+    def transform_records(self, records: Sequence[dict]) -> np.ndarray:
+        """
+        Transforms a small batch of raw profiles into a float32 (n_records, n_features) matrix.
+        """
+        X = np.zeros((len(records), len(self.feature_names)), dtype=np.float32)
+        for r, record in enumerate(records):
+            X[r] = self.transform_record(record)
+        return X
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Transforms a frame of raw answers into the feature layout (indicators and category codes, training row order).
+        Each column is mapped once per distinct value and broadcast back via factorize codes; a missing column
+        is treated as unanswered in every row, like a key missing from transform_record's record.
+        """
+        X = np.zeros((len(df), len(self.feature_names)), dtype=np.uint8)
+        for col, kind, normalize, lookup, items in self._encoders:
+            if not lookup:
+                continue
+            if col not in df.columns:
+                X[:, self._indices(col, kind, normalize, lookup, items, None)] = 1
+                continue
+            codes, uniques = pd.factorize(df[col], use_na_sentinel=False)
+            own = sorted(set(lookup.values()))
+            own_pos = {i: j for j, i in enumerate(own)}
+            unique_indicators = np.zeros((len(uniques), len(own)), dtype=np.uint8)
+            for u, val in enumerate(uniques):
+                for i in self._indices(col, kind, normalize, lookup, items, val):
+                    unique_indicators[u, own_pos[i]] = 1
+            X[:, own] = unique_indicators[codes]
+        out = pd.DataFrame(X, index=df.index, columns=self.feature_names)
+        for col, _, normalize, codes in self._categoricals:
+            if col in df.columns:
+                out[col] = map_unique(df[col], partial(_category_code, normalize, codes)).astype(np.float32)
+            else:
+                out[col] = np.float32(_category_code(normalize, codes, None))
+        for name, _ in self._passthrough:
+            out[name] = df[name].astype(float) if name in df.columns else np.nan
+        return out
+
+    def to_dict(self) -> dict:
+        return {
+            "top_countries": self.top_countries,
+            "vocab": {col: [kind, items] for col, (kind, items) in self.vocab.items()},
+            "feature_names": self.feature_names,
+            "country_avg_salary": self.country_avg_salary,
+            "native_categoricals": self.native_categoricals,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "FeaturePipeline":
+        return cls(
+            top_countries=state["top_countries"],
+            vocab=state["vocab"],
+            feature_names=state["feature_names"],
+            country_avg_salary=state["country_avg_salary"],
+            native_categoricals=state.get("native_categoricals"),
+        )
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "FeaturePipeline":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,211 @@
+import os
+import json
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from data_io import DATA_DIR, SURVEY_URL, fetch_and_unpack
+from cleaning import clean_year, ingest_dtypes
+from merge import DROPPED_COLUMNS
+from preprocessing import (
+    simplify_rows, simplify_and_encode, normalize_country, top_countries_from_counts,
+    top_k_counts, top_k_vocab, TOP_COUNTRIES, TOP_K, TOP_K_EXCLUDE
+)
+from model.utils import add_salary_normalized
+from model.weighted_model import year_weights
+
+INCREMENTAL_DIR_NAME = "incremental"
+STATE_NAME = "state.json"
+
+
+def _store_paths(store_dir: str, year: int) -> tuple[str, str]:
+    return (
+        os.path.join(store_dir, "rows", f"{year}.pkl"),
+        os.path.join(store_dir, "aggregates", f"{year}.pkl"),
+    )
+
+
+def _load_state(store_dir: str) -> dict:
+    path = os.path.join(store_dir, STATE_NAME)
+    if not os.path.exists(path):
+        return {"years": []}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_state(store_dir: str, state: dict) -> None:
+    path = os.path.join(store_dir, STATE_NAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _dump(obj, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def year_aggregates(rows: pd.DataFrame) -> dict:
+    """
+    Computes the mergeable partial aggregates of one year's row-simplified frame:
+    row count, per-country counts and compensation sums, and top-k item/value counts per encoded column.
+    """
+    country = normalize_country(rows["country"])
+    comp = rows["compensation_total"]
+    return {
+        "rows": len(rows),
+        "country_counts": country.value_counts(),
+        "comp_sum": comp.groupby(country).sum(),
+        "comp_sumsq": (comp ** 2).groupby(country).sum(),
+        "comp_count": comp.groupby(country).count(),
+        "top_k": top_k_counts(rows, TOP_K_EXCLUDE),
+    }
+
+
+def _sum_counts(parts: list) -> pd.Series:
+    # Re-ranked like value_counts over the concatenated years.
+    total = pd.concat(parts).groupby(level=0, sort=False).sum()
+    return total.sort_values(ascending=False, kind="stable")
+
+
+def combine_aggregates(aggregates: dict) -> dict:
+    """
+    Merges per-year partial aggregates into the statistics the full pipeline derives from the merged data:
+
+    - top_countries: the country grouping used by preprocess_country
+    - country_stats: compensation mean/std/count per grouped country. The median is intentionally not
+      maintained: it cannot be merged from per-year partials without keeping every value, and only the
+      mean is used (as the salary normalization scale). Use fit_salary_stats() on build_dataset()'s frame
+      when a median is needed.
+    - vocab: the top-k vocabularies used by encode_df_top_k
+    - year_weights: recency weights over the stored years
+    """
+    parts = [aggregates[yr] for yr in sorted(aggregates)]
+
+    country_counts = _sum_counts([p["country_counts"] for p in parts])
+    top_countries = top_countries_from_counts(country_counts, TOP_COUNTRIES)
+
+    def grouped(key):
+        s = pd.concat([p[key] for p in parts])
+        group = s.index.where(s.index.isin(top_countries), "Other")
+        return s.groupby(group).sum()
+
+    comp_sum, comp_sumsq, comp_count = grouped("comp_sum"), grouped("comp_sumsq"), grouped("comp_count")
+    mean = comp_sum / comp_count
+    var = (comp_sumsq - comp_sum * mean) / (comp_count - 1)
+    country_stats = pd.DataFrame({
+        "mean": mean,
+        "std": np.sqrt(var.clip(lower=0)),
+        "count": comp_count.astype(np.int64),
+    })
+    country_stats.index.name = "country"
+
+    kinds, counts = {}, {}
+    for p in parts:
+        for col, (kind, c) in p["top_k"].items():
+            kinds.setdefault(col, set()).add(kind)
+            counts.setdefault(col, []).append(c)
+    vocab_counts = {}
+    for col, cs in counts.items():
+        # A tag column can contain no ';' in a given year; its values are then single tags.
+        kind = "multi" if "multi" in kinds[col] else "single"
+        if kind == "multi":
+            cs = [c.rename(index=str.strip) for c in cs]
+        vocab_counts[col] = (kind, _sum_counts(cs))
+
+    return {
+        "rows": sum(p["rows"] for p in parts),
+        "top_countries": top_countries,
+        "country_stats": country_stats,
+        "vocab": top_k_vocab(vocab_counts, TOP_K),
+        "year_weights": year_weights(aggregates),
+    }
+
+
+def append_year(year: int, df: pd.DataFrame, store_dir: str = os.path.join(DATA_DIR, INCREMENTAL_DIR_NAME)) -> dict:
+    """
+    Runs the row-wise preprocessing for one cleaned survey year and stores its rows and partial aggregates.
+    Re-appending a stored year replaces it. Returns the combined statistics over all stored years.
+    """
+    cols = sorted(c for c in df.columns if c not in DROPPED_COLUMNS)
+    frame = df[cols].copy(deep=False)
+    frame["year"] = year
+
+    rows = simplify_rows(frame)
+    rows_path, agg_path = _store_paths(store_dir, year)
+    _dump(rows, rows_path)
+    _dump(year_aggregates(rows), agg_path)
+
+    state = _load_state(store_dir)
+    state["years"] = sorted(set(state["years"]) | {int(year)})
+    _save_state(store_dir, state)
+    print(f"Stored {len(rows)} preprocessed rows for {year}; years in store: {state['years']}")
+    return load_statistics(store_dir)
+
+
+def bootstrap_store(dfs: dict[int, pd.DataFrame], store_dir: str = os.path.join(DATA_DIR, INCREMENTAL_DIR_NAME)) -> dict:
+    """
+    Fills the store from already cleaned years (e.g. the output of the clean_data stage), one year at a time.
+    """
+    stats = None
+    for yr in sorted(dfs):
+        stats = append_year(yr, dfs[yr], store_dir)
+    return stats
+
+
+def load_statistics(store_dir: str = os.path.join(DATA_DIR, INCREMENTAL_DIR_NAME)) -> dict:
+    """
+    Combines the stored per-year partial aggregates; no row data is read.
+    """
+    aggregates = {}
+    for yr in _load_state(store_dir)["years"]:
+        with open(_store_paths(store_dir, yr)[1], "rb") as f:
+            aggregates[yr] = pickle.load(f)
+    return combine_aggregates(aggregates)
+
+
+def build_dataset(
+        store_dir: str = os.path.join(DATA_DIR, INCREMENTAL_DIR_NAME),
+        stats: dict = None
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Assembles the model-ready frame from the stored years: concatenates their rows on the columns all years
+    share, then applies country grouping and top-k encoding with the statistics merged from the partials.
+    Returns the same (df, country_stats) pair as main.preprocess_data, except that country_stats has no
+    median column (see combine_aggregates).
+    """
+    if stats is None:
+        stats = load_statistics(store_dir)
+    frames = []
+    for yr in _load_state(store_dir)["years"]:
+        with open(_store_paths(store_dir, yr)[0], "rb") as f:
+            frames.append(pickle.load(f))
+    common = [c for c in frames[0].columns if all(c in f.columns for f in frames[1:])]
+    rows = pd.concat([f[common] for f in frames], ignore_index=True)
+    print(f"Merged DataFrame shape: {rows.shape}")
+
+    df = simplify_and_encode(
+        rows, top_countries=stats["top_countries"], vocab=stats["vocab"], rows_simplified=True
+    )
+    country_stats = add_salary_normalized(df, stats=stats["country_stats"])
+    return df, country_stats
+
+
+def add_survey_year(
+        year: int,
+        data_dir: str = DATA_DIR,
+        store_dir: str = os.path.join(DATA_DIR, INCREMENTAL_DIR_NAME),
+        url_template: str = SURVEY_URL
+) -> dict:
+    """
+    Downloads, cleans and preprocesses only the given survey year and appends it to the store.
+    Earlier years are neither downloaded nor re-read.
+    """
+    fetch_and_unpack(years=[year], outdir=data_dir, url_template=url_template, extract=False)
+    df = clean_year(year, data_dir, select=ingest_dtypes, save=False, from_zip=True)
+    return append_year(year, df, store_dir)
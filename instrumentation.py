@@ -0,0 +1,294 @@
+import os
+import sys
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_STATUS_PATH = "/proc/self/status"
+_CLEAR_REFS_PATH = "/proc/self/clear_refs"
+
+# Path of the JSON-lines metrics file, read once at import. When unset, instrument() returns functions
+# unchanged and metrics_stage() is a no-op.
+METRICS_ENV = "SALARY_METRICS"
+METRICS_PATH = os.environ.get(METRICS_ENV) or None
+# Shared by the worker processes started from this one, so their records belong to the same run.
+RUN_ENV = "SALARY_METRICS_RUN"
+if METRICS_PATH is not None:
+    os.environ.setdefault(RUN_ENV, f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}")
+    os.makedirs(os.path.dirname(os.path.abspath(METRICS_PATH)), exist_ok=True)
+
+_lock = threading.RLock()
+_local = threading.local()
+# Spans (track_memory blocks and instrumented calls) currently open in any thread, by id.
+_open_spans = {}
+
+
+def _status_kb(field: str) -> Optional[float]:
+    try:
+        with open(_STATUS_PATH, encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field):
+                    return float(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _memory_mb() -> tuple[float, float]:
+    # (current, peak) RSS in MB from a single read of /proc/self/status where available.
+    fields = {}
+    try:
+        with open(_STATUS_PATH, encoding="ascii") as f:
+            for line in f:
+                if line.startswith(("VmHWM:", "VmRSS:")):
+                    fields[line[:5]] = float(line.split()[1]) / 1024
+        return fields["VmRSS"], fields["VmHWM"]
+    except (OSError, KeyError):
+        return rss_mb(), peak_rss_mb()
+
+
+def rss_mb() -> float:
+    """
+    Returns the current resident set size of this process in MB (0 where it cannot be read).
+    """
+    kb = _status_kb("VmRSS:")
+    return kb / 1024 if kb is not None else 0.0
+
+
+def peak_rss_mb() -> float:
+    """
+    Returns the peak resident set size in MB since start-up or the last successful reset_peak_rss().
+    """
+    kb = _status_kb("VmHWM:")
+    if kb is not None:
+        return kb / 1024
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def reset_peak_rss() -> bool:
+    """
+    Resets the kernel's peak-RSS counter so the next peak_rss_mb() covers only what follows.
+    Only supported on Linux; returns False where the peak cannot be reset.
+    The peak so far is first folded into every open span, so nested spans do not hide each other's peaks.
+    """
+    with _lock:
+        if _open_spans:
+            _fold_peak(peak_rss_mb())
+        return _clear_peak()
+
+
+def _fold_peak(peak: float) -> None:
+    for span in _open_spans.values():
+        span["peak"] = max(span["peak"], peak)
+
+
+def _clear_peak() -> bool:
+    try:
+        with open(_CLEAR_REFS_PATH, "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _open_span() -> dict:
+    rss, peak = _memory_mb()
+    span = {"rss_before": rss, "peak": rss}
+    with _lock:
+        _fold_peak(peak)
+        span["peak_reset"] = _clear_peak()
+        _open_spans[id(span)] = span
+    return span
+
+
+def _close_span(span: dict) -> tuple[Optional[float], float]:
+    """
+    Returns (peak, current) RSS; the peak covers the whole span even if nested spans reset the counter.
+    The peak is None where the counter could not be reset, as it would be the process-wide peak.
+    """
+    with _lock:
+        del _open_spans[id(span)]
+        rss, peak = _memory_mb()
+        return (max(span["peak"], peak) if span["peak_reset"] else None), rss
+
+
+@contextmanager
+def track_memory(stage: str, report: list):
+    """
+    Records wall time, RSS before/after and peak RSS of the wrapped block as one row of `report`.
+    peak_rss_mb is None where the peak cannot be reset (no writable /proc/self/clear_refs).
+    """
+    span = _open_span()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        peak, rss_after = _close_span(span)
+        report.append({
+            "stage": stage,
+            "seconds": seconds,
+            "rss_before_mb": span["rss_before"],
+            "rss_after_mb": rss_after,
+            "peak_rss_mb": peak,
+        })
+
+
+def format_mb(value: Optional[float], width: int) -> str:
+    """
+    Formats a size in MB right-aligned to `width` characters, "n/a" for None.
+    """
+    return f"{value:>{width - 2}.0f}MB" if value is not None else f"{'n/a':>{width}}"
+
+
+def format_memory_report(report: list) -> str:
+    """
+    Formats the rows collected by track_memory as a fixed-width table.
+    """
+    lines = [f"{'stage':<28}{'seconds':>9}{'rss before':>12}{'rss after':>11}{'peak rss':>10}"]
+    for row in report:
+        lines.append(
+            f"{row['stage']:<28}{row['seconds']:>9.2f}{format_mb(row['rss_before_mb'], 12)}"
+            f"{format_mb(row['rss_after_mb'], 11)}{format_mb(row['peak_rss_mb'], 10)}"
+        )
+    return "\n".join(lines)
+
+
+def _shape(obj) -> tuple[Optional[int], Optional[int]]:
+    # (rows, columns) of a frame/array, a {year: frame} dict or the first item of a returned tuple.
+    shape = getattr(obj, "shape", None)
+    if isinstance(shape, tuple) and shape:
+        return int(shape[0]), int(shape[1]) if len(shape) > 1 else 1
+    if isinstance(obj, dict) and obj:
+        shapes = [_shape(v) for v in obj.values()]
+        if all(rows is not None for rows, _ in shapes):
+            return sum(rows for rows, _ in shapes), max(cols for _, cols in shapes)
+    if isinstance(obj, tuple) and obj:
+        return _shape(obj[0])
+    return None, None
+
+
+def _input_shape(args: tuple, kwargs: dict) -> tuple[Optional[int], Optional[int]]:
+    for value in (*args, *kwargs.values()):
+        shape = _shape(value)
+        if shape[0] is not None:
+            return shape
+    return None, None
+
+
+def _start(stage: str, shape_in: tuple) -> dict:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    record = {
+        "run": os.environ.get(RUN_ENV),
+        "stage": stage,
+        "parent": stack[-1]["stage"] if stack else None,
+        "depth": len(stack),
+        "pid": os.getpid(),
+        "thread": threading.current_thread().name,
+        "start": time.time(),
+        "rows_in": shape_in[0],
+        "cols_in": shape_in[1],
+    }
+    stack.append(record)
+    record["_span"] = _open_span()
+    record["_cpu"] = time.process_time()
+    record["_wall"] = time.perf_counter()
+    return record
+
+
+def _finish(record: dict, result=None, error: Optional[str] = None) -> None:
+    wall = time.perf_counter() - record.pop("_wall")
+    cpu = time.process_time() - record.pop("_cpu")
+    span = record.pop("_span")
+    peak, rss_after = _close_span(span)
+    _local.stack.pop()
+    record.update({
+        "wall_s": round(wall, 6),
+        "cpu_s": round(cpu, 6),
+        "rss_before_mb": round(span["rss_before"], 1),
+        "rss_after_mb": round(rss_after, 1),
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+        "peak_delta_mb": round(peak - span["rss_before"], 1) if peak is not None else None,
+    })
+    record["rows_out"], record["cols_out"] = _shape(result)
+    if error is not None:
+        record["error"] = error
+    line = json.dumps(record, default=str) + "\n"
+    with _lock:
+        with open(METRICS_PATH, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def instrument(func: Optional[Callable] = None, *, name: Optional[str] = None):
+    """
+    Decorator recording each call of a pipeline function as one line of the SALARY_METRICS file.
+
+    - Records wall time, CPU time, RSS before/after, peak RSS and its delta over the call, and the rows/columns
+      of the first frame-like argument and of the result (frames, arrays, {year: frame} dicts, tuples).
+    - Nested calls record their parent stage and depth; worker processes append to the same file.
+    - CPU time and peak RSS are process-wide, so they include threads running alongside the call.
+    - Disabled (the function is returned unchanged) unless SALARY_METRICS was set when this module was imported.
+    - Use as @instrument or @instrument(name="stage"); the default name is module.qualname.
+    """
+    if func is None:
+        return functools.partial(instrument, name=name)
+    if METRICS_PATH is None:
+        return func
+    stage = name or f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        record = _start(stage, _input_shape(args, kwargs))
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as exc:
+            _finish(record, error=type(exc).__name__)
+            raise
+        _finish(record, result)
+        return result
+
+    return wrapper
+
+
+@contextmanager
+def _stage_span(stage: str, data):
+    record = _start(stage, _shape(data))
+    try:
+        yield
+    except BaseException as exc:
+        _finish(record, error=type(exc).__name__)
+        raise
+    _finish(record)
+
+
+def metrics_stage(stage: str, data=None):
+    """
+    Context manager recording the wrapped block like an instrument()ed call; `data` sets rows_in/cols_in.
+    A no-op unless SALARY_METRICS is set.
+    """
+    if METRICS_PATH is None:
+        return nullcontext()
+    return _stage_span(stage, data)
+
+
+def load_metrics(path: Optional[str] = None, run: Optional[str] = None) -> list[dict]:
+    """
+    Reads the records of a metrics file (default: SALARY_METRICS), optionally only those of one run.
+    """
+    with open(path or METRICS_PATH, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [r for r in records if run is None or r["run"] == run]
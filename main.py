@@ -1,127 +1,333 @@
 import pandas as pd
 import numpy as np
-from data_io import fetch_and_unpack, load_raw_data
-from cleaning import harmonize_and_select, drop_empty_and_low_info, convert_to_numeric, save_cleaned
+from functools import cache
+from typing import Optional, Sequence
+import data_io
+import cleaning
+import merge
+import preprocessing
+import model.utils
+from data_io import DATA_DIR, fetch_and_unpack, load_raw_data, archive_digests
+from cleaning import (
+    harmonize_and_select, drop_empty_and_low_info, convert_to_numeric,
+    ingest_dtypes, clean_years_parallel
+)
 from merge import merge_data
-from preprocessing import summarize_nulls, simplify_and_encode
-from model.utils import prepare_train_test, prepare_train_test_interpolation
+import features
+from preprocessing import summarize_nulls
+from features import FeaturePipeline
+from model.utils import prepare_train_test, prepare_train_test_interpolation, feature_matrix, take_rows
+from model.scheduler import fit_concurrently
+from model.engines import native_categoricals
+from model.weighting import LINEAR, Schedule, search_schedules
+from stage_cache import StageCache, code_version
 from model.base_model import train_base_model, evaluate_model
 from model.weighted_model import compute_sample_weights, train_weighted_model, evaluate_weighted_model
+from model.intervals import predict_with_intervals
+from model.evaluation import segment_labels, format_segments
+from model.importance import cached_permutation_importance
+from model.backtest import backtest
+from artifacts import save_artifacts
+from instrumentation import instrument, metrics_stage
+from sklearn.ensemble import RandomForestRegressor
 from contextlib import redirect_stdout
 
 
-def ingest_data() -> dict[int, pd.DataFrame]:
-    fetch_and_unpack()
-    return load_raw_data()
+SURVEY_YEARS = range(2017, 2025)
 
 
+@instrument
+def ingest_data(data_dir: str = DATA_DIR) -> dict[int, pd.DataFrame]:
+    return load_raw_data(data_dir, select=ingest_dtypes, from_zip=True)
+
+
+@instrument
 def clean_data(dfs: dict[int, pd.DataFrame]) -> dict[int, pd.DataFrame]:
     dfs = harmonize_and_select(dfs)
     dfs = drop_empty_and_low_info(dfs)
     dfs = convert_to_numeric(dfs)
-    save_cleaned(dfs)
     return dfs
 
 
+@instrument
+def ingest_and_clean(workers: int = 1, data_dir: str = DATA_DIR) -> dict[int, pd.DataFrame]:
+    if workers > 1:
+        return clean_years_parallel(data_dir=data_dir, workers=workers, select=ingest_dtypes, save=False, from_zip=True)
+    return clean_data(ingest_data(data_dir))
+
+
+@instrument
 def merge_data_pipeline(dfs: dict[int, pd.DataFrame]) -> pd.DataFrame:
     return merge_data(dfs)
 
 
-def preprocess_data(df: pd.DataFrame) -> pd.DataFrame:
+@instrument
+def preprocess_data(
+        df: pd.DataFrame,
+        categorical_cols: Sequence[str] = ()
+) -> tuple[pd.DataFrame, pd.DataFrame, FeaturePipeline]:
     print("Null summary:\n", summarize_nulls(df))
-    df = simplify_and_encode(df)
-    country_avg = df.groupby("country")["compensation_total"].mean()
-    df["salary_normalized"] = df.apply(
-        lambda row: row["compensation_total"] / country_avg.get(row["country"], np.nan),
-        axis=1
-    )
-    return df
+    pipeline = FeaturePipeline()
+    df, country_stats = pipeline.fit_transform(df, categorical_cols)
+    return df, country_stats, pipeline
 
 
-def run_baseline_model(
-        X_train: pd.DataFrame,
-        y_train: np.ndarray,
+@instrument
+def print_prediction_intervals(
+        rf: RandomForestRegressor,
         X_test: pd.DataFrame,
-        y_test: np.ndarray,
         test_countries: pd.Series,
         country_avg: pd.Series
 ) -> None:
-    print("\n--- Baseline Model ---")
-    rf = train_base_model(X_train, y_train)
-    results = evaluate_model(
+    if not hasattr(rf, "estimators_"):
+        return
+    intervals = predict_with_intervals(rf, X_test, test_countries, country_avg)
+    print("\nSample 90% tree-variance intervals (first 5 rows):")
+    sample = intervals.loc[:, ["country", "q5_salary_usd", "pred_salary_usd", "q95_salary_usd"]].head()
+    print(sample.to_string(index=True, float_format="%.2f"))
+
+
+@instrument
+def report_model(
+        rf: RandomForestRegressor,
+        X_test: np.ndarray,
+        y_test: np.ndarray,
+        test_countries: pd.Series,
+        country_avg: pd.Series,
+        feature_names: list[str],
+        evaluate=evaluate_model,
+        segments: Optional[pd.DataFrame] = None
+) -> None:
+    results = evaluate(
         rf=rf,
         X_test=X_test,
         y_test_log=y_test,
         country_series=test_countries,
-        country_avg_salary=country_avg
+        country_avg_salary=country_avg,
+        segments=segments
     )
+    if results["segments"]:
+        print("\n" + format_segments(results["segments"]))
 
     print("\nSample predictions (first 5 rows):")
-    sample = results.loc[:, ["country", "pred_salary_usd", "true_salary_usd"]].head()
+    sample = results["predictions"].loc[:, ["country", "pred_salary_usd", "true_salary_usd"]].head()
     print(sample.to_string(index=True, float_format="%.2f"))
 
-    importances = pd.Series(rf.feature_importances_, index=X_train.columns)
-    top10 = importances.nlargest(10)
-    print("\nTop 10 feature importances:")
-    print(top10.to_string(float_format="%.4f"))
+    print_prediction_intervals(rf, X_test, test_countries, country_avg)
 
+    if hasattr(rf, "feature_importances_"):
+        importances = pd.Series(rf.feature_importances_, index=feature_names)
+        top10 = importances.nlargest(10)
+        print("\nTop 10 feature importances:")
+        print(top10.to_string(float_format="%.4f"))
 
-def run_weighted_model(
-        X_train: pd.DataFrame,
-        y_train: np.ndarray,
-        X_test: pd.DataFrame,
+
+@instrument
+def print_permutation_importance(
+        rf,
+        X_test: np.ndarray,
         y_test: np.ndarray,
-        test_countries: pd.Series,
-        country_avg: pd.Series,
-        all_years: pd.Series
+        feature_pipeline: FeaturePipeline,
+        stage_cache: StageCache
 ) -> None:
-    print("\n--- Weighted Model ---")
-    train_years = all_years.loc[X_train.index]
-    weights = compute_sample_weights(train_years)
+    importances = cached_permutation_importance(
+        rf, X_test, y_test, feature_pipeline.feature_names, stage_cache,
+        groups=feature_pipeline.feature_groups, n_repeats=3, max_rows=5_000
+    )
+    print(f"\nTop 10 permutation importances by source field "
+          f"(MAE increase over {importances.attrs['rows']} test rows):")
+    print(importances.head(10).to_string(float_format="%.4f"))
 
-    rf = train_weighted_model(X_train, y_train, weights)
 
-    results = evaluate_weighted_model(
-        rf=rf,
-        X_test=X_test,
-        y_test_log=y_test,
-        country_series=test_countries,
-        country_avg_salary=country_avg
+@instrument
+def train_models(
+        X_train: np.ndarray,
+        y_train: np.ndarray,
+        train_years: pd.Series,
+        X_i_train: np.ndarray,
+        y_i_train: np.ndarray,
+        cores: Optional[int] = None,
+        engine: str = "forest",
+        categorical_features: Optional[np.ndarray] = None,
+        weight_schedule: Schedule = LINEAR
+) -> dict[str, RandomForestRegressor]:
+    """
+    Fits the baseline, weighted and interpolation models concurrently within one core budget.
+    The baseline and weighted models share the same read-only training matrix.
+    """
+    weights = compute_sample_weights(train_years, weight_schedule)
+    engine_args = {"engine": engine, "categorical_features": categorical_features}
+    return fit_concurrently({
+        "baseline": lambda n_jobs: train_base_model(X_train, y_train, n_jobs=n_jobs, **engine_args),
+        "weighted": lambda n_jobs: train_weighted_model(X_train, y_train, weights, n_jobs=n_jobs, **engine_args),
+        "interpolation": lambda n_jobs: train_base_model(X_i_train, y_i_train, n_jobs=n_jobs, **engine_args),
+    }, cores=cores)
+
+
+@instrument
+def pipeline_stages(
+        stage_cache: StageCache,
+        workers: int = 1,
+        engine: str = "forest",
+        data_dir: str = DATA_DIR
+) -> dict:
+    """
+    Returns the cached data stages as lazy thunks {"cleaned", "merged", "processed"} plus their keys,
+    reading the survey archives from data_dir.
+
+    Stage keys chain from the archive digests, so they can all be computed up front and
+    only the stages actually needed on this run are loaded or recomputed.
+    """
+    clean_key = stage_cache.key(
+        "clean_data", str(archive_digests(SURVEY_YEARS, data_dir)),
+        code=code_version(data_io, cleaning, ingest_data, clean_data, ingest_and_clean)
+    )
+    merge_key = stage_cache.key("merge", clean_key, code=code_version(merge, merge_data_pipeline))
+    preprocess_params = {"categorical_cols": native_categoricals(engine)}
+    preprocess_key = stage_cache.key(
+        "preprocess", merge_key, preprocess_params,
+        code=code_version(preprocessing, features, model.utils, preprocess_data)
     )
 
-    print("\nSample predictions (first 5 rows):")
-    sample = results.loc[:, ["country", "pred_salary_usd", "true_salary_usd"]].head()
-    print(sample.to_string(index=True, float_format="%.2f"))
+    @cache
+    def cleaned():
+        return stage_cache.run("clean_data", clean_key, lambda: ingest_and_clean(workers, data_dir))
 
-    importances = pd.Series(rf.feature_importances_, index=X_train.columns)
-    top10 = importances.nlargest(10)
-    print("\nTop 10 feature importances:")
-    print(top10.to_string(float_format="%.4f"))
+    @cache
+    def merged():
+        def compute():
+            df = merge_data_pipeline(cleaned())
+            print("Merged columns:", df.columns.tolist())
+            return df
+        return stage_cache.run("merge", merge_key, compute)
 
+    @cache
+    def processed():
+        return stage_cache.run("preprocess", preprocess_key, lambda: preprocess_data(merged(), **preprocess_params))
 
-def main():
-    dfs = ingest_data()
-    cleaned = clean_data(dfs)
-    merged = merge_data_pipeline(cleaned)
-    print("Merged columns:", merged.columns.tolist())
+    return {
+        "cleaned": cleaned, "merged": merged, "processed": processed,
+        "clean_key": clean_key, "merge_key": merge_key, "preprocess_key": preprocess_key,
+    }
 
-    processed = preprocess_data(merged)
 
-    X_train, y_train, X_test, y_test, test_countries, country_avg = prepare_train_test(processed)
+@instrument
+def train_and_report(
+        stage_cache: StageCache,
+        stages: dict,
+        cores: Optional[int] = None,
+        engine: str = "forest",
+        weight_schedule: Schedule = LINEAR,
+        search_budget_s: Optional[float] = None
+) -> tuple[dict, FeaturePipeline]:
+    """
+    Everything main() does after the data stages: splits, feature matrix, (optional) weighting search,
+    the concurrent fits and the model reports. Returns the fitted models and the feature pipeline.
+    """
+    preprocess_key, processed = stages["preprocess_key"], stages["processed"]
+    split_params = {"test_year": 2024}
+    split_key = stage_cache.key("split", preprocess_key, split_params, code=code_version(model.utils))
+    interp_params = {"test_size": 0.2, "random_state": 0}
+    interp_key = stage_cache.key("split_interpolation", preprocess_key, interp_params, code=code_version(model.utils))
 
-    run_baseline_model(
-        X_train, y_train,
-        X_test, y_test,
-        test_countries, country_avg
+    processed_df, country_stats, feature_pipeline = processed()
+    country_avg = country_stats["mean"]
+
+    with metrics_stage("main.splits", processed_df):
+        train_rows, y_train, test_rows, y_test, test_countries, country_avg = stage_cache.run(
+            "split", split_key,
+            lambda: prepare_train_test(processed_df, country_avg_salary=country_avg, **split_params)
+        )
+
+        i_train_rows, y_i_train, i_test_rows, y_i_test, c_i_test, avg = stage_cache.run(
+            "split_interpolation", interp_key,
+            lambda: prepare_train_test_interpolation(processed_df, country_avg_salary=country_avg, **interp_params)
+        )
+
+    # One float32 matrix for all fits and predictions; the splits only select rows from it.
+    feature_names = feature_pipeline.feature_names
+    with metrics_stage("main.feature_matrices", processed_df):
+        X_all = feature_matrix(processed_df, feature_names)
+        X_tr, X_te = take_rows(X_all, train_rows), take_rows(X_all, test_rows)
+        X_i_tr, X_i_te = take_rows(X_all, i_train_rows), take_rows(X_all, i_test_rows)
+        del X_all
+
+    train_years = processed_df['year'].iloc[train_rows]
+    if search_budget_s:
+        weight_schedule, _ = search_schedules(
+            X_tr, y_train, train_years, budget_s=search_budget_s, cores=cores,
+            engine=engine, categorical_features=feature_pipeline.categorical_mask
+        )
+
+    models = train_models(
+        X_tr, y_train, train_years,
+        X_i_tr, y_i_train,
+        cores=cores,
+        engine=engine,
+        categorical_features=feature_pipeline.categorical_mask,
+        weight_schedule=weight_schedule
     )
-    run_weighted_model(
-        X_train, y_train,
-        X_test, y_test,
-        test_countries, country_avg,
-        processed['year']
+
+    test_segments = segment_labels(processed_df.iloc[test_rows], native_categoricals=feature_pipeline.native_categoricals)
+    print("\n--- Baseline Model ---")
+    report_model(models["baseline"], X_te, y_test, test_countries, country_avg, feature_names, segments=test_segments)
+    print("\n--- Weighted Model ---")
+    report_model(
+        models["weighted"], X_te, y_test, test_countries, country_avg, feature_names,
+        evaluate=evaluate_weighted_model, segments=test_segments
+    )
+    print_permutation_importance(models["weighted"], X_te, y_test, feature_pipeline, stage_cache)
+    print("\n--- Baseline Model ---")
+    report_model(
+        models["interpolation"], X_i_te, y_i_test, c_i_test, avg, feature_names,
+        segments=segment_labels(processed_df.iloc[i_test_rows], native_categoricals=feature_pipeline.native_categoricals)
+    )
+    return models, feature_pipeline
+
+
+@instrument
+def main(
+        workers: int = 1,
+        use_cache: bool = True,
+        cores: Optional[int] = None,
+        engine: str = "forest",
+        weight_schedule: Schedule = LINEAR,
+        search_budget_s: Optional[float] = None
+):
+    fetch_and_unpack(years=SURVEY_YEARS, extract=False)
+
+    stage_cache = StageCache(enabled=use_cache)
+    stages = pipeline_stages(stage_cache, workers=workers, engine=engine)
+    models, feature_pipeline = train_and_report(
+        stage_cache, stages, cores=cores, engine=engine,
+        weight_schedule=weight_schedule, search_budget_s=search_budget_s
+    )
+    save_artifacts(models["weighted"], feature_pipeline)
+
+    print("\n=== Stage cache ===")
+    print(stage_cache.report())
+
+
+@instrument
+def run_backtest(
+        workers: int = 1,
+        use_cache: bool = True,
+        cores: Optional[int] = None,
+        engine: str = "forest",
+        models: Sequence[str] = ("baseline", "weighted"),
+        weight_schedule: Schedule = LINEAR
+):
+    """
+    Scores the models year over year (train on earlier years, test on each of 2019-2024) from the cached stages.
+    """
+    fetch_and_unpack(years=SURVEY_YEARS, extract=False)
+    stage_cache = StageCache(enabled=use_cache)
+    processed_df, country_stats, feature_pipeline = pipeline_stages(stage_cache, workers=workers, engine=engine)["processed"]()
+    return backtest(
+        processed_df, country_stats["mean"], feature_pipeline.feature_names,
+        models=models, schedule=weight_schedule, engine=engine,
+        categorical_features=feature_pipeline.categorical_mask, cores=cores
     )
-    X_i_train, y_i_train, X_i_test, y_i_test, c_i_test, avg = prepare_train_test_interpolation(processed, test_size=0.2)
-    run_baseline_model(X_i_train, y_i_train, X_i_test, y_i_test, c_i_test, avg)
 
 
 if __name__ == '__main__':
@@ -1,5 +1,13 @@
+import numpy as np
 import pandas as pd
 
+DROPPED_COLUMNS = [
+    'db_desired',
+    'langs_desired',
+    'platform_desired',
+    'webframe_desired'
+]
+
 
 def find_common_columns(dfs: dict[int, pd.DataFrame]) -> list[str]:
     """
@@ -17,19 +25,9 @@ def merge_data(dfs: dict[int, pd.DataFrame]) -> pd.DataFrame:
     Merges multiple yearly DataFrames into a single DataFrame using only common columns.
     """
     common_cols = find_common_columns(dfs)
-    drop_cols = [
-        'db_desired',
-        'langs_desired',
-        'platform_desired',
-        'webframe_desired'
-    ]
-    common_cols = [c for c in common_cols if c not in drop_cols]
-    merged_list = []
-    for yr, df in sorted(dfs.items()):
-        sub = df[common_cols].copy()
-        sub['year'] = yr
-        merged_list.append(sub)
-
-    merged_df = pd.concat(merged_list, ignore_index=True)
+    common_cols = [c for c in common_cols if c not in DROPPED_COLUMNS]
+    years = sorted(dfs)
+    merged_df = pd.concat([dfs[yr][common_cols] for yr in years], ignore_index=True)
+    merged_df['year'] = np.repeat(years, [len(dfs[yr]) for yr in years])
     print(f"Merged DataFrame shape: {merged_df.shape}")
     return merged_df
@@ -0,0 +1,127 @@
+import time
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence
+from joblib import Parallel, delayed
+
+from instrumentation import instrument, rss_mb, peak_rss_mb, reset_peak_rss
+from model.engines import make_regressor, fit_regressor
+from model.evaluation import evaluate_predictions
+from model.scheduler import available_cores, split_cores
+from model.utils import feature_matrix
+from model.weighting import LINEAR, Schedule, sample_weights
+
+BACKTEST_ORIGINS = range(2019, 2025)
+
+
+@instrument
+def _run_fold(
+        X_all: np.ndarray,
+        y_log: np.ndarray,
+        years: np.ndarray,
+        countries: np.ndarray,
+        country_avg_salary: pd.Series,
+        origin: int,
+        model_name: str,
+        schedule: Schedule,
+        engine: str,
+        categorical_features: Optional[np.ndarray],
+        n_jobs: int
+) -> dict:
+    train_rows = np.flatnonzero(years < origin)
+    test_rows = np.flatnonzero(years == origin)
+    weights = sample_weights(years[train_rows], schedule) if model_name == "weighted" else None
+
+    rss_before = rss_mb()
+    peak_reset = reset_peak_rss()
+    start = time.perf_counter()
+    model = make_regressor(engine, n_jobs=n_jobs, categorical_features=categorical_features)
+    fit_regressor(model, X_all[train_rows], y_log[train_rows], sample_weight=weights, n_jobs=n_jobs)
+    train_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred_log = model.predict(X_all[test_rows])
+    predict_seconds = time.perf_counter() - start
+    peak = max(peak_rss_mb(), rss_before) if peak_reset else None
+
+    metrics = evaluate_predictions(
+        y_log[test_rows], y_pred_log, countries[test_rows], country_avg_salary, n_boot=0
+    )["metrics"]["value"]
+    return {
+        "origin": origin,
+        "model": model_name,
+        "train_years": f"{years[train_rows].min()}-{origin - 1}",
+        "n_train": len(train_rows),
+        "n_test": len(test_rows),
+        "mae_log": metrics["mae_log"],
+        "mae_norm": metrics["mae_norm"],
+        "mae_usd": metrics["mae_usd"],
+        "train_s": train_seconds,
+        "predict_s": predict_seconds,
+        "n_jobs": n_jobs,
+        "peak_rss_mb": peak,
+        "fold_rss_mb": peak - rss_before if peak is not None else None,
+    }
+
+
+@instrument
+def backtest(
+        df: pd.DataFrame,
+        country_avg_salary: pd.Series,
+        feature_names: Optional[Sequence[str]] = None,
+        origins: Sequence[int] = BACKTEST_ORIGINS,
+        models: Sequence[str] = ("weighted",),
+        schedule: Schedule = LINEAR,
+        engine: str = "forest",
+        categorical_features: Optional[np.ndarray] = None,
+        cores: Optional[int] = None,
+        X_all: Optional[np.ndarray] = None
+) -> pd.DataFrame:
+    """
+    Rolling-origin temporal backtest: for every origin year, trains on all earlier years and scores
+    that year, like prepare_train_test does for 2024 alone.
+
+    - The float32 feature matrix is built once (or passed in); folds only select rows from it.
+    - Folds run in parallel worker processes within the core budget. joblib memory-maps the shared
+      matrix into the workers, so it is not copied per fold, and each fold's memory is measured in
+      its own process: peak_rss_mb is the worker's peak, fold_rss_mb the growth during the fold (both
+      None where the peak cannot be reset).
+    - `models` may contain "baseline" (unweighted) and "weighted" (sample weights from `schedule`,
+      computed over each fold's own training years).
+
+    Returns one row per fold and model with MAE in log, normalized and USD space plus timings.
+    """
+    if X_all is None:
+        X_all = feature_matrix(df, feature_names)
+    years = df["year"].to_numpy(dtype=np.int64)
+    y_log = np.log1p(df["salary_normalized"].to_numpy(dtype=np.float64))
+    countries = df["country"].to_numpy()
+
+    observed = set(np.unique(years).tolist())
+    folds = [
+        (origin, name) for origin in origins for name in models
+        if origin in observed and any(yr < origin for yr in observed)
+    ]
+    if not folds:
+        raise ValueError(f"No backtest origin in {list(origins)} has both earlier and test-year rows")
+
+    cores = cores or available_cores()
+    slots = min(len(folds), cores)
+    shares = split_cores(slots, cores)
+    # Forest fits run longest on the biggest training sets, so those are dispatched first.
+    order = sorted(range(len(folds)), key=lambda i: -folds[i][0])
+
+    start = time.perf_counter()
+    rows = Parallel(n_jobs=slots)(
+        delayed(_run_fold)(
+            X_all, y_log, years, countries, country_avg_salary, folds[i][0], folds[i][1],
+            schedule, engine, categorical_features, shares[k % slots]
+        )
+        for k, i in enumerate(order)
+    )
+    wall = time.perf_counter() - start
+
+    results = pd.DataFrame(rows).sort_values(["origin", "model"]).reset_index(drop=True)
+    print(f"\n=== Rolling-origin backtest ({engine}, {len(folds)} folds, core budget {cores}, {wall:.1f}s) ===")
+    print(results.to_string(index=False, float_format="%.3f"))
+    return results
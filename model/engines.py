@@ -0,0 +1,63 @@
+import numpy as np
+from typing import Optional
+from threadpoolctl import threadpool_limits
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+
+from instrumentation import instrument
+from preprocessing import NATIVE_CATEGORICAL_COLS
+
+ENGINES = ("forest", "hgb")
+
+
+def native_categoricals(engine: str) -> list[str]:
+    """
+    Columns the engine consumes as category codes instead of one-hot indicators.
+    """
+    return list(NATIVE_CATEGORICAL_COLS) if engine == "hgb" else []
+
+
+def make_regressor(
+        engine: str = "forest",
+        n_jobs: int = -1,
+        categorical_features: Optional[np.ndarray] = None
+):
+    """
+    Builds an unfitted regressor for the given engine:
+
+    - "forest": the 100-tree RandomForestRegressor with unbounded depth used so far
+    - "hgb": HistGradientBoostingRegressor, binning features into at most 255 bins and splitting
+      the categorical_features mask natively; early stopping on a 10% validation split
+    """
+    if engine == "forest":
+        return RandomForestRegressor(
+            n_estimators=100,
+            oob_score=True,
+            random_state=0,
+            n_jobs=n_jobs
+        )
+    if engine == "hgb":
+        return HistGradientBoostingRegressor(
+            max_iter=500,
+            learning_rate=0.1,
+            max_leaf_nodes=63,
+            min_samples_leaf=40,
+            l2_regularization=1.0,
+            categorical_features=categorical_features,
+            early_stopping=True,
+            validation_fraction=0.1,
+            n_iter_no_change=20,
+            random_state=0
+        )
+    raise ValueError(f"Unknown model engine {engine!r}; expected one of {ENGINES}")
+
+
+@instrument
+def fit_regressor(model, X, y, sample_weight=None, n_jobs: int = -1):
+    """
+    Fits a regressor built by make_regressor. HistGradientBoosting has no n_jobs and parallelizes with
+    OpenMP, so its thread count is limited for the calling thread instead.
+    """
+    if isinstance(model, HistGradientBoostingRegressor) and n_jobs > 0:
+        with threadpool_limits(limits=n_jobs, user_api="openmp"):
+            return model.fit(X, y, sample_weight=sample_weight)
+    return model.fit(X, y, sample_weight=sample_weight)
@@ -0,0 +1,305 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from typing import Mapping, Optional, Sequence
+
+from instrumentation import instrument
+
+# Absolute-error metrics computed per row, in this column order.
+ERROR_METRICS = ("mae_log", "mae_norm", "mae_usd")
+SEGMENT_COLS = ("country", "year", "dev_type", "org_size")
+OTHER_SEGMENT = "(other)"
+
+
+@instrument
+def segment_labels(
+        df: pd.DataFrame,
+        columns: Sequence[str] = SEGMENT_COLS,
+        native_categoricals: Optional[Mapping[str, Sequence[str]]] = None
+) -> pd.DataFrame:
+    """
+    Recovers one label per row for each segment column of a processed frame:
+
+    - columns still present (country, year) are used as they are
+    - native categorical columns hold codes and are mapped back to their categories
+    - one-hot encoded columns (e.g. dev_type_Backend, ...) give the name of the set indicator;
+      rows outside the encoded top-k categories are labelled "(other)"
+
+    The recovered columns are returned as pandas Categoricals, so evaluate_predictions takes their codes
+    as they are instead of factorizing the labels again.
+    """
+    native_categoricals = native_categoricals or {}
+    out = {}
+    for col in columns:
+        if col in native_categoricals and col in df.columns:
+            codes = df[col].to_numpy()
+            categories = np.asarray(list(native_categoricals[col]) + [OTHER_SEGMENT], dtype=object)
+            codes = np.where(np.isnan(codes), len(categories) - 1, codes).astype(np.int64)
+            out[col] = pd.Categorical.from_codes(codes, categories)
+        elif col in df.columns:
+            out[col] = df[col].to_numpy()
+        else:
+            prefix = f"{col}_"
+            dummies = [c for c in df.columns if c.startswith(prefix)]
+            if not dummies:
+                continue
+            onehot = df[dummies].to_numpy(dtype=bool)
+            names = np.asarray([c[len(prefix):] for c in dummies] + [OTHER_SEGMENT], dtype=object)
+            first = np.where(onehot.any(axis=1), onehot.argmax(axis=1), len(dummies))
+            out[col] = pd.Categorical.from_codes(first, names)
+    return pd.DataFrame(out, index=df.index)
+
+
+def _factorized(values: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    # Categorical columns already carry their codes; anything else is factorized with sorted labels.
+    # Missing labels become a segment of their own rather than a -1 code.
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, labels = pd.factorize(values.to_numpy(), sort=True)
+    labels = pd.Index(labels)
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(labels), codes)
+        labels = labels.append(pd.Index([np.nan]))
+    return codes, labels
+
+
+def _joint_cells(codes_by_col: list, n: int) -> tuple[np.ndarray, int, np.ndarray]:
+    # Cell id per row for the combination of its codes in every column, the number of cells and each
+    # cell's first row. Mixed-radix ids are refactorized before they could overflow int64.
+    joint, n_joint = np.zeros(n, dtype=np.int64), 1
+    for codes in codes_by_col:
+        size = int(codes.max()) + 1 if len(codes) else 1
+        if n_joint * size >= 2 ** 62:
+            joint, uniques = pd.factorize(joint)
+            n_joint = len(uniques)
+        joint = joint * size + codes
+        n_joint *= size
+    cells, uniques = pd.factorize(joint)
+    first = np.empty(len(uniques), dtype=np.int64)
+    first[cells[::-1]] = np.arange(n - 1, -1, -1)
+    return cells, len(uniques), first
+
+
+def _error_matrix(y_true_log, y_pred_log, avg_salary) -> tuple[np.ndarray, dict]:
+    true_norm, pred_norm = np.expm1(y_true_log), np.expm1(y_pred_log)
+    true_usd, pred_usd = true_norm * avg_salary, pred_norm * avg_salary
+    errors = np.abs(np.column_stack([y_true_log - y_pred_log, true_norm - pred_norm, true_usd - pred_usd]))
+    values = {
+        "pred_salary_norm": pred_norm, "true_salary_norm": true_norm,
+        "pred_salary_usd": pred_usd, "true_salary_usd": true_usd,
+    }
+    return errors, values
+
+
+def _boot_batches(n_boot: int, rows: int, batch_elements: int):
+    batch = max(1, batch_elements // max(rows, 1))
+    for start in range(0, n_boot, batch):
+        yield min(batch, n_boot - start)
+
+
+def _exact_segment_boot(segment_errors: np.ndarray, n: int, n_boot: int, rng) -> np.ndarray:
+    # A full n-out-of-n bootstrap restricted to one segment's k rows: their draw counts are the first k cells
+    # of a multinomial over n draws, the rest of the test set being one extra cell. Unsampled replicates are NaN.
+    k = len(segment_errors)
+    draws = rng.multinomial(n, np.r_[np.full(k, 1.0 / n), 1.0 - k / n], size=n_boot)[:, :k]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (draws @ segment_errors) / draws.sum(axis=1, keepdims=True)
+
+
+@instrument
+def evaluate_predictions(
+        y_true_log,
+        y_pred_log,
+        country_series: pd.Series,
+        country_avg_salary: pd.Series,
+        segments: Optional[pd.DataFrame] = None,
+        n_boot: int = 200,
+        ci: float = 0.95,
+        max_boot_rows: int = 20_000,
+        min_segment_boot_rows: int = 30,
+        batch_elements: int = 1_000_000,
+        random_state: int = 0,
+        index: Optional[pd.Index] = None
+) -> dict:
+    """
+    Computes every test metric in one vectorized pass over the predictions of a log1p(salary_normalized) model.
+
+    Returns a dict of:
+    - "metrics": mae_log / mae_norm / mae_usd (plus bias_usd and r2_log) with bootstrap CI bounds
+    - "segments": {column: DataFrame} with n and the three MAEs (and their CIs) per segment label,
+      for each column of `segments` (e.g. from segment_labels: country, year, dev_type, org_size)
+    - "predictions": per-row normalized and USD predictions, like evaluate_model used to build
+
+    Categorical columns (country_series and segments) are used through their codes; other labels are
+    factorized once, and a segment column named like country_series with the same values reuses its codes.
+
+    Bootstrap replicates are drawn in batches of row indices. Rows sharing every segment label form a
+    cell; one take gathers the sampled rows' metrics, one bincount per metric sums them per cell and
+    replicate, and a sparse product adds the cells up per segment label. Above `max_boot_rows` rows, replicates resample
+    max_boot_rows rows (m-out-of-n) and their spread is rescaled by sqrt(m / n), which is exact in
+    expectation for means and keeps the cost independent of the test-set size.
+
+    - A segment expected to get fewer than `min_segment_boot_rows` rows in an m-row replicate would have
+      its CI built from a handful of rows and then shrunk; it is resampled with its own n instead
+      (an exact n-out-of-n bootstrap of just its rows, so the cost grows only with the segment size).
+    - Segments that most replicates never sample get NaN CIs.
+    """
+    y_true_log = np.asarray(y_true_log, dtype=np.float64)
+    y_pred_log = np.asarray(y_pred_log, dtype=np.float64)
+    country_series = country_series if isinstance(country_series, pd.Series) else pd.Series(country_series)
+    countries = country_series.to_numpy()
+    country_codes, country_labels = _factorized(country_series)
+    avg_salary = country_avg_salary.reindex(country_labels).to_numpy(dtype=np.float64)[country_codes]
+    errors, values = _error_matrix(y_true_log, y_pred_log, avg_salary)
+    n = len(errors)
+
+    point = errors.mean(axis=0)
+    residual = y_true_log - y_pred_log
+    metrics = pd.DataFrame({"value": np.r_[
+        point,
+        np.mean(values["pred_salary_usd"] - values["true_salary_usd"]),
+        1.0 - residual @ residual / np.sum((y_true_log - y_true_log.mean()) ** 2),
+    ]}, index=list(ERROR_METRICS) + ["bias_usd", "r2_log"])
+
+    # Segment codes, offset into one shared code space so each metric's segment sums fill one array.
+    segments = segments if segments is not None else pd.DataFrame(index=range(n))
+    seg_codes, seg_labels, offset = [], [], 0
+    for col in segments.columns:
+        column = segments[col]
+        if col == country_series.name and column.dtype == object and np.array_equal(column.to_numpy(), countries):
+            codes, labels = country_codes, country_labels
+        else:
+            codes, labels = _factorized(column)
+        seg_codes.append((codes + offset).astype(np.int32))
+        seg_labels.append((col, labels, offset))
+        offset += len(labels)
+    n_codes = offset
+    n_metrics = errors.shape[1]
+    errors_by_metric = np.ascontiguousarray(errors.T)
+
+    # Rows with the same label in every segment column form one cell. Sums are accumulated per cell
+    # (one bincount per statistic, however many segment columns there are) and then added up per
+    # segment label through a sparse cell → label incidence matrix.
+    cells, n_cells, cell_first = _joint_cells([codes - start for codes, (_, _, start) in zip(seg_codes, seg_labels)], n)
+    incidence = csr_matrix(
+        (np.ones(len(seg_codes) * n_cells),
+         (np.tile(np.arange(n_cells), len(seg_codes)), np.concatenate([codes[cell_first] for codes in seg_codes]))),
+        shape=(n_cells, n_codes)
+    ) if n_codes else None
+
+    def per_segment(cell_stats: np.ndarray) -> np.ndarray:
+        # (..., n_cells) sums → (..., n_codes) sums
+        return (incidence.T @ cell_stats.reshape(-1, n_cells).T).T.reshape(*cell_stats.shape[:-1], n_codes)
+
+    cell_counts = np.bincount(cells, minlength=n_cells)
+    cell_sums = np.stack([np.bincount(cells, weights=errors_by_metric[j], minlength=n_cells) for j in range(n_metrics)])
+    counts = per_segment(cell_counts[None])[0] if n_codes else np.zeros(0)
+    sums = per_segment(cell_sums).T if n_codes else np.zeros((0, n_metrics))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        seg_means = sums / counts[:, None]
+
+    # Batched bootstrap: one batch of b replicates of m rows per step feeds the global and every segment's means.
+    alpha = (1.0 - ci) / 2
+    m = min(n, max_boot_rows)
+    rng = np.random.default_rng(random_state)
+    boot_global, boot_segments = [], []
+    replicate = None
+    # A batch holds b * m sampled rows and b * n_cells sums; both stay within batch_elements.
+    for b in _boot_batches(n_boot, max(m, n_cells), batch_elements):
+        idx = rng.integers(0, n, size=b * m, dtype=np.int32 if n < 2 ** 31 else np.int64)
+        if replicate is None:
+            replicate = np.repeat(np.arange(b, dtype=np.int64) * n_cells, m)
+        keys = cells.take(idx) + replicate[:b * m]
+        # One take gathers every metric of the sampled rows.
+        sampled = errors_by_metric.take(idx, axis=1)
+        boot_n = np.bincount(keys, minlength=b * n_cells).reshape(b, n_cells)
+        boot_sums = np.stack([
+            np.bincount(keys, weights=sampled[j], minlength=b * n_cells).reshape(b, n_cells) for j in range(n_metrics)
+        ])
+        boot_global.append(boot_sums.sum(axis=2).T / m)
+        if not n_codes:
+            continue
+        with np.errstate(invalid="ignore", divide="ignore"):
+            boot_segments.append((per_segment(boot_sums) / per_segment(boot_n)[None]).transpose(1, 2, 0))
+
+    scale = np.sqrt(m / n) if n else 1.0
+    if n_boot and n:
+        boot_global = np.concatenate(boot_global)
+        lo, hi = np.quantile(boot_global, [alpha, 1 - alpha], axis=0)
+        metrics.loc[list(ERROR_METRICS), "ci_low"] = point + (lo - point) * scale
+        metrics.loc[list(ERROR_METRICS), "ci_high"] = point + (hi - point) * scale
+
+    seg_lo = seg_hi = None
+    if n_boot and n_codes:
+        boot_segments = np.concatenate(boot_segments)
+        seg_scale = np.full((n_codes, 1), scale)
+        if m < n:
+            # Sparse segments: redo their replicates exactly, without the m-out-of-n rescale.
+            sparse = (counts > 0) & (counts * m / n < min_segment_boot_rows)
+            for codes in seg_codes:
+                rows = np.flatnonzero(sparse[codes])
+                rows = rows[np.argsort(codes[rows], kind="stable")]
+                for group in np.split(rows, np.flatnonzero(np.diff(codes[rows])) + 1):
+                    if len(group):
+                        boot_segments[:, codes[group[0]]] = _exact_segment_boot(errors[group], n, n_boot, rng)
+            seg_scale[sparse] = 1.0
+        unsampled = np.isnan(boot_segments[:, :, 0]).mean(axis=0) > 0.5
+        boot_segments[:, unsampled] = 0.0
+        seg_lo, seg_hi = np.nanquantile(boot_segments, [alpha, 1 - alpha], axis=0)
+        seg_lo = seg_means + (seg_lo - seg_means) * seg_scale
+        seg_hi = seg_means + (seg_hi - seg_means) * seg_scale
+        seg_lo[unsampled] = seg_hi[unsampled] = np.nan
+
+    segment_tables = {}
+    for col, labels, start in seg_labels:
+        rows = slice(start, start + len(labels))
+        table = pd.DataFrame(seg_means[rows], index=pd.Index(labels, name=col), columns=list(ERROR_METRICS))
+        table.insert(0, "n", counts[rows].astype(np.int64))
+        if seg_lo is not None:
+            for j, metric in enumerate(ERROR_METRICS):
+                table[f"{metric}_ci_low"] = seg_lo[rows, j]
+                table[f"{metric}_ci_high"] = seg_hi[rows, j]
+        # Categorical segment columns may list labels no test row has.
+        # Ties in n keep label order, whichever order the labels came in.
+        table = table[table["n"] > 0].sort_index()
+        segment_tables[col] = table.sort_values("n", ascending=False, kind="stable")
+
+    predictions = pd.DataFrame({
+        "country": countries,
+        "pred_salary_norm": values["pred_salary_norm"],
+        "true_salary_norm": values["true_salary_norm"],
+        "avg_country_salary": avg_salary,
+        "pred_salary_usd": values["pred_salary_usd"],
+        "true_salary_usd": values["true_salary_usd"],
+    }, index=index if index is not None else getattr(country_series, "index", None))
+
+    return {"metrics": metrics, "segments": segment_tables, "predictions": predictions}
+
+
+def format_metrics(metrics: pd.DataFrame, prefix: str = "") -> str:
+    """
+    Formats the global metrics as the familiar "Test MAE ..." lines, with CIs where computed.
+    """
+    def ci(metric: str, fmt: str) -> str:
+        if "ci_low" not in metrics.columns:
+            return ""
+        return f" ({fmt.format(metrics.at[metric, 'ci_low'])} – {fmt.format(metrics.at[metric, 'ci_high'])})"
+
+    return "\n".join([
+        f"{prefix}Test MAE (log-normalized): {metrics.at['mae_log', 'value']:.3f}{ci('mae_log', '{:.3f}')}",
+        f"{prefix}Test MAE (normalized scale): {metrics.at['mae_norm', 'value']:.3f}{ci('mae_norm', '{:.3f}')}",
+        f"{prefix}Test MAE (USD): ${metrics.at['mae_usd', 'value']:,.0f}{ci('mae_usd', '${:,.0f}')}",
+    ])
+
+
+def format_segments(segments: dict, top: int = 10) -> str:
+    """
+    Formats the largest segments of every breakdown (n, MAE in USD and its CI).
+    """
+    blocks = []
+    for col, table in segments.items():
+        cols = ["n", "mae_log", "mae_usd"] + [c for c in ("mae_usd_ci_low", "mae_usd_ci_high") if c in table]
+        blocks.append(f"MAE by {col} (largest {min(top, len(table))} of {len(table)}):\n"
+                      + table[cols].head(top).to_string(float_format="%.3f"))
+    return "\n\n".join(blocks)
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+from typing import Union
+
+
+class FlatForest:
+    """
+    A fitted tree ensemble regressor flattened into contiguous node arrays shared by all trees.
+
+    Node i of tree t lives at offsets[t] + i; children are stored as global node indices and leaves
+    point to themselves, so a batch is traversed by advancing (row, tree) pairs one level per step.
+    Predictions are bit-identical to RandomForestRegressor.predict: rows are cast to float32 as sklearn
+    does, compared against the float64 thresholds, and per-tree leaf values are summed in estimator order
+    before dividing by the number of trees.
+    """
+
+    def __init__(
+            self,
+            feature: np.ndarray,
+            threshold: np.ndarray,
+            left: np.ndarray,
+            right: np.ndarray,
+            missing_left: np.ndarray,
+            value: np.ndarray,
+            offsets: np.ndarray,
+            n_features: int
+    ):
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.right = np.ascontiguousarray(right, dtype=np.intp)
+        self.missing_left = np.ascontiguousarray(missing_left, dtype=bool)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.offsets = np.ascontiguousarray(offsets, dtype=np.intp)
+        self.n_features = n_features
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.offsets)
+
+    @classmethod
+    def from_sklearn(cls, forest) -> "FlatForest":
+        """
+        Exports a fitted single-output sklearn forest regressor (e.g. RandomForestRegressor).
+        """
+        if forest.n_outputs_ != 1:
+            raise ValueError("FlatForest supports single-output regressors only")
+        trees = [est.tree_ for est in forest.estimators_]
+        sizes = np.array([t.node_count for t in trees], dtype=np.intp)
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+
+        features, thresholds, lefts, rights, missing, values = [], [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            nodes = np.arange(tree.node_count, dtype=np.intp) + offset
+            is_leaf = tree.children_left < 0
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, nodes, tree.children_left + offset))
+            rights.append(np.where(is_leaf, nodes, tree.children_right + offset))
+            mgl = getattr(tree, "missing_go_to_left", None)
+            missing.append(np.zeros(tree.node_count, dtype=bool) if mgl is None else mgl.astype(bool))
+            values.append(tree.value[:, 0, 0])
+
+        return cls(
+            np.concatenate(features),
+            np.concatenate(thresholds),
+            np.concatenate(lefts),
+            np.concatenate(rights),
+            np.concatenate(missing),
+            np.concatenate(values),
+            offsets,
+            forest.n_features_in_,
+        )
+
+    def _prepare(self) -> None:
+        if hasattr(self, "_children"):
+            return
+        # Interleaved [right, left] so the comparison result indexes the next node directly.
+        self._children = np.empty(2 * len(self.left), dtype=np.intp)
+        self._children[0::2] = self.right
+        self._children[1::2] = self.left
+        # For float32 x, x <= t holds exactly when x <= the largest float32 not above t, so the float64
+        # thresholds can be rounded down once and compared in float32 without changing any split.
+        thr32 = self.threshold.astype(np.float32)
+        over = thr32.astype(np.float64) > self.threshold
+        thr32[over] = np.nextafter(thr32[over], np.float32(-np.inf))
+        self._threshold32 = thr32
+
+    def _as_matrix(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        X = X.to_numpy(dtype=np.float32) if isinstance(X, pd.DataFrame) else np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, but the forest expects {self.n_features}")
+        return X
+
+    def apply(self, X: Union[pd.DataFrame, np.ndarray], chunk_pairs: int = 1 << 16) -> np.ndarray:
+        """
+        Returns the global leaf index reached in every tree, shape (n_samples, n_trees).
+
+        Trees are traversed in groups of about chunk_pairs (row, tree) pairs: small batches walk all trees
+        in one pass, large batches one tree at a time so the node arrays being gathered from stay in cache.
+        Pairs that reach a leaf are written out and dropped from the active set after every level.
+        """
+        self._prepare()
+        X = self._as_matrix(X)
+        n_samples = X.shape[0]
+        # Feature-major layout: at each node, the rows still in flight read from the same column.
+        flat_X = np.asfortranarray(X).ravel(order="F")
+        has_nan = bool(np.isnan(flat_X).any())
+
+        leaves = np.empty(n_samples * self.n_trees, dtype=np.intp)
+        trees_per_chunk = max(1, min(self.n_trees, chunk_pairs // max(n_samples, 1)))
+        for t0 in range(0, self.n_trees, trees_per_chunk):
+            roots = self.offsets[t0:t0 + trees_per_chunk]
+            k = len(roots)
+            node = np.tile(roots, n_samples)
+            row = np.repeat(np.arange(n_samples, dtype=np.intp), k)
+            slot = row * self.n_trees + np.tile(np.arange(t0, t0 + k, dtype=np.intp), n_samples)
+            while len(node):
+                x = flat_X[row + self.feature[node] * n_samples]
+                go_left = x <= self._threshold32[node]
+                if has_nan:
+                    go_left |= np.isnan(x) & self.missing_left[node]
+                nxt = self._children[2 * node + go_left]
+                # Leaves point to themselves, so pairs that did not move have finished.
+                done = nxt == node
+                if done.any():
+                    leaves[slot[done]] = nxt[done]
+                    keep = ~done
+                    node, row, slot = nxt[keep], row[keep], slot[keep]
+                else:
+                    node = nxt
+        return leaves.reshape(n_samples, self.n_trees)
+
+    def predict_per_tree(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """
+        Returns every tree's prediction, shape (n_samples, n_trees), columns in estimator order.
+        """
+        return self.value[self.apply(X)]
+
+    def predict(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        per_tree = self.predict_per_tree(X)
+        # Sequential accumulation in estimator order, as sklearn does, rather than pairwise np.sum.
+        out = np.zeros(per_tree.shape[0], dtype=np.float64)
+        for t in range(self.n_trees):
+            out += per_tree[:, t]
+        out /= self.n_trees
+        return out
+
+    def to_arrays(self) -> dict:
+        return {
+            "feature": self.feature, "threshold": self.threshold, "left": self.left,
+            "right": self.right, "missing_left": self.missing_left, "value": self.value,
+            "offsets": self.offsets, "n_features": np.array(self.n_features),
+        }
+
+    def save(self, path: str) -> None:
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path: str) -> "FlatForest":
+        with np.load(path) as data:
+            arrays = {k: data[k] for k in data.files}
+        arrays["n_features"] = int(arrays["n_features"])
+        return cls(**arrays)
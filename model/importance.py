@@ -0,0 +1,156 @@
+import sys
+import time
+import threading
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+from typing import Optional, Sequence
+from joblib import Parallel, delayed, effective_n_jobs, hash as joblib_hash
+from threadpoolctl import threadpool_limits
+
+from instrumentation import instrument
+from stage_cache import StageCache, code_version
+
+
+@contextmanager
+def _single_threaded_predict(model):
+    """
+    Makes every predict call single-threaded while the permutation workers run, so the workers
+    are the only level of parallelism (a forest would otherwise start n_jobs threads per call).
+    """
+    n_jobs = getattr(model, "n_jobs", None)
+    if n_jobs is not None:
+        model.n_jobs = 1
+    try:
+        with threadpool_limits(limits=1):
+            yield
+    finally:
+        if n_jobs is not None:
+            model.n_jobs = n_jobs
+
+
+def _column_groups(
+        feature_names: Sequence[str],
+        groups: Optional[dict[str, Sequence[str]]]
+) -> dict[str, np.ndarray]:
+    position = {name: i for i, name in enumerate(feature_names)}
+    if groups is None:
+        return {name: np.array([i]) for name, i in position.items()}
+    out = {field: np.array([position[c] for c in cols if c in position]) for field, cols in groups.items()}
+    grouped = set(i for cols in out.values() for i in cols)
+    out.update({name: np.array([i]) for name, i in position.items() if i not in grouped})
+    return {field: cols for field, cols in out.items() if len(cols)}
+
+
+def _mae(model, X: np.ndarray, y: np.ndarray) -> float:
+    return float(np.mean(np.abs(y - model.predict(X))))
+
+
+def _permuted_scores(model, X: np.ndarray, y: np.ndarray, tasks, scratch: threading.local) -> list:
+    # Each worker thread permutes columns of its own copy of the shared matrix and restores them afterwards.
+    if getattr(scratch, "X", None) is None:
+        scratch.X = X.copy()
+    buf = scratch.X
+    out = []
+    for field, cols, perm in tasks:
+        buf[:, cols] = X[perm[:, None], cols]
+        out.append((field, _mae(model, buf, y)))
+        buf[:, cols] = X[:, cols]
+    return out
+
+
+@instrument
+def permutation_importance(
+        model,
+        X: np.ndarray,
+        y,
+        feature_names: Sequence[str],
+        groups: Optional[dict[str, Sequence[str]]] = None,
+        n_repeats: int = 5,
+        max_rows: Optional[int] = 10_000,
+        n_jobs: int = -1,
+        random_state: int = 0
+) -> pd.DataFrame:
+    """
+    Permutation importance of feature groups: the increase in log-scale test MAE when a group's columns
+    are shuffled together (rows permuted jointly, so dummies of one field stay consistent).
+
+    - `groups` maps a source field to its columns (FeaturePipeline.feature_groups groups e.g. all
+      langs_worked_* dummies); ungrouped features count as their own group.
+    - At most `max_rows` test rows are scored, sampled without replacement.
+    - (group, repeat) tasks are split over worker threads that read the one shared matrix; each thread
+      permutes a private scratch copy in place. Prediction is held to one thread per worker.
+    - The impurity importances of the group's columns are summed alongside, where the model has them.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float64)
+    rng = np.random.default_rng(random_state)
+    if max_rows is not None and len(X) > max_rows:
+        rows = np.sort(rng.choice(len(X), size=max_rows, replace=False))
+        X, y = X[rows], y[rows]
+    X = np.ascontiguousarray(X)
+
+    column_groups = _column_groups(feature_names, groups)
+    tasks = [
+        (field, cols, rng.permutation(len(X)))
+        for field, cols in column_groups.items()
+        for _ in range(n_repeats)
+    ]
+    n_workers = max(1, min(effective_n_jobs(n_jobs), len(tasks)))
+    batches = [tasks[i::n_workers] for i in range(n_workers)]
+    scratch = threading.local()
+
+    start = time.perf_counter()
+    with _single_threaded_predict(model):
+        baseline = _mae(model, X, y)
+        results = Parallel(n_jobs=n_workers, prefer="threads")(
+            delayed(_permuted_scores)(model, X, y, batch, scratch) for batch in batches
+        )
+    seconds = time.perf_counter() - start
+
+    scores = pd.DataFrame([row for batch in results for row in batch], columns=["group", "mae_log"])
+    increase = (scores["mae_log"] - baseline).groupby(scores["group"])
+    table = pd.DataFrame({
+        "n_columns": pd.Series({field: len(cols) for field, cols in column_groups.items()}),
+        "importance": increase.mean(),
+        "importance_std": increase.std(ddof=0),
+    })
+    if hasattr(model, "feature_importances_"):
+        impurity = np.asarray(model.feature_importances_)
+        table["impurity"] = pd.Series({field: impurity[cols].sum() for field, cols in column_groups.items()})
+    table.index.name = "group"
+    table.attrs.update({"baseline_mae_log": baseline, "rows": len(X), "seconds": seconds})
+    return table.sort_values("importance", ascending=False)
+
+
+@instrument
+def cached_permutation_importance(
+        model,
+        X: np.ndarray,
+        y,
+        feature_names: Sequence[str],
+        stage_cache: StageCache,
+        groups: Optional[dict[str, Sequence[str]]] = None,
+        n_repeats: int = 5,
+        max_rows: Optional[int] = 10_000,
+        n_jobs: int = -1,
+        random_state: int = 0
+) -> pd.DataFrame:
+    """
+    permutation_importance() through the stage cache, keyed by a hash of the fitted model, the scored
+    data and the parameters, so re-running the report for an unchanged model is a cache hit.
+    """
+    params = {
+        "feature_names": list(feature_names), "groups": groups, "n_repeats": n_repeats,
+        "max_rows": max_rows, "random_state": random_state,
+    }
+    inputs_key = joblib_hash((model, np.asarray(X, dtype=np.float32), np.asarray(y, dtype=np.float64)))
+    # The whole module: the scoring helpers (_permuted_scores, _mae, _column_groups) change results too.
+    key = stage_cache.key("permutation_importance", inputs_key, params, code=code_version(sys.modules[__name__]))
+    return stage_cache.run(
+        "permutation_importance", key,
+        lambda: permutation_importance(
+            model, X, y, feature_names, groups=groups, n_repeats=n_repeats,
+            max_rows=max_rows, n_jobs=n_jobs, random_state=random_state
+        )
+    )
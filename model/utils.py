@@ -1,55 +1,131 @@
 import pandas as pd
 import numpy as np
-from typing import Tuple
+from typing import Optional, Sequence, Tuple
 from sklearn.model_selection import train_test_split
 
+from instrumentation import instrument
 
-def prepare_train_test(
+
+NON_FEATURE_COLS = ["salary_normalized", "country", "compensation_total", "year"]
+
+
+def fit_salary_stats(
         df: pd.DataFrame,
-        test_year: int = 2024
-) -> Tuple[
-    pd.DataFrame, np.ndarray,
-    pd.DataFrame, np.ndarray,
-    pd.Series, pd.Series
-]:
-    country_avg_salary = df.groupby("country")["compensation_total"].mean()
+        by: Sequence[str] = ("country",)
+) -> pd.DataFrame:
+    """
+    Computes compensation statistics (mean, median, std, count) per group, e.g. per country or per
+    country × year, in a single grouped pass. The 'mean' column is the normalization scale.
+    """
+    return df.groupby(list(by))["compensation_total"].agg(["mean", "median", "std", "count"])
 
-    train_df = df[df["year"] < test_year].copy()
-    test_df  = df[df["year"] == test_year].copy()
 
-    drop_cols = ["salary_normalized", "country", "compensation_total", "year"]
+def salary_scale(
+        df: pd.DataFrame,
+        stats: pd.DataFrame,
+        by: Sequence[str] = ("country",)
+) -> pd.Series:
+    """
+    Looks up each row's group mean in a fitted stats table (NaN for unseen groups).
+    """
+    keys = list(by)
+    if len(keys) == 1:
+        return df[keys[0]].map(stats["mean"])
+    index = pd.MultiIndex.from_frame(df[keys])
+    return pd.Series(stats["mean"].reindex(index).to_numpy(), index=df.index)
 
-    X_train     = train_df.drop(columns=drop_cols)
-    y_train_log = np.log1p(train_df["salary_normalized"])
 
-    X_test      = test_df.drop(columns=drop_cols)
-    y_test_log  = np.log1p(test_df["salary_normalized"])
+@instrument
+def add_salary_normalized(
+        df: pd.DataFrame,
+        stats: Optional[pd.DataFrame] = None,
+        by: Sequence[str] = ("country",)
+) -> pd.DataFrame:
+    """
+    Attaches 'salary_normalized' (compensation divided by its group mean) and returns the stats table used.
+    """
+    if stats is None:
+        stats = fit_salary_stats(df, by)
+    df["salary_normalized"] = df["compensation_total"] / salary_scale(df, stats, by)
+    return stats
 
-    test_countries = test_df.loc[X_test.index, "country"]
 
-    return X_train, y_train_log, X_test, y_test_log, test_countries, country_avg_salary
+@instrument
+def feature_matrix(df: pd.DataFrame, feature_names: Optional[Sequence[str]] = None) -> np.ndarray:
+    """
+    Builds the model input once as a C-contiguous float32 array (the dtype the tree learners use
+    internally), so fits and predictions on it share the same memory instead of each converting the
+    bool/int/categorical DataFrame again.
+    """
+    if feature_names is None:
+        feature_names = [c for c in df.columns if c not in NON_FEATURE_COLS]
+    return np.ascontiguousarray(df[list(feature_names)].to_numpy(dtype=np.float32))
 
 
-def prepare_train_test_interpolation(
+@instrument
+def take_rows(X_all: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """
+    Selects the rows of a feature_matrix(df) at the given positions (e.g. one split's rows from prepare_train_test).
+    """
+    return X_all[rows]
+
+
+@instrument
+def prepare_train_test(
         df: pd.DataFrame,
-        test_size: float = 0.2,
-        random_state: int = 0
+        test_year: int = 2024,
+        country_avg_salary: Optional[pd.Series] = None
 ) -> Tuple[
-    pd.DataFrame, np.ndarray,
-    pd.DataFrame, np.ndarray,
+    np.ndarray, pd.Series,
+    np.ndarray, pd.Series,
     pd.Series, pd.Series
 ]:
-    country_avg_salary = df.groupby("country")["compensation_total"].mean()
+    """
+    Splits by survey year: train on the years before test_year, test on test_year.
+    Returns row positions into df (select features with take_rows on the shared feature matrix), the log
+    targets indexed like df, the test rows' countries and the country averages.
+    """
+    if country_avg_salary is None:
+        country_avg_salary = fit_salary_stats(df)["mean"]
 
-    drop_cols = ["salary_normalized", "country", "compensation_total", "year"]
-    X = df.drop(columns=drop_cols)
+    years = df["year"].to_numpy()
+    train_rows = np.flatnonzero(years < test_year)
+    test_rows = np.flatnonzero(years == test_year)
     y_log = np.log1p(df["salary_normalized"])
-    countries = df["country"]
 
-    X_train, X_test, y_train_log, y_test_log, _, test_countries = train_test_split(
-        X, y_log, countries,
+    return (
+        train_rows, y_log.iloc[train_rows],
+        test_rows, y_log.iloc[test_rows],
+        df["country"].iloc[test_rows], country_avg_salary
+    )
+
+
+@instrument
+def prepare_train_test_interpolation(
+        df: pd.DataFrame,
+        test_size: float = 0.2,
+        random_state: int = 0,
+        country_avg_salary: Optional[pd.Series] = None
+) -> Tuple[
+    np.ndarray, pd.Series,
+    np.ndarray, pd.Series,
+    pd.Series, pd.Series
+]:
+    """
+    Random train/test split over all years, returned like prepare_train_test (row positions, not feature copies).
+    """
+    if country_avg_salary is None:
+        country_avg_salary = fit_salary_stats(df)["mean"]
+
+    train_rows, test_rows = train_test_split(
+        np.arange(len(df)),
         test_size=test_size,
         random_state=random_state
     )
+    y_log = np.log1p(df["salary_normalized"])
 
-    return X_train, y_train_log, X_test, y_test_log, test_countries, country_avg_salary
\ No newline at end of file
+    return (
+        train_rows, y_log.iloc[train_rows],
+        test_rows, y_log.iloc[test_rows],
+        df["country"].iloc[test_rows], country_avg_salary
+    )
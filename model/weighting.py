@@ -0,0 +1,207 @@
+import math
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Sequence
+from sklearn.metrics import mean_absolute_error
+
+from instrumentation import instrument
+from model.engines import make_regressor, fit_regressor
+from model.scheduler import available_cores, split_cores
+
+# A weighting schedule is (kind, params), e.g. ("half_life", {"half_life": 2.0}).
+Schedule = tuple[str, dict]
+
+LINEAR = ("linear", {})
+
+
+def linear_weights(years, start: float = 0.2, end: float = 1.0) -> dict:
+    """
+    Linear recency weights from `start` for the oldest year to `end` for the newest, over the given years.
+    """
+    years = sorted(set(int(yr) for yr in years))
+    first, last = years[0], years[-1]
+    span = max(last - first, 1)
+    return {yr: start + (end - start) * (yr - first) / span for yr in years}
+
+
+def half_life_weights(years, half_life: float = 2.0) -> dict:
+    """
+    Exponential recency weights: the newest year weighs 1.0 and the weight halves every `half_life` years back.
+    """
+    years = sorted(set(int(yr) for yr in years))
+    last = years[-1]
+    return {yr: 0.5 ** ((last - yr) / half_life) for yr in years}
+
+
+def custom_weights(years, weights: dict, default: Optional[float] = None) -> dict:
+    """
+    Explicit per-year weights. Years missing from `weights` get `default`, or raise if no default is given.
+    """
+    weights = {int(yr): float(w) for yr, w in weights.items()}
+    out = {}
+    for yr in sorted(set(int(yr) for yr in years)):
+        if yr not in weights and default is None:
+            raise ValueError(f"No weight for survey year {yr} in custom schedule")
+        out[yr] = weights.get(yr, default)
+    return out
+
+
+SCHEDULES = {
+    "linear": linear_weights,
+    "half_life": half_life_weights,
+    "custom": custom_weights,
+}
+
+
+def schedule_weights(years, schedule: Schedule = LINEAR) -> dict:
+    """
+    Returns {year: weight} for the given years under a (kind, params) schedule.
+    """
+    kind, params = schedule
+    if kind not in SCHEDULES:
+        raise ValueError(f"Unknown weighting schedule {kind!r}; expected one of {sorted(SCHEDULES)}")
+    return SCHEDULES[kind](years, **params)
+
+
+def schedule_name(schedule: Schedule) -> str:
+    kind, params = schedule
+    args = ",".join(f"{k}={v}" for k, v in params.items())
+    return f"{kind}({args})"
+
+
+def sample_weights(years, schedule: Schedule = LINEAR) -> np.ndarray:
+    """
+    Per-row weights for an array-like of survey years. Unlike a plain Series.map, a year the schedule
+    does not cover raises instead of turning into NaN.
+    """
+    years = np.asarray(years, dtype=np.int64)
+    uniques, inverse = np.unique(years, return_inverse=True)
+    weights_map = schedule_weights(uniques, schedule)
+    values = np.array([weights_map.get(int(yr), np.nan) for yr in uniques], dtype=np.float64)
+    if np.isnan(values).any() or (values < 0).any():
+        raise ValueError(f"Schedule {schedule_name(schedule)} gives no valid weight for years {uniques.tolist()}")
+    return values[inverse]
+
+
+def default_candidates() -> list[Schedule]:
+    """
+    The schedules searched by default: uniform, linear ramps and exponential half-lives.
+    """
+    return (
+        [("linear", {"start": start}) for start in (1.0, 0.5, 0.2, 0.05)]
+        + [("half_life", {"half_life": h}) for h in (0.5, 1.0, 1.5, 2.0, 3.0, 5.0)]
+    )
+
+
+@instrument
+def _fit_and_score(X_fit, y_fit, w_fit, X_hold, y_hold, n_jobs, deadline, engine, categorical_features):
+    if time.perf_counter() > deadline:
+        return None
+    start = time.perf_counter()
+    model = make_regressor(engine, n_jobs=n_jobs, categorical_features=categorical_features)
+    fit_regressor(model, X_fit, y_fit, sample_weight=w_fit, n_jobs=n_jobs)
+    mae = mean_absolute_error(y_hold, model.predict(X_hold))
+    return mae, time.perf_counter() - start
+
+
+@instrument
+def search_schedules(
+        X_train: np.ndarray,
+        y_train,
+        train_years,
+        schedules: Optional[Sequence[Schedule]] = None,
+        holdout_year: Optional[int] = None,
+        budget_s: float = 600.0,
+        eta: int = 3,
+        cores: Optional[int] = None,
+        engine: str = "forest",
+        categorical_features: Optional[np.ndarray] = None,
+        random_state: int = 0
+) -> tuple[Schedule, pd.DataFrame]:
+    """
+    Picks a weighting schedule by successive halving on a temporal holdout inside the training data.
+
+    - The last training year (or `holdout_year`) is held out; models are fit on the earlier years,
+      weighted by each schedule, and scored by log-scale MAE on the holdout.
+    - Rung r fits on a nested random subsample of eta^-(R-1-r) of the fit rows; only the best
+      1/eta of the schedules advance, so the full-size fits are spent on the few promising ones.
+    - The fits in a rung run concurrently on threads over rows of the one shared matrix, within the
+      core budget. A rung is not started if its estimated cost would overrun `budget_s`, and fits
+      not yet started when the budget runs out are skipped.
+
+    Returns the best schedule (from the highest completed rung) and a table of every fit.
+    """
+    schedules = list(schedules or default_candidates())
+    years = np.asarray(train_years, dtype=np.int64)
+    y = np.asarray(y_train, dtype=np.float64)
+    holdout_year = int(years.max()) if holdout_year is None else holdout_year
+    fit_rows = np.flatnonzero(years < holdout_year)
+    hold_rows = np.flatnonzero(years == holdout_year)
+    if len(fit_rows) == 0 or len(hold_rows) == 0:
+        raise ValueError(f"Need training years both before and at the holdout year {holdout_year}")
+
+    rng = np.random.default_rng(random_state)
+    order = rng.permutation(fit_rows)
+    X_hold, y_hold = X_train[hold_rows], y[hold_rows]
+    weights = {schedule_name(s): sample_weights(years[order], s) for s in schedules}
+
+    cores = cores or available_cores()
+    n_rungs = max(1, math.ceil(math.log(len(schedules), eta))) if len(schedules) > 1 else 1
+    start = time.perf_counter()
+    deadline = start + budget_s
+    alive = schedules
+    records = []
+    best = None
+    last_rung_seconds = None
+
+    for rung in range(n_rungs):
+        n_rows = max(len(order) // eta ** (n_rungs - 1 - rung), 1)
+        if last_rung_seconds is not None:
+            estimate = last_rung_seconds * eta * len(alive) / prev_alive
+            remaining = deadline - time.perf_counter()
+            if estimate > remaining:
+                print(f"Weighting search: stopping before rung {rung} "
+                      f"(estimated {estimate:.0f}s, {remaining:.0f}s of budget left)")
+                break
+        rows = order[:n_rows]
+        X_fit, y_fit = X_train[rows], y[rows]
+
+        slots = min(len(alive), cores)
+        shares = split_cores(slots, cores)
+        rung_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=slots) as pool:
+            futures = [
+                pool.submit(
+                    _fit_and_score, X_fit, y_fit, weights[schedule_name(s)][:n_rows], X_hold, y_hold,
+                    shares[i % slots], deadline, engine, categorical_features
+                )
+                for i, s in enumerate(alive)
+            ]
+            results = [f.result() for f in futures]
+        last_rung_seconds, prev_alive = time.perf_counter() - rung_start, len(alive)
+
+        scored = [(res[0], s) for res, s in zip(results, alive) if res is not None]
+        for res, s in zip(results, alive):
+            records.append({
+                "schedule": schedule_name(s), "rung": rung, "rows": n_rows,
+                "mae_log": res[0] if res else np.nan, "seconds": res[1] if res else np.nan,
+            })
+        if not scored:
+            break
+        scored.sort(key=lambda pair: pair[0])
+        best = scored[0][1]
+        alive = [s for _, s in scored[:max(1, math.ceil(len(scored) / eta))]]
+        if len(scored) < len(results):
+            break
+
+    table = pd.DataFrame(records)
+    print(f"\n=== Weighting search (holdout year {holdout_year}, {len(fit_rows)} fit rows, "
+          f"{time.perf_counter() - start:.1f}s of {budget_s:.0f}s budget) ===")
+    print(table.to_string(index=False, float_format="%.4f"))
+    if best is None:
+        print("Weighting search: no fit finished within the budget, keeping the linear schedule")
+        best = LINEAR
+    print(f"Best schedule: {schedule_name(best)}")
+    return best, table
@@ -1,10 +1,14 @@
 import numpy as np
 import re
 import pandas as pd
+from functools import partial
 from typing import List
-from typing import Optional, Sequence
+from typing import Callable, Optional, Sequence
 
+from instrumentation import instrument, track_memory, format_memory_report
 
+
+@instrument
 def summarize_nulls(df: pd.DataFrame) -> pd.DataFrame:
     """
     Summarizes the number of null values in the dataset before and after filtering out rows with missing compensation.
@@ -20,27 +24,29 @@ def summarize_nulls(df: pd.DataFrame) -> pd.DataFrame:
     return summary
 
 
-def preprocess_db_worked(df: pd.DataFrame) -> pd.DataFrame:
+def map_unique(
+        series: pd.Series,
+        func: Callable[[object], object],
+        dtype: Optional[pd.CategoricalDtype] = None
+) -> pd.Series:
     """
-    Standardizes and fills missing values in the 'db_worked' column, mapping common variations to unified labels.
+    Applies `func` once per distinct value of `series` (NaN included) and broadcasts the results via factorize codes.
+    With a CategoricalDtype, results are written straight into category codes (values outside the categories become NaN).
     """
-    df = df.copy()
-    total = len(df)
-
-    print("=== Pipeline: db_worked preprocessing ===")
-    print(f"Total rows: {total}")
-
-    nulls_before = df['db_worked'].isna().sum()
-    pct_before = nulls_before / total * 100
-    print(f"Nulls before fill: {nulls_before} ({pct_before:.2f}%)")
-
-    unique_before = df['db_worked'].nunique(dropna=True)
-    print(f"Unique values before fill: {unique_before}")
-    print("  Sample values:", df['db_worked'].dropna().unique()[:10].tolist())
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    results = [func(val) for val in uniques]
+    if dtype is not None:
+        category_codes = dtype.categories.get_indexer(results)
+        values = pd.Categorical.from_codes(category_codes[codes], dtype=dtype)
+    else:
+        values = np.array(results, dtype=object)[codes]
+    return pd.Series(values, index=series.index, name=series.name)
 
-    df['db_worked'] = df['db_worked'].fillna('Unknown')
 
-    db_map = {
+# Per-column token alias maps for the semicolon-separated "*_worked" answers. To normalize another
+# multi-select column (e.g. 'misc_tech_worked'), register its map here; preprocess_multi_select picks it up.
+MULTI_SELECT_ALIASES = {
+    'db_worked': {
         'Microsoft SQL Server': 'SQL Server',
         'SQL Server':            'SQL Server',
         'Dynamodb':              'DynamoDB',
@@ -52,90 +58,16 @@ def preprocess_db_worked(df: pd.DataFrame) -> pd.DataFrame:
         'Neo4j':                 'Neo4j',
         'Couch DB':              'CouchDB',
         'CouchDB':               'CouchDB',
-    }
-    df['db_worked'] = (
-        df['db_worked']
-        .str.split(';')
-        .apply(lambda items:
-               '; '.join(db_map.get(x.strip(), x.strip()) for x in items)
-               )
-    )
-
-    nulls_after = df['db_worked'].isna().sum()
-    print(f"\nNulls after fill:  {nulls_after} (should be 0)")
-
-    unique_after = df['db_worked'].nunique()
-    print(f"Unique values after fill: {unique_after}\n")
-
-    return df
-
-
-def preprocess_langs_worked(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Standardizes and fills missing values in the 'langs_worked' column, unifying variations in language names.
-    """
-    df = df.copy()
-    total = len(df)
-
-    print("=== Pipeline: langs_worked preprocessing ===")
-    print(f"Total rows: {total}")
-
-    nulls_before = df['langs_worked'].isna().sum()
-    pct_before = nulls_before / total * 100
-    print(f"Nulls before fill: {nulls_before} ({pct_before:.2f}%)")
-
-    unique_before = df['langs_worked'].nunique(dropna=True)
-    print(f"Unique values before fill: {unique_before}")
-    print("  Sample values:", df['langs_worked'].dropna().unique()[:10].tolist())
-
-    df['langs_worked'] = df['langs_worked'].fillna('Unknown')
-
-    langs_map = {
+    },
+    'langs_worked': {
         'Matlab':                  'MATLAB',
         'MATLAB':                  'MATLAB',
         'Bash/Shell (all shells)': 'Bash/Shell',
         'Bash/Shell':              'Bash/Shell',
         'LISP':                    'Lisp',
         'Lisp':                    'Lisp',
-    }
-    df['langs_worked'] = (
-        df['langs_worked']
-        .str.split(';')
-        .apply(lambda items:
-               '; '.join(langs_map.get(x.strip(), x.strip()) for x in items)
-               )
-    )
-
-    nulls_after = df['langs_worked'].isna().sum()
-    print(f"\nNulls after fill:  {nulls_after} (should be 0)")
-
-    unique_after = df['langs_worked'].nunique()
-    print(f"Unique values after fill: {unique_after}\n")
-
-    return df
-
-
-def preprocess_platform_worked(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Cleans and normalizes the 'platform_worked' column by mapping similar platform names to common labels.
-    """
-    df = df.copy()
-    total = len(df)
-
-    print("=== Pipeline: platform_worked preprocessing ===")
-    print(f"Total rows: {total}")
-
-    nulls_before = df['platform_worked'].isna().sum()
-    pct_before = nulls_before / total * 100
-    print(f"Nulls before fill: {nulls_before} ({pct_before:.2f}%)")
-
-    unique_before = df['platform_worked'].nunique(dropna=True)
-    print(f"Unique values before fill: {unique_before}")
-    print("  Sample values:", df['platform_worked'].dropna().unique()[:10].tolist())
-
-    df['platform_worked'] = df['platform_worked'].fillna('Unknown')
-
-    platform_map = {
+    },
+    'platform_worked': {
         'AWS':                          'AWS',
         'Amazon Web Services (AWS)':    'AWS',
         'Mac OS':                       'MacOS',
@@ -148,90 +80,94 @@ def preprocess_platform_worked(df: pd.DataFrame) -> pd.DataFrame:
         'Digital Ocean':                'DigitalOcean',
         'IBM Cloud or Watson':          'IBM Cloud',
         'IBM Cloud':                    'IBM Cloud',
-    }
-    df['platform_worked'] = (
-        df['platform_worked']
-        .str.split(';')
-        .apply(lambda items:
-               '; '.join(platform_map.get(x.strip(), x.strip()) for x in items)
-               )
-    )
+    },
+    'webframe_worked': {
+        'React.js':     'React',
+        'React':        'React',
+        'AngularJS':    'Angular',
+        'Angular.js':   'Angular',
+        'Angular':      'Angular',
+        'ASP.NET Core': '.NET Core',
+        '.NET Core':    '.NET Core',
+        'ASP.NET CORE': '.NET Core',
+        '.NET CORE':    '.NET Core',
+    },
+}
 
-    nulls_after = df['platform_worked'].isna().sum()
-    print(f"\nNulls after fill:  {nulls_after} (should be 0)")
 
-    unique_after = df['platform_worked'].nunique()
-    print(f"Unique values after fill: {unique_after}\n")
+def normalize_multi_select(series: pd.Series, aliases: dict[str, str]) -> pd.Series:
+    """
+    Fills nulls with 'Unknown', maps every semicolon-separated token through `aliases` and rejoins with '; '.
+    Tokens are mapped once per distinct token and rows are rebuilt once per distinct raw string.
+    """
+    codes, uniques = pd.factorize(series.fillna('Unknown'))
 
-    return df
+    parts = pd.Series(uniques, dtype=object).str.split(';')
+    owner = np.repeat(np.arange(len(uniques)), parts.str.len().to_numpy())
+    tokens = parts.explode().str.strip().to_numpy()
+
+    token_codes, token_uniques = pd.factorize(tokens)
+    mapped = np.array([aliases.get(t, t) for t in token_uniques], dtype=object)[token_codes]
+    rebuilt = pd.Series(mapped).groupby(owner, sort=True).agg('; '.join).to_numpy()
 
+    return pd.Series(rebuilt[codes], index=series.index, name=series.name)
 
-def preprocess_webframe_worked(df: pd.DataFrame) -> pd.DataFrame:
+
+@instrument
+def preprocess_multi_select(
+        df: pd.DataFrame,
+        cols: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
     """
-    Cleans and standardizes the 'webframe_worked' column by mapping related web frameworks to unified names.
+    Standardizes and fills missing values in the registered multi-select columns (see MULTI_SELECT_ALIASES),
+    unifying variations in tool, language and platform names.
     """
-    df = df.copy()
+    df = df.copy(deep=False)
     total = len(df)
+    cols = [c for c in (cols or MULTI_SELECT_ALIASES) if c in df.columns]
 
-    print("=== Pipeline: webframe_worked preprocessing ===")
-    print(f"Total rows: {total}")
+    for col in cols:
+        print(f"=== Pipeline: {col} preprocessing ===")
+        print(f"Total rows: {total}")
 
-    nulls_before = df['webframe_worked'].isna().sum()
-    pct_before = nulls_before / total * 100
-    print(f"Nulls before fill: {nulls_before} ({pct_before:.2f}%)")
+        nulls_before = df[col].isna().sum()
+        pct_before = nulls_before / total * 100
+        print(f"Nulls before fill: {nulls_before} ({pct_before:.2f}%)")
 
-    unique_before = df['webframe_worked'].nunique(dropna=True)
-    print(f"Unique values before fill: {unique_before}")
-    print("  Sample values:", df['webframe_worked'].dropna().unique()[:10].tolist())
+        unique_before = df[col].nunique(dropna=True)
+        print(f"Unique values before fill: {unique_before}")
+        print("  Sample values:", df[col].dropna().unique()[:10].tolist())
 
-    df['webframe_worked'] = df['webframe_worked'].fillna('Unknown')
+        df[col] = normalize_multi_select(df[col], MULTI_SELECT_ALIASES[col])
 
-    webframe_map = {
-        'React.js':     'React',
-        'React':        'React',
-        'AngularJS':    'Angular',
-        'Angular.js':   'Angular',
-        'Angular':      'Angular',
-        'ASP.NET Core': '.NET Core',
-        '.NET Core':    '.NET Core',
-        'ASP.NET CORE': '.NET Core',
-        '.NET CORE':    '.NET Core',
-    }
-    df['webframe_worked'] = (
-        df['webframe_worked']
-        .str.split(';')
-        .apply(lambda items:
-               '; '.join(webframe_map.get(x.strip(), x.strip()) for x in items)
-               )
-    )
-
-    nulls_after = df['webframe_worked'].isna().sum()
-    print(f"\nNulls after fill:  {nulls_after} (should be 0)")
+        nulls_after = df[col].isna().sum()
+        print(f"\nNulls after fill:  {nulls_after} (should be 0)")
 
-    unique_after = df['webframe_worked'].nunique()
-    print(f"Unique values after fill: {unique_after}\n")
+        unique_after = df[col].nunique()
+        print(f"Unique values after fill: {unique_after}\n")
 
     return df
 
 
+@instrument
 def preprocess_compensation(df: pd.DataFrame) -> pd.DataFrame:
     """
     Cleans the 'compensation_total' column by parsing strings to float, filtering unreasonable values, and converting currencies.
     """
-    df = df.copy()
-    df = df[df['compensation_total'].notnull()].copy()
-    before = len(df)
+    before = int(df['compensation_total'].notnull().sum())
 
     print("=== Pipeline: compensation_total preprocessing ===")
     print(f"1) Rows with non-null raw strings: {before}")
 
-    df['compensation_total'] = df['compensation_total'].apply(clean_compensation_string)
-    df = df[df['compensation_total'].notnull()]
-    after_parse = len(df)
+    parsed = parse_compensation(df['compensation_total'])
+    after_parse = int(parsed.notnull().sum())
     print(f"2) Rows after parsing to float:        {after_parse}  (dropped {before - after_parse})")
 
+    # The null, parse and bounds filters are applied as one row selection, so rows are copied only once.
     before_bounds = after_parse
-    df = df[(df['compensation_total'] >= 1_000) & (df['compensation_total'] <= 350_000)]
+    in_bounds = (parsed >= 1_000) & (parsed <= 350_000)
+    df = df[in_bounds].copy(deep=False)
+    df['compensation_total'] = parsed[in_bounds]
     after_bounds = len(df)
     print(f"3) Rows after [1k–350k] filter:        {after_bounds}  (dropped {before_bounds - after_bounds})")
 
@@ -246,32 +182,63 @@ def preprocess_compensation(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def preprocess_country(df: pd.DataFrame, top_n: int = 15) -> pd.DataFrame:
+COUNTRY_ALIASES = {
+    'United States of America': 'United States',
+    'United States':               'United States',
+    'United Kingdom of Great Britain and Northern Ireland': 'United Kingdom',
+    'United Kingdom':              'United Kingdom'
+}
+
+
+def normalize_country(series: pd.Series) -> pd.Series:
+    """
+    Fills missing countries with 'Other' and unifies the labels that changed between survey years.
+    """
+    return series.fillna('Other').replace(COUNTRY_ALIASES)
+
+
+def top_n_labels(counts: pd.Series, n: int) -> list:
+    """
+    Returns the labels of the n largest counts. Ties are broken by label, so the ranking does not depend
+    on the order the counts were accumulated in (whole frame vs. summed per-year counts).
+    """
+    order = np.lexsort((counts.index.astype(str), -counts.to_numpy()))
+    return counts.index[order[:n]].tolist()
+
+
+def top_countries_from_counts(counts: pd.Series, top_n: int = 15) -> list:
+    """
+    Picks the top_n countries (excluding 'Other') from country counts.
+    """
+    return top_n_labels(counts.drop('Other', errors='ignore'), top_n)
+
+
+@instrument
+def preprocess_country(
+        df: pd.DataFrame,
+        top_n: int = 15,
+        top_countries: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
     """
     Simplifies country names and groups less frequent entries into an 'Other' category.
+    Pass top_countries to reuse a grouping learned elsewhere (e.g. from per-year counts) instead of this frame.
     """
-    df = df.copy()
+    df = df.copy(deep=False)
     total_before = len(df)
 
     print("=== Pipeline: country preprocessing ===")
     print(f"Rows before any country cleanup: {total_before}")
 
-    df['country'] = df['country'].fillna('Other')
-
-    df['country'] = df['country'].replace({
-        'United States of America': 'United States',
-        'United States':               'United States',
-        'United Kingdom of Great Britain and Northern Ireland': 'United Kingdom',
-        'United Kingdom':              'United Kingdom'
-    })
+    df['country'] = normalize_country(df['country'])
 
+    counts = df['country'].value_counts()
     unique_before = df['country'].nunique()
     print(f"Unique country labels before grouping: {unique_before}")
     print("Top countries before grouping:")
-    print(df['country'].value_counts().head(top_n).to_string())
+    print(counts.head(top_n).to_string())
 
-    counts = df['country'].value_counts()
-    top_countries = counts.drop('Other', errors='ignore').nlargest(top_n).index.tolist()
+    if top_countries is None:
+        top_countries = top_countries_from_counts(counts, top_n)
 
     df['country'] = df['country'].where(df['country'].isin(top_countries), 'Other')
 
@@ -283,36 +250,76 @@ def preprocess_country(df: pd.DataFrame, top_n: int = 15) -> pd.DataFrame:
     return df
 
 
+@instrument
 def preprocess_currency(df: pd.DataFrame) -> pd.DataFrame:
     """
     Filters out rows with missing currency values.
     """
-    df = df.copy()
     total_before = len(df)
     print("\n=== Pipeline: currency preprocessing ===")
     print(f"Rows before filtering null currency: {total_before}")
-    df = df[df['currency'].notna()].copy()
+    df = df[df['currency'].notna()]
     total_after = len(df)
     print(f"Rows after  filtering null currency: {total_after}  (dropped {total_before - total_after})\n")
     return df
 
 
+@instrument
 def preprocess_fill_unknown(df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
     """
     Fills null values in specified columns with the label 'Unknown'.
     """
-    df = df.copy()
+    df = df.copy(deep=False)
     for col in cols:
         if col in df.columns:
             df[col] = df[col].fillna('Unknown')
     return df
 
 
+DEV_TYPE_MAP = {
+    'Back-end developer': 'Backend', 'Developer, back-end': 'Backend',
+    'Front-end developer': 'Frontend', 'Developer, front-end': 'Frontend',
+    'Full-stack developer': 'Fullstack', 'Developer, full-stack': 'Fullstack',
+    'Mobile developer': 'Mobile', 'Developer, mobile': 'Mobile',
+    'Data scientist': 'Data/ML', 'Machine learning specialist': 'Data/ML',
+    'Data or business analyst': 'Data/ML', 'Data engineer': 'Data/ML',
+    'Engineer, data': 'Data/ML', 'QA or test developer': 'QA/Test',
+    'Quality assurance engineer': 'QA/Test', 'Developer, QA or test': 'QA/Test',
+    'DevOps specialist': 'DevOps', 'Engineer, site reliability': 'DevOps',
+    'Embedded applications/devices developer': 'Embedded',
+    'Embedded applications or devices developer': 'Embedded',
+    'Cloud infrastructure engineer': 'Cloud/Infra',
+    'Systems administrator': 'Cloud/Infra', 'System administrator': 'Cloud/Infra',
+    'Engineering manager': 'Manager', 'Project manager': 'Manager',
+    'Product manager': 'Manager', 'Academic researcher': 'Academic',
+    'Educator': 'Academic', 'Educator or academic researcher': 'Academic',
+    'C-suite executive (CEO, CTO, etc.)': 'C-Suite',
+    'Senior executive/VP': 'C-Suite',
+    'Senior Executive (C-Suite, VP, etc.)': 'C-Suite'
+}
+
+DEV_TYPE_CATEGORIES = [
+    'Backend', 'Frontend', 'Fullstack', 'Mobile', 'Data/ML', 'QA/Test',
+    'DevOps', 'Embedded', 'Cloud/Infra', 'Manager', 'Academic', 'C-Suite',
+    'Other', 'Unknown'
+]
+
+
+def map_dev_type(raw: str) -> str:
+    """
+    Maps a raw developer type string onto one of DEV_TYPE_CATEGORIES.
+    """
+    if isinstance(raw, (set, list, tuple)):
+        raw = next(iter(raw))
+    return DEV_TYPE_MAP.get(raw, 'Other')
+
+
+@instrument
 def preprocess_dev_type(df: pd.DataFrame) -> pd.DataFrame:
     """
     Maps raw developer type strings into broader, unified developer categories.
     """
-    df = df.copy()
+    df = df.copy(deep=False)
     total = len(df)
     nulls_before = df['dev_type'].isna().sum()
     unique_before = df['dev_type'].nunique(dropna=True)
@@ -324,34 +331,8 @@ def preprocess_dev_type(df: pd.DataFrame) -> pd.DataFrame:
 
     df['dev_type'] = df['dev_type'].fillna('Unknown')
 
-    dev_type_map = {
-        'Back-end developer': 'Backend', 'Developer, back-end': 'Backend',
-        'Front-end developer': 'Frontend', 'Developer, front-end': 'Frontend',
-        'Full-stack developer': 'Fullstack', 'Developer, full-stack': 'Fullstack',
-        'Mobile developer': 'Mobile', 'Developer, mobile': 'Mobile',
-        'Data scientist': 'Data/ML', 'Machine learning specialist': 'Data/ML',
-        'Data or business analyst': 'Data/ML', 'Data engineer': 'Data/ML',
-        'Engineer, data': 'Data/ML', 'QA or test developer': 'QA/Test',
-        'Quality assurance engineer': 'QA/Test', 'Developer, QA or test': 'QA/Test',
-        'DevOps specialist': 'DevOps', 'Engineer, site reliability': 'DevOps',
-        'Embedded applications/devices developer': 'Embedded',
-        'Embedded applications or devices developer': 'Embedded',
-        'Cloud infrastructure engineer': 'Cloud/Infra',
-        'Systems administrator': 'Cloud/Infra', 'System administrator': 'Cloud/Infra',
-        'Engineering manager': 'Manager', 'Project manager': 'Manager',
-        'Product manager': 'Manager', 'Academic researcher': 'Academic',
-        'Educator': 'Academic', 'Educator or academic researcher': 'Academic',
-        'C-suite executive (CEO, CTO, etc.)': 'C-Suite',
-        'Senior executive/VP': 'C-Suite',
-        'Senior Executive (C-Suite, VP, etc.)': 'C-Suite'
-    }
-
-    def map_type(raw: str) -> str:
-        if isinstance(raw, (set, list, tuple)):
-            raw = next(iter(raw))
-        return dev_type_map.get(raw, 'Other')
-
-    df['dev_type'] = df['dev_type'].apply(map_type)
+    cat_type = pd.CategoricalDtype(categories=DEV_TYPE_CATEGORIES, ordered=False)
+    df['dev_type'] = map_unique(df['dev_type'], map_dev_type, dtype=cat_type)
 
     nulls_after = df['dev_type'].isna().sum()
     unique_after = df['dev_type'].nunique(dropna=True)
@@ -360,22 +341,40 @@ def preprocess_dev_type(df: pd.DataFrame) -> pd.DataFrame:
     print("Counts per dev_type:")
     print(df['dev_type'].value_counts().to_string(), "\n")
 
-    categories = [
-        'Backend', 'Frontend', 'Fullstack', 'Mobile', 'Data/ML', 'QA/Test',
-        'DevOps', 'Embedded', 'Cloud/Infra', 'Manager', 'Academic', 'C-Suite',
-        'Other', 'Unknown'
-    ]
-    cat_type = pd.CategoricalDtype(categories=categories, ordered=False)
-    df['dev_type'] = df['dev_type'].astype(cat_type)
-
     return df
 
 
+ORG_SIZE_CATEGORIES = [
+    'Unknown', '0-9', '10-19', '20-99',
+    '100-499', '500-999', '1000-4999',
+    '5000-9999', '10000+'
+]
+
+
+def simplify_org_size(val: str) -> str:
+    """
+    Maps a raw organization size description onto one of ORG_SIZE_CATEGORIES.
+    """
+    if not isinstance(val, str):
+        return 'Unknown'
+    v = val.strip().lower()
+    if 'fewer than 10' in v: return '0-9'
+    if '10 to 19' in v: return '10-19'
+    if '20 to 99' in v: return '20-99'
+    if '100 to 499' in v:return '100-499'
+    if '500 to 999' in v:return '500-999'
+    if '1,000 to 4,999' in v:return '1000-4999'
+    if '5,000 to 9,999' in v:return '5000-9999'
+    if '10,000 or more' in v: return '10000+'
+    return 'Unknown'
+
+
+@instrument
 def preprocess_org_size(df: pd.DataFrame) -> pd.DataFrame:
     """
     Simplifies organizational size descriptions into predefined size buckets.
     """
-    df = df.copy()
+    df = df.copy(deep=False)
     total = len(df)
     nulls_before = df['org_size'].isna().sum()
     unique_before = df['org_size'].nunique(dropna=True)
@@ -385,45 +384,23 @@ def preprocess_org_size(df: pd.DataFrame) -> pd.DataFrame:
     print(f"Nulls before mapping:          {nulls_before}")
     print(f"Unique raw values before map:  {unique_before}\n")
 
-    def simplify(val: str) -> str:
-        if not isinstance(val, str):
-            return 'Unknown'
-        v = val.strip().lower()
-        if 'fewer than 10' in v: return '0-9'
-        if '10 to 19' in v: return '10-19'
-        if '20 to 99' in v: return '20-99'
-        if '100 to 499' in v:return '100-499'
-        if '500 to 999' in v:return '500-999'
-        if '1,000 to 4,999' in v:return '1000-4999'
-        if '5,000 to 9,999' in v:return '5000-9999'
-        if '10,000 or more' in v: return '10000+'
-        return 'Unknown'
-
-    df['org_size'] = df['org_size'].apply(simplify)
-
-    df['org_size'] = df['org_size'].fillna('Unknown')
+    cat_type = pd.CategoricalDtype(categories=ORG_SIZE_CATEGORIES, ordered=True)
+    df['org_size'] = map_unique(df['org_size'], simplify_org_size, dtype=cat_type)
     nulls_after = df['org_size'].isna().sum()
 
     print(f"Nulls after mapping:           {nulls_after}")
     print("Counts per bucket:")
     print(df['org_size'].value_counts().sort_index().to_string(), "\n")
 
-    categories = [
-        'Unknown', '0-9', '10-19', '20-99',
-        '100-499', '500-999', '1000-4999',
-        '5000-9999', '10000+'
-    ]
-    cat_type = pd.CategoricalDtype(categories=categories, ordered=True)
-    df['org_size'] = df['org_size'].astype(cat_type)
-
     return df
 
 
+@instrument
 def preprocess_currency_conversion(df: pd.DataFrame) -> pd.DataFrame:
     """
     Converts compensation values to USD based on a fixed mapping of currency conversion rates.
     """
-    df = df.copy()
+    df = df.copy(deep=False)
     base_rates = {
         'PLN': 0.22, 'SEK': 0.10, 'CAD': 0.75, 'RUB': 0.013, 'MXN': 0.057,
         'AUD': 0.66, 'JPY': 0.0069, 'CNY': 0.14, 'ZAR': 0.052, 'BTC': 30000,
@@ -466,6 +443,7 @@ def preprocess_currency_conversion(df: pd.DataFrame) -> pd.DataFrame:
 def clean_compensation_string(x: str) -> float:
     """
     Parses a compensation string to a float, handling different formatting styles.
+    parse_compensation is the vectorized equivalent used by the pipeline.
     """
     if pd.isna(x):
         return np.nan
@@ -491,6 +469,90 @@ def clean_compensation_string(x: str) -> float:
         return np.nan
 
 
+@instrument
+def parse_compensation(values: pd.Series) -> pd.Series:
+    """
+    Vectorized clean_compensation_string: makes the same comma/dot decisions with NumPy string ufuncs
+    on the distinct raw values only, and skips parsing entirely when the column is already numeric.
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.astype(np.float64)
+
+    codes, uniques = pd.factorize(values)
+    s = np.strings.strip(np.asarray(uniques, dtype=object).astype(np.dtypes.StringDType()))
+
+    comma_pos = np.strings.find(s, ',')
+    dot_pos = np.strings.find(s, '.')
+    has_comma = comma_pos >= 0
+    has_dot = dot_pos >= 0
+    # With both separators, the first one is the thousands separator.
+    dot_thousands = has_comma & has_dot & (comma_pos > dot_pos)
+    # With only commas, a two-character last group is read as decimals.
+    last_group_len = np.strings.str_len(s) - np.strings.rfind(s, ',') - 1
+    comma_decimal = has_comma & ~has_dot & (last_group_len == 2)
+    drop_commas = has_comma & ~dot_thousands & ~comma_decimal
+
+    cleaned = s.copy()
+    cleaned[drop_commas] = np.strings.replace(s[drop_commas], ',', '')
+    cleaned[dot_thousands] = np.strings.replace(np.strings.replace(s[dot_thousands], '.', ''), ',', '.')
+    cleaned[comma_decimal] = np.strings.replace(s[comma_decimal], ',', '.')
+
+    # Digits with at most one dot always parse, and the string → float64 cast follows float(); anything
+    # else float() might still accept (signs, exponents, 'inf', '1_000', ...) takes the per-value path.
+    parsed = np.full(len(cleaned), np.nan)
+    plain = np.strings.isdecimal(np.strings.replace(cleaned, '.', '', 1))
+    parsed[plain] = cleaned[plain].astype(np.float64)
+    for i in np.flatnonzero(~plain):
+        try:
+            parsed[i] = float(cleaned[i])
+        except ValueError:
+            pass
+
+    result = parsed[codes] if len(parsed) else np.empty(len(codes))
+    result[codes < 0] = np.nan
+    return pd.Series(result, index=values.index, name=values.name)
+
+
+def extract_years(val: str) -> int:
+    """
+    Extracts the leading number of years from an experience answer (-1 if unknown).
+    """
+    if val == 'Unknown':
+        return -1
+    v = val.lower()
+    if 'less than' in v:
+        return 0
+    if 'more than' in v or '20 or more' in v:
+        return 20
+    m = re.match(r'(\d+)', v)
+    return int(m.group(1)) if m else -1
+
+
+def years_to_bucket(x: int) -> str:
+    """
+    Buckets a number of years into '0', '1-2', '3-5', '6-10' or '20+' ('Unknown' for -1).
+    """
+    if x == -1:
+        return 'Unknown'
+    if x == 0:
+        return '0'
+    if 1 <= x <= 2:
+        return '1-2'
+    if 3 <= x <= 5:
+        return '3-5'
+    if 6 <= x <= 10:
+        return '6-10'
+    return '20+'
+
+
+def bucket_years(val) -> str:
+    """
+    Maps a raw experience answer straight to its bucket.
+    """
+    return years_to_bucket(extract_years(str(val)))
+
+
+@instrument
 def preprocess_years_as_category(
         df: pd.DataFrame,
         col: str,
@@ -502,7 +564,7 @@ def preprocess_years_as_category(
     """
     if categories is None:
         categories = ['Unknown', '0', '1-2', '3-5', '6-10', '20+']
-    df = df.copy()
+    df = df.copy(deep=False)
     total = len(df)
     nulls_before = df[col].isna().sum()
     unique_before = df[col].nunique(dropna=True)
@@ -524,40 +586,13 @@ def preprocess_years_as_category(
     print("Top raw values after fill & unify:")
     print(df[col].value_counts().head(10).to_string(), "\n")
 
-    def extract_years(val: str) -> int:
-        if val == 'Unknown':
-            return -1
-        v = val.lower()
-        if 'less than' in v:
-            return 0
-        if 'more than' in v or '20 or more' in v:
-            return 20
-        m = re.match(r'(\d+)', v)
-        return int(m.group(1)) if m else -1
-
-    raw = df[col].astype(str).map(extract_years)
-
-    def to_bucket(x: int) -> str:
-        if x == -1:
-            return 'Unknown'
-        if x == 0:
-            return '0'
-        if 1 <= x <= 2:
-            return '1-2'
-        if 3 <= x <= 5:
-            return '3-5'
-        if 6 <= x <= 10:
-            return '6-10'
-        return '20+'
-
-    df[col] = raw.map(to_bucket)
+    cat_type = pd.CategoricalDtype(categories=categories, ordered=True)
+    df[col] = map_unique(df[col], bucket_years, dtype=cat_type)
     unique_after = df[col].nunique()
     print(f"Unique buckets after mapping: {unique_after}")
     print("Counts per bucket:")
     print(df[col].value_counts().to_string(), "\n")
 
-    cat_type = pd.CategoricalDtype(categories=categories, ordered=True)
-    df[col] = df[col].astype(cat_type)
     print(f"Final categories: {df[col].cat.categories.tolist()}\n")
 
     return df
@@ -589,11 +624,12 @@ def categorize_education(val: str) -> str:
     return 'Other'
 
 
+@instrument
 def preprocess_education_level(df: pd.DataFrame) -> pd.DataFrame:
     """
     Standardizes and simplifies the 'education_level' column into broader categories.
     """
-    df = df.copy()
+    df = df.copy(deep=False)
     total = len(df)
 
     print("=== Pipeline: education_level preprocessing ===")
@@ -611,7 +647,7 @@ def preprocess_education_level(df: pd.DataFrame) -> pd.DataFrame:
     nulls_after = df['education_level'].isna().sum()
     print(f"\nNulls after filling:  {nulls_after} (should be 0)")
 
-    df['education_level'] = df['education_level'].apply(categorize_education)
+    df['education_level'] = map_unique(df['education_level'], categorize_education)
 
     counts = df['education_level'].value_counts()
     print(f"\nCategories after mapping ({len(counts)} total):")
@@ -643,11 +679,12 @@ def simplify_employment(val: str) -> str:
     return 'Other'
 
 
+@instrument
 def preprocess_employment(df: pd.DataFrame) -> pd.DataFrame:
     """
     Cleans and simplifies the 'employment' column into general employment categories.
     """
-    df = df.copy()
+    df = df.copy(deep=False)
     total = len(df)
 
     print("=== Pipeline: employment preprocessing ===")
@@ -663,7 +700,7 @@ def preprocess_employment(df: pd.DataFrame) -> pd.DataFrame:
 
     df['employment'] = df['employment'].fillna('Unknown')
 
-    df['employment'] = df['employment'].apply(simplify_employment)
+    df['employment'] = map_unique(df['employment'], simplify_employment)
 
     nulls_after = df['employment'].isna().sum()
     print(f"\nNulls after fill & mapping: {nulls_after} (should be 0)")
@@ -676,41 +713,119 @@ def preprocess_employment(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def encode_df_top_k(
-        df: pd.DataFrame,
-        k: int = 20,
-        exclude: Optional[Sequence[str]] = None
-) -> pd.DataFrame:
+def _tokenize_uniques(series: pd.Series):
+    codes, uniques = pd.factorize(series)
+    parts = pd.Series(uniques, dtype=object).str.split(';')
+    owner = np.repeat(np.arange(len(uniques)), parts.str.len().to_numpy())
+    tokens = parts.explode().str.strip().to_numpy()
+    return codes, len(uniques), owner, tokens
+
+
+def token_counts(series: pd.Series) -> pd.Series:
     """
-    Encodes top-k most frequent categorical values (or semicolon-separated tags) into binary indicator columns.
+    Counts the items of a semicolon-separated column, ordered like value_counts over every row's tokens.
+    Only the distinct raw strings are tokenized; each is weighted by how often it occurs.
+    """
+    codes, n_uniques, owner, tokens = _tokenize_uniques(series)
+    freq = np.bincount(codes, minlength=n_uniques)
+    # Counts in first-appearance order, then sorted: the same ranking value_counts would give.
+    token_codes, token_uniques = pd.factorize(tokens)
+    counts = pd.Series(
+        np.bincount(token_codes, weights=freq[owner]).astype(np.int64),
+        index=token_uniques
+    )
+    return counts.sort_values(ascending=False)
+
+
+def multi_hot(series: pd.Series, items: Sequence[str], prefix: str) -> pd.DataFrame:
+    """
+    Encodes a semicolon-separated column into one uint8 indicator column per item in `items`.
+    Indicator rows are built for the distinct raw strings and broadcast back via factorize codes.
+    """
+    items = pd.Index(items)
+    codes, n_uniques, owner, tokens = _tokenize_uniques(series)
+
+    item_codes = items.get_indexer(tokens)
+    hit = item_codes >= 0
+    unique_indicators = np.zeros((n_uniques, len(items)), dtype=np.uint8)
+    unique_indicators[owner[hit], item_codes[hit]] = 1
+    return pd.DataFrame(
+        unique_indicators[codes],
+        index=series.index,
+        columns=[f"{prefix}_{item}" for item in items]
+    )
+
+
+def multi_hot_top_k(series: pd.Series, k: int, prefix: str) -> pd.DataFrame:
+    """
+    Encodes a semicolon-separated column into uint8 indicator columns for its k most frequent items.
     """
-    df = df.copy()
+    return multi_hot(series, top_n_labels(token_counts(series), k), prefix)
+
+
+def _columns_to_encode(df: pd.DataFrame, exclude: Optional[Sequence[str]] = None) -> List[str]:
     exclude = set(exclude or [])
     exclude.add('country')
-
-    to_encode = [
+    return [
         c for c in df.select_dtypes(include=['object','category']).columns
         if c not in exclude
     ]
 
+
+@instrument
+def top_k_counts(df: pd.DataFrame, exclude: Optional[Sequence[str]] = None) -> dict:
+    """
+    Returns {column: (kind, counts)} for every column encode_df_top_k would encode.
+
+    - kind is "multi" for semicolon-separated tags (counts per item) and "single" otherwise (counts per value).
+    - counts are value_counts-ordered, so counts from several frames can be summed and re-ranked.
+    """
+    out = {}
+    for col in _columns_to_encode(df, exclude):
+        series = df[col].fillna('Unknown').astype(str)
+        if pd.Series(series.unique()).str.contains(';', regex=False).any():
+            out[col] = ("multi", token_counts(series))
+        else:
+            out[col] = ("single", series.value_counts())
+    return out
+
+
+def top_k_vocab(counts: dict, k: int = 20) -> dict:
+    """
+    Reduces top_k_counts() output to {column: (kind, top-k items)}, the vocabulary encode_df_top_k uses.
+    """
+    return {col: (kind, top_n_labels(c, k)) for col, (kind, c) in counts.items()}
+
+
+@instrument
+def encode_df_top_k(
+        df: pd.DataFrame,
+        k: int = 20,
+        exclude: Optional[Sequence[str]] = None,
+        vocab: Optional[dict] = None
+) -> pd.DataFrame:
+    """
+    Encodes top-k most frequent categorical values (or semicolon-separated tags) into binary indicator columns.
+    Pass a vocab from top_k_vocab() to encode with vocabularies learned elsewhere instead of this frame.
+    """
+    if vocab is None:
+        vocab = top_k_vocab(top_k_counts(df, exclude), k)
+    to_encode = [c for c in vocab if c in df.columns]
+
+    encoded = []
     for col in to_encode:
+        kind, items = vocab[col]
         series = df[col].fillna('Unknown').astype(str)
-        if series.str.contains(';').any():
-            lists = series.str.split(';').apply(lambda xs: [x.strip() for x in xs])
-            all_items = [item for sub in lists for item in sub]
-            top_items = pd.Series(all_items).value_counts().nlargest(k).index
-            for item in top_items:
-                df[f"{col}_{item}"] = lists.apply(lambda xs: int(item in xs))
+        if kind == "multi":
+            encoded.append(multi_hot(series, items, prefix=col))
         else:
-            top_vals = series.value_counts().nlargest(k).index
-            reduced = series.where(series.isin(top_vals), other='Other')
-            dummies = pd.get_dummies(reduced, prefix=col)
-            df = pd.concat([df, dummies], axis=1)
+            reduced = series.where(series.isin(items), other='Other')
+            encoded.append(pd.get_dummies(reduced, prefix=col))
 
-    df = df.drop(columns=to_encode)
-    return df
+    return pd.concat([df.drop(columns=to_encode)] + encoded, axis=1)
 
 
+@instrument
 def drop_unused_dummies(df: pd.DataFrame) -> pd.DataFrame:
     """
     Removes dummy columns that represent 'Other' or 'Unknown' values to reduce dimensionality.
@@ -720,29 +835,93 @@ def drop_unused_dummies(df: pd.DataFrame) -> pd.DataFrame:
     return df.drop(columns=to_drop, errors='ignore')
 
 
-def simplify_and_encode(df: pd.DataFrame) -> pd.DataFrame:
+ROW_STAGES = [
+    ("currency", preprocess_currency),
+    ("compensation", preprocess_compensation),
+    ("years_code_total", partial(preprocess_years_as_category, col='years_code_total')),
+    ("years_code_pro", partial(preprocess_years_as_category, col='years_code_pro')),
+    ("org_size", preprocess_org_size),
+    ("dev_type", preprocess_dev_type),
+    ("multi_select", preprocess_multi_select),
+    ("education_level", preprocess_education_level),
+    ("employment", preprocess_employment),
+]
+TOP_COUNTRIES = 30
+TOP_K = 15
+TOP_K_EXCLUDE = ['compensation_total', 'year']
+# Single-choice categoricals a model engine with native categorical support can consume as codes.
+NATIVE_CATEGORICAL_COLS = ['org_size', 'dev_type']
+
+
+@instrument
+def encode_native_categoricals(df: pd.DataFrame, cols: Sequence[str]) -> pd.DataFrame:
     """
-    Applies a full preprocessing pipeline, including cleaning, normalization, and top-k encoding of selected fields.
+    Replaces categorical columns by their category codes as float32 (NaN for missing), instead of one-hot
+    columns, for estimators that split on categories natively.
     """
-    df = preprocess_currency(df)
-    df = preprocess_compensation(df)
-    df = preprocess_country(df, top_n=30)
-    df = preprocess_years_as_category(df, 'years_code_total')
-    df = preprocess_years_as_category(df, 'years_code_pro')
-    df = preprocess_org_size(df)
-    df = preprocess_dev_type(df)
-    df = preprocess_db_worked(df)
-    df = preprocess_education_level(df)
-    df = preprocess_webframe_worked(df)
-    df = preprocess_platform_worked(df)
-    df = preprocess_langs_worked(df)
-    df = preprocess_employment(df)
-    print("*****************************************************")
-    encoded_df = encode_df_top_k(
-        df,
-        k=15,
-        exclude=['compensation_total', 'year']
-    )
-    print("Before dropping unused dummies:", encoded_df.shape)
+    df = df.copy(deep=False)
+    for col in cols:
+        codes = df[col].cat.codes.to_numpy()
+        df[col] = np.where(codes < 0, np.nan, codes).astype(np.float32)
+    return df
+
+
+def _run_stages(df: pd.DataFrame, stages: list, memory_report: list) -> pd.DataFrame:
+    with pd.option_context("mode.copy_on_write", True):
+        for name, stage in stages:
+            with track_memory(name, memory_report):
+                df = stage(df)
+    return df
+
+
+@instrument
+def simplify_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Applies the row-wise preprocessing stages, whose output for a row does not depend on any other row.
+    Country grouping and top-k encoding are left out, so survey years can be processed independently.
+    """
+    memory_report = []
+    df = _run_stages(df, ROW_STAGES, memory_report)
+    print("\n=== Memory by stage ===")
+    print(format_memory_report(memory_report), "\n")
+    return df
 
-    return encoded_df
+
+@instrument
+def simplify_and_encode(
+        df: pd.DataFrame,
+        top_countries: Optional[Sequence[str]] = None,
+        vocab: Optional[dict] = None,
+        rows_simplified: bool = False,
+        native_categoricals: Sequence[str] = (),
+        memory_report: Optional[list] = None
+) -> pd.DataFrame:
+    """
+    Applies a full preprocessing pipeline, including cleaning, normalization, and top-k encoding of selected fields.
+
+    - Runs under pandas copy-on-write: stages start from shallow copies and only replace the columns they own,
+      so the merged frame is copied only by the row filters and the final encoding.
+    - Country grouping and the top-k vocabularies are learned from df unless top_countries / vocab are given;
+      rows_simplified=True skips the row-wise stages for frames that already went through simplify_rows.
+    - Columns in native_categoricals (see NATIVE_CATEGORICAL_COLS) are kept as category codes instead of
+      being one-hot encoded.
+    - Prints wall time and peak RSS per stage; pass memory_report to also collect the rows.
+    """
+    stages = [] if rows_simplified else list(ROW_STAGES)
+    stages += [
+        ("country", partial(preprocess_country, top_n=TOP_COUNTRIES, top_countries=top_countries)),
+        ("encode_top_k", partial(
+            encode_df_top_k, k=TOP_K, exclude=TOP_K_EXCLUDE + list(native_categoricals), vocab=vocab
+        )),
+    ]
+    if native_categoricals:
+        stages.append(("native_categoricals", partial(encode_native_categoricals, cols=native_categoricals)))
+
+    memory_report = [] if memory_report is None else memory_report
+    df = _run_stages(df, stages, memory_report)
+    print("Before dropping unused dummies:", df.shape)
+
+    print("\n=== Memory by stage ===")
+    print(format_memory_report(memory_report), "\n")
+
+    return df
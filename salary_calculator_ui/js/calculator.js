@@ -1,6 +1,9 @@
 // Enhanced Developer Salary Calculator with Temporal Weighting and Confidence Intervals
 // Based on Random Forest tree prediction variance methodology
 
+// Local prediction server (python serve.py)
+const PREDICTION_API_URL = 'http://127.0.0.1:8000/predict';
+
 class SalaryCalculator {
     constructor() {
         this.model = new TemporalWeightedModel();
@@ -73,10 +76,7 @@ class SalaryCalculator {
         calculateBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Calculating...';
 
         try {
-            // Simulate API call delay for better UX
-            await new Promise(resolve => setTimeout(resolve, 1500));
-            
-            const prediction = this.model.predict(formData);
+            const prediction = await this.predict(formData);
             this.displayResults(prediction, formData);
             
         } catch (error) {
@@ -89,6 +89,33 @@ class SalaryCalculator {
         }
     }
 
+    async predict(formData) {
+        // Prefer the trained model served by serve.py; fall back to the built-in estimate when it is not running.
+        const prediction = this.model.predict(formData);
+        try {
+            const response = await fetch(PREDICTION_API_URL, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(formData)
+            });
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            const served = await response.json();
+            prediction.salary = Math.round(served.salary);
+            // 5th-95th percentile of the per-tree predictions; null for models without per-tree predictions
+            prediction.confidenceInterval = served.lower == null || served.upper == null ? null : {
+                lower: Math.round(served.lower),
+                upper: Math.round(served.upper)
+            };
+            prediction.modelInfo.source = 'server';
+        } catch (error) {
+            console.warn('Prediction server unavailable, using built-in estimate:', error);
+            prediction.modelInfo.source = 'local';
+        }
+        return prediction;
+    }
+
     extractFormData() {
         const form = document.getElementById('salaryForm');
         const formData = new FormData(form);
@@ -214,9 +241,11 @@ class SalaryCalculator {
         // Display main prediction
         predictedSalary.textContent = this.formatCurrency(prediction.salary);
         
-        // Display confidence interval
-        confidenceRange.textContent = 
-            `${this.formatCurrency(prediction.confidenceInterval.lower)} - ${this.formatCurrency(prediction.confidenceInterval.upper)}`;
+        // Display confidence interval (the served model may not provide one)
+        const interval = prediction.confidenceInterval;
+        confidenceRange.textContent = interval
+            ? `${this.formatCurrency(interval.lower)} - ${this.formatCurrency(interval.upper)}`
+            : 'Range not available for this model';
 
         // Create feature impact chart
         this.createImpactChart(prediction.featureImpacts);
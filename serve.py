@@ -0,0 +1,263 @@
+import json
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+from artifacts import MODEL_DIR, load_artifacts
+from features import FeaturePipeline
+from model.flat_forest import FlatForest
+from model.intervals import per_tree_predictions, summarize_tree_predictions
+
+# Calculator form values → survey answers as they appear in the merged frame.
+COMPANY_SIZE_ANSWERS = {
+    'Small':            '10 to 19 employees',
+    'Medium':           '20 to 99 employees',
+    'Large':            '100 to 499 employees',
+    'Enterprise':       '1,000 to 4,999 employees',
+    'Large Enterprise': '10,000 or more employees',
+}
+EMPLOYMENT_ANSWERS = {
+    'Full-time': 'Employed full-time',
+    'Remote':    'Employed full-time',
+    'Part-time': 'Employed part-time',
+    'Freelance': 'Independent contractor, freelancer, or self-employed',
+}
+
+
+# Calculator fields the survey has no column for; they are dropped rather than encoded as unanswered.
+UNUSED_PROFILE_FIELDS = ('age',)
+
+
+def profile_to_record(profile: dict) -> dict:
+    """
+    Converts the calculator's JSON profile (country, experience, companySize, employmentType, languages)
+    into a raw survey record.
+
+    - Calculator fields are mapped to the merged-frame columns and answer strings; an answer without a
+      survey equivalent becomes unanswered (None).
+    - Fields in UNUSED_PROFILE_FIELDS (e.g. age) are dropped.
+    - Any other key is taken to be a merged-frame column name and passed through; a mapped calculator
+      field does not override the column if both are given.
+    """
+    calculator_fields = {'country', 'experience', 'companySize', 'employmentType', 'languages'}
+    record = {
+        key: val for key, val in profile.items()
+        if key not in calculator_fields and key not in UNUSED_PROFILE_FIELDS
+    }
+    if profile.get('country') is not None:
+        record.setdefault('country', str(profile['country']))
+    if profile.get('experience') is not None:
+        years = str(profile['experience'])
+        record.setdefault('years_code_pro', years)
+        record.setdefault('years_code_total', years)
+    if 'companySize' in profile:
+        record.setdefault('org_size', COMPANY_SIZE_ANSWERS.get(profile['companySize']))
+    if 'employmentType' in profile:
+        record.setdefault('employment', EMPLOYMENT_ANSWERS.get(profile['employmentType']))
+    if 'languages' in profile:
+        record.setdefault('langs_worked', list(profile['languages'] or []) or None)
+    return record
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent prediction requests into batches for a single predict(X) call.
+
+    A background thread takes the first waiting request, then keeps collecting until max_batch rows
+    are queued or max_wait_ms has passed since that first request, and resolves every request's Future
+    with its slice of the batch prediction.
+    """
+
+    def __init__(self, predict, max_batch: int = 64, max_wait_ms: float = 2.0):
+        self.predict = predict
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.batch_sizes = []
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, X: np.ndarray) -> Future:
+        future = Future()
+        self._queue.put((X, future))
+        return future
+
+    def _collect(self) -> list:
+        items = [self._queue.get()]
+        rows = len(items[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            items.append(item)
+            rows += len(item[0])
+        return items
+
+    def _run(self) -> None:
+        while True:
+            items = self._collect()
+            try:
+                X = np.concatenate([x for x, _ in items]) if len(items) > 1 else items[0][0]
+                pred = self.predict(X)
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+            self.batch_sizes.append(len(X))
+            start = 0
+            for x, future in items:
+                future.set_result(pred[start:start + len(x)])
+                start += len(x)
+
+
+class PredictionService:
+    """
+    Turns calculator profiles into USD salary predictions: features → batched per-tree predictions of the
+    log normalized salary → forest mean and tree quantiles → expm1 × the country's average salary.
+    Models without per-tree predictions return lower/upper as None.
+    """
+
+    def __init__(
+            self,
+            model,
+            pipeline: FeaturePipeline,
+            max_batch: int = 64,
+            max_wait_ms: float = 2.0,
+            quantiles: tuple = (0.05, 0.95)
+    ):
+        self.pipeline = pipeline
+        self.quantiles = quantiles
+        self.has_intervals = isinstance(model, FlatForest) or hasattr(model, "estimators_")
+        if self.has_intervals:
+            predict = lambda X: per_tree_predictions(model, X, n_jobs=1)
+        else:
+            # Models without per-tree predictions (e.g. gradient boosting) return a point estimate only.
+            predict = lambda X: model.predict(X)[:, None]
+        self.batcher = MicroBatcher(predict, max_batch=max_batch, max_wait_ms=max_wait_ms)
+        self.fallback_avg = float(np.mean(list(pipeline.country_avg_salary.values())))
+
+    def predict(self, profiles: list, timeout: float = 30.0) -> list:
+        records = [profile_to_record(p) for p in profiles]
+        X = self.pipeline.transform_records(records)
+        per_tree = self.batcher.submit(X).result(timeout=timeout)
+        summary = summarize_tree_predictions(per_tree, self.quantiles)
+        results = []
+        for r, record in enumerate(records):
+            country = self.pipeline.country(record.get('country'))
+            avg = self.pipeline.country_avg_salary.get(country, self.fallback_avg)
+            lower = upper = None
+            if self.has_intervals:
+                lower = round(float(np.expm1(summary["quantiles"][0][r]) * avg), 2)
+                upper = round(float(np.expm1(summary["quantiles"][-1][r]) * avg), 2)
+            results.append({
+                "salary": round(float(np.expm1(summary["mean"][r]) * avg), 2),
+                "lower": lower,
+                "upper": upper,
+                "country": country,
+                "salary_normalized": float(np.expm1(summary["mean"][r])),
+            })
+        return results
+
+
+def make_handler(service: PredictionService):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out as separate writes; without TCP_NODELAY each response waits on a delayed ACK.
+        disable_nagle_algorithm = True
+
+        def _send(self, status: int, payload) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_OPTIONS(self):
+            self.send_response(204)
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Access-Control-Allow-Methods", "POST, GET, OPTIONS")
+            self.send_header("Access-Control-Allow-Headers", "Content-Type")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_GET(self):
+            if self.path != "/health":
+                self._send(404, {"error": "not found"})
+                return
+            self._send(200, {"status": "ok", "features": len(service.pipeline.feature_names)})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except (ValueError, json.JSONDecodeError):
+                self._send(400, {"error": "invalid JSON"})
+                return
+            single = isinstance(payload, dict)
+            profiles = [payload] if single else payload
+            if not isinstance(profiles, list) or not profiles or not all(isinstance(p, dict) for p in profiles):
+                self._send(400, {"error": "expected a profile object or a non-empty list of profiles"})
+                return
+            try:
+                results = service.predict(profiles)
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+                return
+            self._send(200, results[0] if single else results)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def serve(
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        model_dir: str = MODEL_DIR,
+        max_batch: int = 64,
+        max_wait_ms: float = 2.0
+) -> None:
+    """
+    Loads the artifacts once and serves POST /predict (one profile or a list) and GET /health.
+    """
+    model, pipeline = load_artifacts(model_dir)
+    service = PredictionService(model, pipeline, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    server = PredictionServer((host, port), make_handler(service))
+    print(f"Serving predictions on http://{host}:{port}/predict (max_batch={max_batch}, max_wait={max_wait_ms}ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local salary prediction server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.model_dir, args.max_batch, args.max_wait_ms)
@@ -0,0 +1,91 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+import inspect
+
+from data_io import DATA_DIR
+
+STAGE_CACHE_DIR_NAME = "stage_cache"
+
+
+def code_version(*objs) -> str:
+    """
+    Hashes the source of the given modules/functions, so a cached stage is invalidated when its code changes.
+    """
+    h = hashlib.sha256()
+    for obj in objs:
+        h.update(inspect.getsource(obj).encode("utf-8"))
+    return h.hexdigest()
+
+
+class StageCache:
+    """
+    Content-addressed on-disk cache for pipeline stages.
+
+    A stage's key hashes its name, the key of the data it consumes (the upstream stage's key or a source
+    fingerprint), its parameters and its code version. Keys can therefore be computed for the whole chain
+    before anything is loaded, and only the stages that are actually needed get materialized.
+    """
+
+    def __init__(self, cache_dir: str = os.path.join(DATA_DIR, STAGE_CACHE_DIR_NAME), enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.stats = []
+
+    def key(self, name: str, inputs_key: str, params=None, code: str = "") -> str:
+        payload = json.dumps(
+            {"stage": name, "inputs": inputs_key, "params": params, "code": code},
+            sort_keys=True,
+            default=repr,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, name: str, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}-{key[:16]}.pkl")
+
+    def run(self, name: str, key: str, compute):
+        """
+        Returns the cached result for (name, key), or calls compute() and stores its result.
+        Each call is recorded as a hit or miss together with the time it took and, for hits,
+        the time saved relative to the original computation. Times are inclusive: a miss also
+        counts the upstream stages that compute() loaded or recomputed.
+        """
+        path = self._path(name, key)
+        start = time.perf_counter()
+        if self.enabled and os.path.exists(path):
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+            if entry["key"] == key:
+                seconds = time.perf_counter() - start
+                self.stats.append({
+                    "stage": name,
+                    "status": "hit",
+                    "seconds": seconds,
+                    "saved": max(entry["compute_seconds"] - seconds, 0.0),
+                })
+                return entry["result"]
+
+        result = compute()
+        seconds = time.perf_counter() - start
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(
+                    {"key": key, "compute_seconds": seconds, "result": result},
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, path)
+        self.stats.append({"stage": name, "status": "miss", "seconds": seconds, "saved": 0.0})
+        return result
+
+    def report(self) -> str:
+        lines = [f"{'stage':<24}{'status':>8}{'seconds':>10}{'saved':>10}"]
+        for row in self.stats:
+            lines.append(f"{row['stage']:<24}{row['status']:>8}{row['seconds']:>10.2f}{row['saved']:>10.2f}")
+        total_saved = sum(row["saved"] for row in self.stats)
+        lines.append(f"Total time saved by cache: {total_saved:.2f}s")
+        return "\n".join(lines)
@@ -0,0 +1,45 @@
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+
+import pytest
+
+# The pipeline modules live at the repository root (and model/ is a namespace package).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SURVEY_YEARS = (2021, 2022, 2023, 2024)
+
+
+@pytest.fixture(scope="session")
+def survey_dir(tmp_path_factory) -> str:
+    """
+    Directory of small synthetic survey archives ("{year}.zip") with real headers and answer formats.
+    """
+    from benchmarks.synthetic_survey import write_survey
+
+    data_dir = str(tmp_path_factory.mktemp("survey"))
+    with redirect_stdout(io.StringIO()):
+        write_survey(data_dir, 6000, years=SURVEY_YEARS)
+    return data_dir
+
+
+@pytest.fixture(scope="session")
+def cleaned_years(survey_dir) -> dict:
+    """
+    The synthetic survey years run through ingest and cleaning.
+    """
+    from cleaning import ingest_dtypes, harmonize_and_select, drop_empty_and_low_info, convert_to_numeric
+    from data_io import load_raw_data
+
+    with redirect_stdout(io.StringIO()):
+        raw = load_raw_data(data_dir=survey_dir, use_cache=False, select=ingest_dtypes, from_zip=True)
+        return convert_to_numeric(drop_empty_and_low_info(harmonize_and_select(raw)))
+
+
+@pytest.fixture(scope="session")
+def merged(cleaned_years):
+    from merge import merge_data
+
+    with redirect_stdout(io.StringIO()):
+        return merge_data(cleaned_years)
@@ -0,0 +1,60 @@
+import io
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import mean_absolute_error
+
+from model.backtest import backtest
+from model.engines import make_regressor
+from model.weighting import sample_weights
+
+FEATURES = ["f0", "f1", "f2"]
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(0)
+    years = rng.choice([2020, 2021, 2022, 2023], size=800, p=[0.1, 0.2, 0.3, 0.4])
+    df = pd.DataFrame(rng.normal(size=(800, 3)), columns=FEATURES)
+    df["year"] = years
+    df["country"] = rng.choice(["A", "B", "C"], size=800)
+    df["salary_normalized"] = np.exp(0.3 * df["f0"] + 0.05 * (years - 2020) + rng.normal(scale=0.1, size=800))
+    return df, pd.Series({"A": 50_000.0, "B": 80_000.0, "C": 30_000.0})
+
+
+def _run(df, country_avg, **kwargs):
+    with redirect_stdout(io.StringIO()):
+        return backtest(df, country_avg, FEATURES, engine="hgb", cores=1, **kwargs)
+
+
+def test_folds_cover_observed_origins_with_earlier_years(frame):
+    df, country_avg = frame
+    results = _run(df, country_avg, models=("baseline", "weighted"))
+    # 2019 and 2024 are not observed and 2020 has no earlier year to train on.
+    assert results["origin"].tolist() == [2021, 2021, 2022, 2022, 2023, 2023]
+    assert results["model"].tolist() == ["baseline", "weighted"] * 3
+    for row in results.itertuples():
+        assert row.n_train == (df["year"] < row.origin).sum()
+        assert row.n_test == (df["year"] == row.origin).sum()
+        assert row.train_years == f"2020-{row.origin - 1}"
+
+
+def test_fold_scores_match_a_direct_fit(frame):
+    df, country_avg = frame
+    [row] = _run(df, country_avg, origins=[2022]).to_dict("records")
+    train, test = df[df["year"] < 2022], df[df["year"] == 2022]
+    model = make_regressor("hgb", n_jobs=1)
+    model.fit(
+        train[FEATURES].to_numpy(np.float32), np.log1p(train["salary_normalized"]),
+        sample_weight=sample_weights(train["year"])
+    )
+    expected = mean_absolute_error(np.log1p(test["salary_normalized"]), model.predict(test[FEATURES].to_numpy(np.float32)))
+    assert row["mae_log"] == pytest.approx(expected)
+
+
+def test_no_usable_origin_raises(frame):
+    df, country_avg = frame
+    with pytest.raises(ValueError, match="No backtest origin"):
+        _run(df, country_avg, origins=[2019, 2020, 2024])
@@ -0,0 +1,41 @@
+import io
+import shutil
+import zipfile
+from contextlib import redirect_stdout
+
+import pandas as pd
+import pytest
+
+from cleaning import clean_years_parallel, ingest_dtypes
+
+
+@pytest.fixture
+def data_dir(survey_dir, tmp_path):
+    # A private copy, so the per-year caches written while cleaning stay out of the shared fixture.
+    return shutil.copytree(survey_dir, str(tmp_path / "survey"))
+
+
+def _clean(data_dir, workers):
+    with redirect_stdout(io.StringIO()):
+        return clean_years_parallel(
+            None, data_dir, workers=workers, select=ingest_dtypes, save=False, from_zip=True
+        )
+
+
+def test_parallel_cleaning_matches_single_worker(data_dir, cleaned_years):
+    single = _clean(data_dir, workers=1)
+    parallel = _clean(data_dir, workers=2)
+
+    assert list(parallel) == list(single) == sorted(cleaned_years)
+    for yr in single:
+        pd.testing.assert_frame_equal(parallel[yr], single[yr])
+        pd.testing.assert_frame_equal(parallel[yr], cleaned_years[yr])
+
+
+def test_failing_year_raises_instead_of_hanging(data_dir):
+    # Discovered alongside the good archives, and handed to a worker first.
+    with open(f"{data_dir}/2020.zip", "wb") as f:
+        f.write(b"not a zip archive")
+
+    with pytest.raises(zipfile.BadZipFile):
+        _clean(data_dir, workers=2)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocessing import clean_compensation_string, parse_compensation
+
+EDGE_CASES = [
+    # thousands separators and decimals
+    "85000", "85,000", "1,234,567", "85.000", "1.234.567", "85,000.50", "85.000,50",
+    "1,234.5", "1.234,5", "12,50", "1,5", "1,2345", "0,99", ",50", "50,", ".5", "5.", "1..2",
+    # whitespace and blanks
+    " 85000 ", "\t72,000\n", "", " ", "   ",
+    # ranges, suffixes, currency signs and words
+    "50000-60000", "50,000 - 60,000", "50k", "50K", "85k+", "$85,000", "€ 40.000", "85000 USD",
+    "100000/yr", "approx 50000",
+    # things float() accepts beyond plain digits
+    "-5000", "+5000", "1e5", "1E5", "1_000", "inf", "nan", "NaN", "Infinity",
+    # junk
+    "N/A", "n/a", "None", "prefer not to say", "abc", "12a", "--", "ⅷ", "١٢٣",
+]
+
+
+def _assert_same(values: pd.Series):
+    expected = values.map(clean_compensation_string).astype(np.float64).to_numpy()
+    result = parse_compensation(values)
+    assert result.index.equals(values.index)
+    np.testing.assert_array_equal(result.to_numpy(), expected)
+
+
+@pytest.mark.parametrize("value", EDGE_CASES)
+def test_matches_scalar_parser_per_value(value):
+    _assert_same(pd.Series([value], dtype=object))
+
+
+def test_matches_scalar_parser_on_mixed_column():
+    values = pd.Series(EDGE_CASES * 3 + [None, np.nan, 85000, 72000.5, np.int64(1000)], dtype=object)
+    _assert_same(values.sample(frac=1, random_state=0))
+
+
+def test_matches_scalar_parser_on_string_dtype():
+    _assert_same(pd.Series(EDGE_CASES + [None], dtype="string"))
+
+
+@pytest.mark.parametrize("values", [
+    pd.Series([85000, 72000, 0], dtype=np.int64),
+    pd.Series([85000.5, np.nan, 1e6], dtype=np.float64),
+    pd.Series([1, None], dtype="Int64"),
+    pd.Series([], dtype=np.float64),
+    pd.Series([], dtype=object),
+    pd.Series([None, np.nan], dtype=object),
+])
+def test_matches_scalar_parser_on_numeric_and_empty_input(values):
+    _assert_same(values)
@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_io
+
+
+def _write_year(data_dir, year, df):
+    os.makedirs(os.path.join(data_dir, str(year)), exist_ok=True)
+    df.to_csv(os.path.join(data_dir, str(year), f"{year}.csv"), index=False)
+
+
+@pytest.fixture
+def survey(tmp_path):
+    df = pd.DataFrame({
+        "Country": ["Germany", "India", "Brazil", "Germany"],
+        "YearsCodePro": ["5", "Less than 1 year", "12", None],
+        "ConvertedCompYearly": [70000.0, 12000.5, np.nan, 91000.0],
+        "EdLevel": ["Master", "Bachelor", "Bachelor", None],
+    })
+    _write_year(str(tmp_path), 2023, df)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    calls = []
+    parse = data_io._read_survey_csv
+
+    def counting(*args, **kwargs):
+        calls.append(args[0])
+        return parse(*args, **kwargs)
+
+    monkeypatch.setattr(data_io, "_read_survey_csv", counting)
+    return calls
+
+
+def _select(header):
+    return {col: ("category" if col == "Country" else None) for col in header if col != "EdLevel"}
+
+
+def test_warm_load_matches_cold_load(survey, parses):
+    cold = data_io.load_year(2023, survey, select=_select)
+    warm = data_io.load_year(2023, survey, select=_select)
+
+    assert len(parses) == 1
+    pd.testing.assert_frame_equal(warm, cold)
+    assert warm["Country"].dtype == "category"
+
+
+def test_stored_digest_matches_source_file(survey, parses):
+    data_io.load_year(2023, survey)
+    data_path, meta_path = data_io._cache_paths(os.path.join(survey, data_io.CACHE_DIR_NAME), 2023)
+    meta = pd.read_json(meta_path, typ="series")
+
+    assert meta["sha256"] == data_io.file_sha256(os.path.join(survey, "2023", "2023.csv"))
+
+
+def test_touched_file_with_same_content_hits_cache(survey, parses):
+    cold = data_io.load_year(2023, survey)
+    src = os.path.join(survey, "2023", "2023.csv")
+    st = os.stat(src)
+    os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+    warm = data_io.load_year(2023, survey)
+    assert len(parses) == 1
+    pd.testing.assert_frame_equal(warm, cold)
+
+    # The refreshed mtime is trusted on the next load without re-hashing.
+    data_io.load_year(2023, survey)
+    assert len(parses) == 1
+
+
+def test_changed_content_is_reparsed(survey, parses):
+    data_io.load_year(2023, survey)
+    src = os.path.join(survey, "2023", "2023.csv")
+    st = os.stat(src)
+    with open(src) as f:
+        text = f.read()
+    with open(src, "w") as f:
+        f.write(text.replace("70000.0", "80000.0"))  # same size, different bytes
+    os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+
+    reloaded = data_io.load_year(2023, survey)
+    assert len(parses) == 2
+    assert reloaded["ConvertedCompYearly"].iloc[0] == 80000.0
+
+
+def test_projections_do_not_share_cache_files(survey, parses):
+    full = data_io.load_year(2023, survey)
+    narrow = data_io.load_year(2023, survey, select=_select)
+    assert len(parses) == 2
+    assert "EdLevel" in full.columns and "EdLevel" not in narrow.columns
+
+    # Both projections stay cached side by side.
+    pd.testing.assert_frame_equal(data_io.load_year(2023, survey), full)
+    pd.testing.assert_frame_equal(data_io.load_year(2023, survey, select=_select), narrow)
+    assert len(parses) == 2
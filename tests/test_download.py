@@ -0,0 +1,175 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from data_io import download_file
+
+PAYLOAD = bytes(range(256)) * 4096  # 1 MB
+CHANGED = PAYLOAD[::-1]
+
+
+class StandInServer:
+    """
+    Local HTTP server whose responses are scripted per request; it records each request's headers.
+
+    Each script step is one of:
+    - ("full", body, etag): 200 with the whole body
+    - ("drop", body, etag): 200 announcing the whole body but closing the connection halfway
+    - ("range", body, etag): honours Range/If-Range like a conforming server
+    - ("range_from", start, body, etag): 206 whose Content-Range starts at `start`, whatever was asked
+    - ("status", code): an empty response with that status
+    """
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.requests.append(dict(self.headers))
+                step = server.script.pop(0) if len(server.script) > 1 else server.script[0]
+                getattr(server, f"_{step[0]}")(self, *step[1:])
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/survey.zip"
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    @staticmethod
+    def _send(handler, status, body, headers):
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _full(self, handler, body, etag):
+        self._send(handler, 200, body, {"ETag": etag})
+
+    def _drop(self, handler, body, etag):
+        handler.send_response(200)
+        handler.send_header("ETag", etag)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body[:len(body) // 2])
+        handler.wfile.flush()
+        handler.close_connection = True
+
+    def _range(self, handler, body, etag):
+        requested = handler.headers.get("Range")
+        if_range = handler.headers.get("If-Range")
+        if requested is None or (if_range is not None and if_range != etag):
+            return self._full(handler, body, etag)
+        start = int(requested.split("=")[1].rstrip("-"))
+        if start >= len(body):
+            return self._status(handler, 416)
+        self._send(handler, 206, body[start:], {
+            "ETag": etag, "Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"
+        })
+
+    def _range_from(self, handler, start, body, etag):
+        self._send(handler, 206, body[start:], {
+            "ETag": etag, "Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"
+        })
+
+    def _status(self, handler, code):
+        self._send(handler, code, b"", {})
+
+
+def _download(server, tmp_path, **kwargs):
+    dest = tmp_path / "survey.zip"
+    sha256 = download_file(server.url, str(dest), backoff=0, chunk_size=1 << 14, **kwargs)
+    return dest, sha256
+
+
+def test_resumes_after_dropped_connection(tmp_path):
+    with StandInServer([("drop", PAYLOAD, '"v1"'), ("range", PAYLOAD, '"v1"')]) as server:
+        dest, sha256 = _download(server, tmp_path)
+    assert dest.read_bytes() == PAYLOAD
+    assert sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+    assert "Range" not in server.requests[0]
+    assert server.requests[1]["Range"] == f"bytes={len(PAYLOAD) // 2}-"
+    assert server.requests[1]["If-Range"] == '"v1"'
+    assert not (tmp_path / "survey.zip.part").exists()
+    assert not (tmp_path / "survey.zip.part.validator").exists()
+
+
+def test_changed_remote_file_is_downloaded_again(tmp_path):
+    # If-Range does not match the new ETag, so a conforming server sends the new file in full.
+    with StandInServer([("drop", PAYLOAD, '"v1"'), ("range", CHANGED, '"v2"')]) as server:
+        dest, sha256 = _download(server, tmp_path)
+    assert dest.read_bytes() == CHANGED
+    assert sha256 == hashlib.sha256(CHANGED).hexdigest()
+
+
+def test_server_ignoring_range_restarts_from_zero(tmp_path):
+    with StandInServer([("drop", PAYLOAD, '"v1"'), ("full", PAYLOAD, '"v1"')]) as server:
+        dest, sha256 = _download(server, tmp_path)
+    assert "Range" in server.requests[1]
+    assert dest.read_bytes() == PAYLOAD
+    assert sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+
+
+def test_mismatched_content_range_restarts_from_zero(tmp_path):
+    with StandInServer([
+        ("drop", PAYLOAD, '"v1"'), ("range_from", 0, PAYLOAD, '"v1"'), ("full", PAYLOAD, '"v1"')
+    ]) as server:
+        dest, _ = _download(server, tmp_path, retries=1)
+    assert "Range" not in server.requests[2]
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_416_restarts_without_using_a_retry(tmp_path):
+    part = tmp_path / "survey.zip.part"
+    part.write_bytes(PAYLOAD + b"stale tail")
+    (tmp_path / "survey.zip.part.validator").write_text('"v1"')
+    with StandInServer([("range", PAYLOAD, '"v1"')]) as server:
+        dest, _ = _download(server, tmp_path, retries=0)
+    assert [("Range" in r) for r in server.requests] == [True, False]
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_partial_file_without_validator_is_not_resumed(tmp_path):
+    (tmp_path / "survey.zip.part").write_bytes(CHANGED[:1000])
+    with StandInServer([("range", PAYLOAD, '"v1"')]) as server:
+        dest, _ = _download(server, tmp_path)
+    assert "Range" not in server.requests[0]
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_retries_5xx(tmp_path):
+    with StandInServer([("status", 503), ("status", 502), ("full", PAYLOAD, '"v1"')]) as server:
+        dest, _ = _download(server, tmp_path, retries=2)
+    assert len(server.requests) == 3
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_gives_up_after_retries(tmp_path):
+    with StandInServer([("status", 503)]) as server:
+        with pytest.raises(requests.HTTPError):
+            _download(server, tmp_path, retries=1)
+    assert len(server.requests) == 2
+
+
+def test_4xx_is_not_retried(tmp_path):
+    with StandInServer([("status", 404)]) as server:
+        with pytest.raises(requests.HTTPError):
+            _download(server, tmp_path, retries=3)
+    assert len(server.requests) == 1
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import mean_absolute_error, r2_score
+
+from model.evaluation import evaluate_predictions
+
+N = 10_000
+
+
+@pytest.fixture(scope="module")
+def predictions():
+    rng = np.random.default_rng(0)
+    y_true = rng.normal(0.0, 0.6, size=N)
+    y_pred = y_true + rng.normal(0.0, 0.3, size=N)
+    countries = rng.choice(["A", "B", "C"], size=N, p=[0.6, 0.3, 0.1])
+    country_avg = pd.Series({"A": 60_000.0, "B": 40_000.0, "C": 90_000.0})
+    segments = pd.DataFrame({"group": np.where(np.arange(N) < 3, "tiny", np.where(np.arange(N) < 600, "small", "big"))})
+    return y_true, y_pred, countries, country_avg, segments
+
+
+def _naive_segment_ci(errors, labels, label, n_boot, seed=1):
+    # Plain n-out-of-n bootstrap of the segment's mean error.
+    rng = np.random.default_rng(seed)
+    in_segment = (labels == label).astype(np.float64)
+    means = []
+    for _ in range(n_boot):
+        idx = rng.integers(0, len(errors), size=len(errors))
+        k = in_segment[idx].sum()
+        if k:
+            means.append((errors[idx] * in_segment[idx]).sum() / k)
+    return np.quantile(means, [0.025, 0.975])
+
+
+def test_metrics_match_sklearn(predictions):
+    y_true, y_pred, countries, country_avg, _ = predictions
+    result = evaluate_predictions(y_true, y_pred, pd.Series(countries), country_avg, n_boot=0)
+    metrics = result["metrics"]["value"]
+    avg = country_avg.reindex(countries).to_numpy()
+    true_usd, pred_usd = np.expm1(y_true) * avg, np.expm1(y_pred) * avg
+
+    assert metrics["mae_log"] == pytest.approx(mean_absolute_error(y_true, y_pred))
+    assert metrics["mae_norm"] == pytest.approx(mean_absolute_error(np.expm1(y_true), np.expm1(y_pred)))
+    assert metrics["mae_usd"] == pytest.approx(mean_absolute_error(true_usd, pred_usd))
+    assert metrics["bias_usd"] == pytest.approx(np.mean(pred_usd - true_usd))
+    assert metrics["r2_log"] == pytest.approx(r2_score(y_true, y_pred))
+    np.testing.assert_allclose(result["predictions"]["pred_salary_usd"], pred_usd)
+
+
+def test_segment_means_match_groupby(predictions):
+    y_true, y_pred, countries, country_avg, segments = predictions
+    table = evaluate_predictions(y_true, y_pred, pd.Series(countries), country_avg, segments, n_boot=0)["segments"]["group"]
+    expected = pd.Series(np.abs(y_true - y_pred)).groupby(segments["group"]).agg(["size", "mean"])
+    assert table["n"].to_dict() == expected["size"].to_dict()
+    np.testing.assert_allclose(table.loc[expected.index, "mae_log"], expected["mean"])
+
+
+@pytest.mark.parametrize("label, tolerance", [("tiny", 0.05), ("small", 0.15), ("big", 0.15)])
+def test_segment_ci_matches_naive_bootstrap(predictions, label, tolerance):
+    # max_boot_rows below N takes the m-out-of-n path; a 3-row segment is then resampled exactly.
+    y_true, y_pred, countries, country_avg, segments = predictions
+    table = evaluate_predictions(
+        y_true, y_pred, pd.Series(countries), country_avg, segments, n_boot=1000, max_boot_rows=2_000
+    )["segments"]["group"]
+    lo, hi = table.loc[label, ["mae_log_ci_low", "mae_log_ci_high"]]
+    naive_lo, naive_hi = _naive_segment_ci(np.abs(y_true - y_pred), segments["group"].to_numpy(), label, 1000)
+    width = naive_hi - naive_lo
+    assert lo == pytest.approx(naive_lo, abs=tolerance * width)
+    assert hi == pytest.approx(naive_hi, abs=tolerance * width)
+
+
+def test_rarely_sampled_segment_has_no_ci(predictions):
+    # With the exact resampling switched off, 2,000-row replicates almost never draw the 3-row segment.
+    y_true, y_pred, countries, country_avg, segments = predictions
+    table = evaluate_predictions(
+        y_true, y_pred, pd.Series(countries), country_avg, segments,
+        n_boot=200, max_boot_rows=2_000, min_segment_boot_rows=0
+    )["segments"]["group"]
+    assert table.loc["tiny", ["mae_log_ci_low", "mae_log_ci_high"]].isna().all()
+    assert table.loc["small", ["mae_log_ci_low", "mae_log_ci_high"]].notna().all()
+
+
+def test_categorical_and_object_segments_agree(predictions):
+    y_true, y_pred, countries, country_avg, segments = predictions
+    segments = segments.assign(country=countries)
+    as_categories = segments.astype("category")
+    # Unused categories must not show up as empty segments.
+    as_categories["group"] = as_categories["group"].cat.add_categories(["never"])
+    named = pd.Series(countries, name="country")
+    expected = evaluate_predictions(y_true, y_pred, named, country_avg, segments, n_boot=50)
+    result = evaluate_predictions(y_true, y_pred, named.astype("category"), country_avg, as_categories, n_boot=50)
+    pd.testing.assert_frame_equal(result["metrics"], expected["metrics"])
+    for col, table in expected["segments"].items():
+        got = result["segments"][col]
+        pd.testing.assert_frame_equal(got.set_axis(got.index.astype(object)), table, check_index_type=False)
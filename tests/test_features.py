@@ -0,0 +1,72 @@
+import io
+import pickle
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import FeaturePipeline
+from model.engines import native_categoricals
+from model.utils import NON_FEATURE_COLS
+
+
+@pytest.fixture(scope="module", params=["forest", "hgb"])
+def fitted(request, merged):
+    pipeline = FeaturePipeline()
+    with redirect_stdout(io.StringIO()):
+        processed, _ = pipeline.fit_transform(merged.copy(), native_categoricals(request.param))
+    return pipeline, processed
+
+
+def test_feature_names_follow_processed_frame(fitted):
+    pipeline, processed = fitted
+    assert pipeline.feature_names == [c for c in processed.columns if c not in NON_FEATURE_COLS]
+    assert pipeline.categorical_mask.sum() == len(pipeline.native_categoricals)
+
+
+def test_transform_reproduces_training_features(fitted, merged):
+    pipeline, processed = fitted
+    raw = merged.loc[processed.index]
+    expected = processed[pipeline.feature_names].astype(np.float64)
+    pd.testing.assert_frame_equal(pipeline.transform(raw).astype(np.float64), expected)
+
+
+def test_transform_record_agrees_with_transform(fitted, merged):
+    pipeline, processed = fitted
+    raw = merged.loc[processed.index].sample(200, random_state=0)
+    # Unanswered fields and unseen categories must map the same way in both paths.
+    raw.iloc[0, raw.columns.get_loc("dev_type")] = np.nan
+    raw.iloc[1, raw.columns.get_loc("org_size")] = "A brand new answer"
+    records = raw.to_dict("records")
+    batch = pipeline.transform(raw).to_numpy(dtype=np.float32)
+    np.testing.assert_array_equal(pipeline.transform_records(records), batch)
+    np.testing.assert_array_equal(pipeline.transform_record(records[0]), batch[0])
+
+
+def test_record_with_missing_columns_is_unanswered(fitted, merged):
+    pipeline, _ = fitted
+    record = {"country": "Germany"}
+    np.testing.assert_array_equal(
+        pipeline.transform_record(record), pipeline.transform(pd.DataFrame([record])).to_numpy(np.float32)[0]
+    )
+
+
+def test_save_load_round_trip(fitted, merged, tmp_path):
+    pipeline, processed = fitted
+    path = tmp_path / "pipeline.json"
+    pipeline.save(str(path))
+    loaded = FeaturePipeline.load(str(path))
+    assert loaded.to_dict() == pipeline.to_dict()
+    assert loaded.feature_groups == pipeline.feature_groups
+    np.testing.assert_array_equal(loaded.categorical_mask, pipeline.categorical_mask)
+    raw = merged.loc[processed.index[:500]]
+    pd.testing.assert_frame_equal(loaded.transform(raw), pipeline.transform(raw))
+
+
+def test_pickle_round_trip(fitted, merged):
+    # The preprocess stage of main.py pickles the fitted pipeline into the stage cache.
+    pipeline, processed = fitted
+    loaded = pickle.loads(pickle.dumps(pipeline))
+    raw = merged.loc[processed.index[:500]]
+    pd.testing.assert_frame_equal(loaded.transform(raw), pipeline.transform(raw))
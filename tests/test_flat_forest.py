@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor
+
+from model.flat_forest import FlatForest
+from model.intervals import per_tree_predictions
+
+
+def _data(n=3000, n_features=12, nan_fraction=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, n_features))
+    # Dummy-like and integer columns, as in the survey features.
+    X[:, :4] = rng.integers(0, 2, size=(n, 4))
+    X[:, 4] = rng.integers(0, 30, size=n)
+    y = X[:, 0] * 2 + np.sin(X[:, 5]) + 0.1 * X[:, 4] + rng.normal(scale=0.3, size=n)
+    if nan_fraction:
+        X[rng.random(X.shape) < nan_fraction] = np.nan
+    return X, y
+
+
+@pytest.fixture(scope="module", params=[
+    (RandomForestRegressor, 0.0), (RandomForestRegressor, 0.05), (ExtraTreesRegressor, 0.0)
+], ids=["rf", "rf-nan", "extra-trees"])
+def fitted(request):
+    cls, nan_fraction = request.param
+    X, y = _data(nan_fraction=nan_fraction)
+    forest = cls(n_estimators=25, min_samples_leaf=2, random_state=0, n_jobs=1).fit(X[:2000], y[:2000])
+    return forest, FlatForest.from_sklearn(forest), X[2000:]
+
+
+def test_predict_is_bit_identical_to_sklearn(fitted):
+    forest, flat, X = fitted
+    np.testing.assert_array_equal(flat.predict(X), forest.predict(X))
+
+
+def test_per_tree_predictions_match_sklearn_trees(fitted):
+    forest, flat, X = fitted
+    np.testing.assert_array_equal(per_tree_predictions(flat, X), per_tree_predictions(forest, X, n_jobs=2))
+
+
+def test_float64_input_near_thresholds(fitted):
+    # Values at and one float64 step around the split thresholds exercise the float32 rounding of the thresholds.
+    forest, flat, X = fitted
+    internal = np.flatnonzero((flat.left != np.arange(len(flat.left))) & np.isfinite(flat.threshold))
+    nodes = np.random.default_rng(1).choice(internal, size=300)
+    rows = np.nan_to_num(X)[np.arange(3 * len(nodes)) % len(X)]
+    values = np.concatenate([
+        np.nextafter(flat.threshold[nodes], -np.inf), flat.threshold[nodes], np.nextafter(flat.threshold[nodes], np.inf)
+    ])
+    rows[np.arange(len(rows)), np.tile(flat.feature[nodes], 3)] = values
+    np.testing.assert_array_equal(flat.predict(rows), forest.predict(rows))
+
+
+def test_apply_chunking_does_not_change_leaves(fitted):
+    _, flat, X = fitted
+    np.testing.assert_array_equal(flat.apply(X, chunk_pairs=7), flat.apply(X))
+
+
+def test_single_row_and_dataframe_input(fitted):
+    forest, flat, X = fitted
+    np.testing.assert_array_equal(flat.predict(X[0]), forest.predict(X[:1]))
+    frame = pd.DataFrame(X[:20], columns=[f"f{i}" for i in range(X.shape[1])])
+    np.testing.assert_array_equal(flat.predict(frame), forest.predict(X[:20]))
+
+
+def test_save_load_round_trip(fitted, tmp_path):
+    forest, flat, X = fitted
+    path = str(tmp_path / "forest.npz")
+    flat.save(path)
+    np.testing.assert_array_equal(FlatForest.load(path).predict(X), forest.predict(X))
+
+
+def test_rejects_wrong_feature_count_and_multi_output():
+    X, y = _data(n=200)
+    forest = RandomForestRegressor(n_estimators=3, random_state=0).fit(X, y)
+    with pytest.raises(ValueError, match="features"):
+        FlatForest.from_sklearn(forest).predict(X[:, :-1])
+    multi = RandomForestRegressor(n_estimators=3, random_state=0).fit(X, np.c_[y, y])
+    with pytest.raises(ValueError, match="single-output"):
+        FlatForest.from_sklearn(multi)
@@ -0,0 +1,48 @@
+import inspect
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+import model.importance as importance
+from stage_cache import StageCache
+
+FEATURES = ["signal", "noise", "lang_a", "lang_b"]
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 4)).astype(np.float32)
+    y = 2.0 * X[:, 0] + 0.5 * X[:, 2] + rng.normal(scale=0.1, size=400)
+    model = RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0).fit(X, y)
+    return model, X, y
+
+
+def test_groups_rank_by_importance(fitted):
+    model, X, y = fitted
+    table = importance.permutation_importance(
+        model, X, y, FEATURES, groups={"lang": ["lang_a", "lang_b"]}, n_repeats=3, n_jobs=2
+    )
+    assert table.index.tolist()[0] == "signal"
+    assert table.loc["lang", "n_columns"] == 2
+    assert set(table.index) == {"signal", "noise", "lang"}
+    assert table.loc["lang", "impurity"] == pytest.approx(model.feature_importances_[2:].sum())
+
+
+def test_cached_importance_hits_and_keys_on_scoring_helpers(fitted, tmp_path, monkeypatch):
+    model, X, y = fitted
+    hashed = []
+    real_code_version = importance.code_version
+    monkeypatch.setattr(importance, "code_version", lambda *objs: hashed.extend(objs) or real_code_version(*objs))
+
+    cache = StageCache(str(tmp_path))
+    first = importance.cached_permutation_importance(model, X, y, FEATURES, cache, n_repeats=2, n_jobs=1)
+    second = importance.cached_permutation_importance(model, X, y, FEATURES, cache, n_repeats=2, n_jobs=1)
+    assert [row["status"] for row in cache.stats] == ["miss", "hit"]
+    pd.testing.assert_frame_equal(first, second)
+
+    source = "".join(inspect.getsource(obj) for obj in hashed)
+    for helper in ("_permuted_scores", "_mae", "_column_groups"):
+        assert f"def {helper}(" in source
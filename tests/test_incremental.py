@@ -0,0 +1,58 @@
+import io
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import incremental
+from features import FeaturePipeline
+
+
+@pytest.fixture(scope="module")
+def full_and_incremental(cleaned_years, merged, tmp_path_factory):
+    store_dir = str(tmp_path_factory.mktemp("store"))
+    years = sorted(cleaned_years)
+    with redirect_stdout(io.StringIO()):
+        pipeline = FeaturePipeline()
+        full_df, full_stats = pipeline.fit_transform(merged)
+
+        incremental.bootstrap_store({yr: cleaned_years[yr] for yr in years[:-1]}, store_dir)
+        stats = incremental.append_year(years[-1], cleaned_years[years[-1]], store_dir)
+        inc_df, inc_stats = incremental.build_dataset(store_dir, stats)
+    return pipeline, full_df, full_stats, stats, inc_df, inc_stats
+
+
+def test_top_countries_match_full_recompute(full_and_incremental):
+    pipeline, _, _, stats, _, _ = full_and_incremental
+    assert stats["top_countries"] == pipeline.top_countries
+
+
+def test_vocab_matches_full_recompute(full_and_incremental):
+    pipeline, _, _, stats, _, _ = full_and_incremental
+    assert stats["vocab"] == pipeline.vocab
+
+
+def test_country_stats_match_full_recompute(full_and_incremental):
+    _, _, full_stats, stats, _, inc_stats = full_and_incremental
+    combined = stats["country_stats"]
+    # The median cannot be merged from per-year partials and is deliberately not maintained.
+    assert "median" not in combined.columns
+    expected = full_stats[["mean", "std", "count"]].sort_index()
+    pd.testing.assert_frame_equal(combined.sort_index(), expected, check_dtype=False, rtol=1e-9)
+    pd.testing.assert_frame_equal(inc_stats.sort_index(), expected, check_dtype=False, rtol=1e-9)
+
+
+def test_built_dataset_matches_full_recompute(full_and_incremental):
+    _, full_df, _, _, inc_df, _ = full_and_incremental
+    assert sorted(inc_df.columns) == sorted(full_df.columns)
+    pd.testing.assert_frame_equal(
+        inc_df[full_df.columns].reset_index(drop=True), full_df.reset_index(drop=True), check_dtype=False
+    )
+
+
+def test_year_weights_cover_stored_years(full_and_incremental, cleaned_years):
+    _, _, _, stats, _, _ = full_and_incremental
+    years = sorted(cleaned_years)
+    assert sorted(stats["year_weights"]) == years
+    assert np.diff([stats["year_weights"][yr] for yr in years]).min() > 0
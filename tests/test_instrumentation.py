@@ -0,0 +1,116 @@
+import importlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import instrumentation
+from instrumentation import track_memory, format_memory_report, reset_peak_rss
+
+
+def test_peak_is_none_when_it_cannot_be_reset(monkeypatch, tmp_path):
+    monkeypatch.setattr(instrumentation, "_CLEAR_REFS_PATH", str(tmp_path / "missing" / "clear_refs"))
+    report = []
+    with track_memory("stage", report):
+        pass
+    assert report[0]["peak_rss_mb"] is None
+    assert report[0]["rss_after_mb"] > 0
+    assert "n/a" in format_memory_report(report)
+
+
+def test_outer_peak_survives_nested_reset():
+    if not reset_peak_rss():
+        pytest.skip("no writable /proc/self/clear_refs")
+    report = []
+    with track_memory("outer", report):
+        big = np.ones(25_000_000)  # 200 MB, released before the inner block resets the counter
+        del big
+        with track_memory("inner", report):
+            pass
+    inner, outer = report
+    assert outer["peak_rss_mb"] - outer["rss_before_mb"] > 150
+    assert inner["peak_rss_mb"] - inner["rss_before_mb"] < 50
+
+
+@pytest.fixture
+def reload_with(monkeypatch):
+    """
+    Re-imports instrumentation with SALARY_METRICS set to the given path (None: unset);
+    the original environment and module state are restored afterwards.
+    """
+    def reload(path):
+        monkeypatch.delenv(instrumentation.RUN_ENV, raising=False)
+        if path is None:
+            monkeypatch.delenv(instrumentation.METRICS_ENV, raising=False)
+        else:
+            monkeypatch.setenv(instrumentation.METRICS_ENV, str(path))
+        return importlib.reload(instrumentation)
+
+    yield reload
+    monkeypatch.undo()
+    importlib.reload(instrumentation)
+
+
+def test_records_are_json_lines_with_stage_fields(reload_with, tmp_path):
+    path = tmp_path / "metrics" / "metrics.jsonl"
+    inst = reload_with(path)
+
+    @inst.instrument(name="inner")
+    def inner(df):
+        return df.head(3)
+
+    @inst.instrument
+    def outer(df):
+        return inner(df), df.shape
+
+    outer(pd.DataFrame({"a": range(10), "b": range(10)}))
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    records = [json.loads(line) for line in lines]
+    inner_rec, outer_rec = records
+    run = os.environ[inst.RUN_ENV]
+    assert {r["run"] for r in records} == {run}
+    assert inner_rec["stage"] == "inner" and inner_rec["depth"] == 1
+    assert inner_rec["parent"] == outer_rec["stage"] == f"{__name__}.{outer.__qualname__}"
+    assert outer_rec["depth"] == 0 and outer_rec["parent"] is None
+    assert (inner_rec["rows_in"], inner_rec["rows_out"], inner_rec["cols_out"]) == (10, 3, 2)
+    assert outer_rec["rows_out"] == 3
+    for r in records:
+        assert r["wall_s"] >= 0 and r["cpu_s"] >= 0
+        assert "error" not in r
+    assert inst.load_metrics(str(path), run=run) == records
+
+
+def test_failed_call_records_error(reload_with, tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    inst = reload_with(path)
+
+    @inst.instrument(name="boom")
+    def boom():
+        raise KeyError("x")
+
+    with pytest.raises(KeyError):
+        boom()
+    with pytest.raises(ValueError):
+        with inst.metrics_stage("block"):
+            raise ValueError
+    assert [(r["stage"], r["error"]) for r in inst.load_metrics(str(path))] == [
+        ("boom", "KeyError"), ("block", "ValueError")
+    ]
+
+
+def test_unset_returns_function_unchanged(reload_with, tmp_path):
+    inst = reload_with(None)
+
+    def stage(df):
+        return df
+
+    assert inst.METRICS_PATH is None
+    assert inst.instrument(stage) is stage
+    assert inst.instrument(name="named")(stage) is stage
+    with inst.metrics_stage("block"):
+        pass
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from model.flat_forest import FlatForest
+from model.intervals import per_tree_predictions, predict_with_intervals, summarize_tree_predictions
+
+COUNTRIES = np.array(["Germany", "India", "Brazil"])
+COUNTRY_AVG = pd.Series({"Germany": 70000.0, "India": 15000.0, "Brazil": 25000.0})
+
+
+def _data(n=2400, n_features=10, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, n_features))
+    X[:, :3] = rng.integers(0, 2, size=(n, 3))
+    # Targets in the model's log1p(salary_normalized) space.
+    y = 0.3 * X[:, 0] + 0.2 * np.sin(X[:, 4]) + rng.normal(scale=0.1, size=n) + 0.7
+    return X, y, COUNTRIES[rng.integers(0, len(COUNTRIES), size=n)]
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    X, y, countries = _data()
+    X = pd.DataFrame(X, columns=[f"f{i}" for i in range(X.shape[1])])
+    forest = RandomForestRegressor(n_estimators=30, min_samples_leaf=2, random_state=0, n_jobs=1)
+    forest.fit(X.iloc[:1800], y[:1800])
+    test = X.iloc[1800:]
+    return forest, FlatForest.from_sklearn(forest), test, pd.Series(countries[1800:], index=test.index)
+
+
+def test_mean_is_bit_identical_to_predict(fitted):
+    forest, flat, X, _ = fitted
+    summary = summarize_tree_predictions(per_tree_predictions(forest, X, n_jobs=2))
+    np.testing.assert_array_equal(summary["mean"], forest.predict(X))
+    np.testing.assert_array_equal(summary["mean"], flat.predict(X))
+
+
+def test_summary_spread_and_quantiles(fitted):
+    forest, _, X, _ = fitted
+    per_tree = per_tree_predictions(forest, X)
+    summary = summarize_tree_predictions(per_tree, quantiles=(0.1, 0.5, 0.9))
+
+    np.testing.assert_allclose(summary["std"], per_tree.std(axis=1))
+    assert summary["quantiles"].shape == (3, len(X))
+    assert np.all(summary["quantiles"][0] <= summary["quantiles"][1])
+    assert np.all(summary["quantiles"][1] <= summary["quantiles"][2])
+
+
+def test_flat_forest_route_matches_sklearn(fitted):
+    forest, flat, X, countries = fitted
+    pd.testing.assert_frame_equal(
+        predict_with_intervals(flat, X, countries, COUNTRY_AVG),
+        predict_with_intervals(forest, X, countries, COUNTRY_AVG, n_jobs=2),
+    )
+
+
+def test_usd_columns(fitted):
+    forest, _, X, countries = fitted
+    out = predict_with_intervals(forest, X, countries, COUNTRY_AVG, quantiles=(0.05, 0.5, 0.975))
+
+    assert list(out.columns) == [
+        "country", "pred_log", "std_log", "pred_salary_usd", "std_salary_usd",
+        "q5_salary_usd", "q50_salary_usd", "q97_5_salary_usd",
+    ]
+    pd.testing.assert_index_equal(out.index, X.index)
+    avg = countries.map(COUNTRY_AVG).to_numpy()
+    np.testing.assert_array_equal(out["pred_salary_usd"].to_numpy(), np.expm1(forest.predict(X)) * avg)
+    assert np.all(out["q5_salary_usd"] <= out["q50_salary_usd"])
+    assert np.all(out["q50_salary_usd"] <= out["q97_5_salary_usd"])
+
+
+def test_numpy_input_takes_country_index(fitted):
+    forest, _, X, countries = fitted
+    out = predict_with_intervals(forest, X.to_numpy(), countries, COUNTRY_AVG)
+    pd.testing.assert_index_equal(out.index, countries.index)
@@ -0,0 +1,178 @@
+import io
+import json
+import threading
+import http.client
+from contextlib import redirect_stdout
+
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+
+from artifacts import save_artifacts, load_artifacts
+from features import FeaturePipeline
+from model.flat_forest import FlatForest
+from model.utils import feature_matrix
+from serve import MicroBatcher, PredictionService, PredictionServer, make_handler, profile_to_record
+
+PROFILE = {
+    "country": "Germany", "experience": 7, "age": 34, "companySize": "Large",
+    "employmentType": "Full-time", "languages": ["Python", "Go"],
+}
+
+
+def test_profile_to_record_maps_calculator_fields():
+    record = profile_to_record(PROFILE)
+    assert record == {
+        "country": "Germany",
+        "years_code_pro": "7",
+        "years_code_total": "7",
+        "org_size": "100 to 499 employees",
+        "employment": "Employed full-time",
+        "langs_worked": ["Python", "Go"],
+    }
+
+
+def test_profile_to_record_drops_age_and_keeps_survey_columns():
+    record = profile_to_record({"age": 40, "dev_type": "Developer, back-end", "org_size": "I don't know",
+                                "companySize": "Small"})
+    assert "age" not in record
+    assert record["dev_type"] == "Developer, back-end"
+    # An explicit survey column wins over the mapped calculator field.
+    assert record["org_size"] == "I don't know"
+
+
+def test_profile_to_record_unmapped_answers_are_unanswered():
+    record = profile_to_record({"companySize": "Galactic", "employmentType": "Pirate", "languages": []})
+    assert record == {"org_size": None, "employment": None, "langs_worked": None}
+
+
+def _blocking_batcher(max_batch, predict=lambda X: X[:, 0] * 2):
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking_predict(X):
+        started.set()
+        release.wait(5)
+        return predict(X)
+
+    return MicroBatcher(blocking_predict, max_batch=max_batch, max_wait_ms=50), started, release
+
+
+def test_micro_batcher_coalesces_waiting_requests():
+    batcher, started, release = _blocking_batcher(max_batch=64)
+    first = batcher.submit(np.array([[1.0]]))
+    assert started.wait(5)
+    # These queue up while the first batch is being predicted and go out together.
+    rest = [batcher.submit(np.array([[float(i)], [float(i) + 0.5]])) for i in range(2, 7)]
+    release.set()
+    assert first.result(5).tolist() == [2.0]
+    for i, future in enumerate(rest, start=2):
+        assert future.result(5).tolist() == [2.0 * i, 2.0 * i + 1]
+    assert batcher.batch_sizes == [1, 10]
+
+
+def test_micro_batcher_caps_batch_rows():
+    batcher, started, release = _blocking_batcher(max_batch=4)
+    futures = [batcher.submit(np.array([[0.0]]))]
+    assert started.wait(5)
+    futures += [batcher.submit(np.array([[float(i)]])) for i in range(1, 10)]
+    release.set()
+    assert [f.result(5).tolist() for f in futures] == [[2.0 * i] for i in range(10)]
+    assert batcher.batch_sizes == [1, 4, 4, 1]
+
+
+def test_micro_batcher_propagates_errors_to_every_request():
+    def fail(X):
+        raise RuntimeError("boom")
+
+    batcher, started, release = _blocking_batcher(max_batch=64, predict=fail)
+    futures = [batcher.submit(np.zeros((1, 1)))]
+    assert started.wait(5)
+    futures.append(batcher.submit(np.zeros((1, 1))))
+    release.set()
+    for future in futures:
+        with pytest.raises(RuntimeError, match="boom"):
+            future.result(5)
+
+
+@pytest.fixture(scope="module")
+def artifacts_dir(merged, tmp_path_factory):
+    pipeline = FeaturePipeline()
+    with redirect_stdout(io.StringIO()):
+        processed, _ = pipeline.fit_transform(merged.copy())
+    model = RandomForestRegressor(n_estimators=8, max_depth=6, random_state=0)
+    model.fit(feature_matrix(processed, pipeline.feature_names), np.log1p(processed["salary_normalized"]))
+    model_dir = str(tmp_path_factory.mktemp("model"))
+    save_artifacts(model, pipeline, model_dir)
+    return model_dir
+
+
+def test_artifacts_round_trip(artifacts_dir):
+    model, pipeline = load_artifacts(artifacts_dir)
+    assert isinstance(model, FlatForest)
+    sklearn_model, _ = load_artifacts(artifacts_dir, flat=False)
+    X = pipeline.transform_records([profile_to_record(PROFILE)])
+    np.testing.assert_allclose(model.predict(X), sklearn_model.predict(X), rtol=1e-6)
+
+
+def test_service_without_per_tree_predictions_has_no_interval(merged):
+    pipeline = FeaturePipeline()
+    with redirect_stdout(io.StringIO()):
+        processed, _ = pipeline.fit_transform(merged.copy())
+    model = HistGradientBoostingRegressor(max_iter=20, random_state=0)
+    model.fit(feature_matrix(processed, pipeline.feature_names), np.log1p(processed["salary_normalized"]))
+    [result] = PredictionService(model, pipeline).predict([PROFILE])
+    assert result["lower"] is None and result["upper"] is None
+    X = pipeline.transform_records([profile_to_record(PROFILE)])
+    assert result["salary_normalized"] == pytest.approx(float(np.expm1(model.predict(X)[0])))
+
+
+@pytest.fixture(scope="module")
+def server(artifacts_dir):
+    model, pipeline = load_artifacts(artifacts_dir)
+    httpd = PredictionServer(("127.0.0.1", 0), make_handler(PredictionService(model, pipeline)))
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield httpd.server_address
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _request(address, method, path, body=None):
+    conn = http.client.HTTPConnection(*address, timeout=10)
+    data = body if isinstance(body, (bytes, type(None))) else json.dumps(body).encode("utf-8")
+    conn.request(method, path, body=data, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    conn.close()
+    return response.status, payload
+
+
+def test_predict_single_profile(server):
+    status, result = _request(server, "POST", "/predict", PROFILE)
+    assert status == 200
+    assert result["country"] == "Germany"
+    assert result["lower"] <= result["upper"]
+    assert result["salary"] > 0
+
+
+def test_predict_list_keeps_order(server):
+    profiles = [PROFILE, {**PROFILE, "country": "Narnia"}]
+    status, results = _request(server, "POST", "/predict", profiles)
+    assert status == 200
+    assert [r["country"] for r in results] == ["Germany", "Other"]
+    assert results[0] == _request(server, "POST", "/predict", PROFILE)[1]
+
+
+@pytest.mark.parametrize("body", [[], b"{not json", [1, 2], "a string"])
+def test_predict_rejects_bad_payloads(server, body):
+    status, result = _request(server, "POST", "/predict", body)
+    assert status == 400
+    assert "error" in result
+
+
+def test_health_and_unknown_paths(server):
+    status, result = _request(server, "GET", "/health")
+    assert status == 200 and result["status"] == "ok"
+    assert _request(server, "GET", "/nope")[0] == 404
+    assert _request(server, "POST", "/nope", PROFILE)[0] == 404
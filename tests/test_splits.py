@@ -0,0 +1,44 @@
+import io
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import FeaturePipeline
+from model.utils import (
+    NON_FEATURE_COLS, feature_matrix, prepare_train_test, prepare_train_test_interpolation, take_rows
+)
+
+
+@pytest.fixture(scope="module")
+def processed(merged):
+    with redirect_stdout(io.StringIO()):
+        processed, _ = FeaturePipeline().fit_transform(merged.copy())
+    return processed
+
+
+def test_year_split_positions_select_year_rows(processed):
+    train_rows, y_train, test_rows, y_test, test_countries, _ = prepare_train_test(processed, test_year=2024)
+    X_all = feature_matrix(processed)
+    train_df = processed[processed["year"] < 2024]
+    test_df = processed[processed["year"] == 2024]
+
+    np.testing.assert_array_equal(
+        take_rows(X_all, train_rows), train_df.drop(columns=NON_FEATURE_COLS).to_numpy(np.float32)
+    )
+    np.testing.assert_array_equal(
+        take_rows(X_all, test_rows), test_df.drop(columns=NON_FEATURE_COLS).to_numpy(np.float32)
+    )
+    pd.testing.assert_series_equal(y_train, np.log1p(train_df["salary_normalized"]))
+    pd.testing.assert_series_equal(y_test, np.log1p(test_df["salary_normalized"]))
+    pd.testing.assert_series_equal(test_countries, test_df["country"])
+
+
+def test_interpolation_split_positions_line_up_with_targets(processed):
+    train_rows, y_train, test_rows, y_test, test_countries, _ = prepare_train_test_interpolation(processed)
+    assert len(np.intersect1d(train_rows, test_rows)) == 0
+    assert len(train_rows) + len(test_rows) == len(processed)
+    assert y_train.index.equals(processed.index[train_rows])
+    assert y_test.index.equals(processed.index[test_rows])
+    assert test_countries.index.equals(y_test.index)
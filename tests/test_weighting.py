@@ -0,0 +1,66 @@
+import io
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from model.weighted_model import compute_sample_weights
+from model.weighting import (
+    LINEAR, default_candidates, sample_weights, schedule_name, schedule_weights, search_schedules
+)
+
+YEARS = pd.Series([2024, 2021, 2023, 2021, 2022, 2024, 2024], index=[10, 11, 12, 13, 14, 15, 16], name="year")
+
+
+def _old_linear_ramp(year_series: pd.Series) -> pd.Series:
+    # compute_sample_weights before schedules were added.
+    years = sorted(set(int(yr) for yr in year_series.unique()))
+    first, last = years[0], years[-1]
+    span = max(last - first, 1)
+    return year_series.map({yr: 0.2 + 0.8 * (yr - first) / span for yr in years})
+
+
+@pytest.mark.parametrize("years", [YEARS, YEARS[YEARS != 2022], YEARS[YEARS == 2024]])
+def test_default_schedule_matches_old_linear_ramp(years):
+    weights = compute_sample_weights(years)
+    np.testing.assert_array_equal(weights.to_numpy(), _old_linear_ramp(years).to_numpy())
+    assert weights.index.equals(years.index)
+
+
+def test_half_life_halves_per_half_life():
+    weights = schedule_weights([2021, 2023, 2022, 2024], ("half_life", {"half_life": 1.0}))
+    assert weights == {2021: 0.125, 2022: 0.25, 2023: 0.5, 2024: 1.0}
+
+
+def test_custom_weights_cover_years_or_use_default():
+    schedule = ("custom", {"weights": {2023: 0.5, "2024": 1}, "default": 0.1})
+    np.testing.assert_array_equal(sample_weights([2024, 2021, 2023], schedule), [1.0, 0.1, 0.5])
+
+
+@pytest.mark.parametrize("schedule", [
+    ("custom", {"weights": {2023: 0.5, 2024: 1.0}}),
+    ("custom", {"weights": {2021: float("nan")}, "default": 1.0}),
+    ("custom", {"weights": {2021: -1.0}, "default": 1.0}),
+])
+def test_sample_weights_raise_on_uncovered_or_invalid_years(schedule):
+    with pytest.raises(ValueError):
+        sample_weights(YEARS, schedule)
+
+
+def test_unknown_schedule_kind_raises():
+    with pytest.raises(ValueError, match="Unknown weighting schedule"):
+        sample_weights(YEARS, ("cosine", {}))
+
+
+def test_search_schedules_returns_a_candidate():
+    rng = np.random.default_rng(0)
+    years = rng.choice([2021, 2022, 2023], size=600)
+    X = rng.normal(size=(600, 4)).astype(np.float32)
+    y = X[:, 0] + 0.1 * (years - 2021) + rng.normal(scale=0.1, size=600)
+    candidates = [LINEAR] + default_candidates()[:3]
+    with redirect_stdout(io.StringIO()):
+        best, table = search_schedules(X, y, years, candidates, eta=2, cores=1, engine="hgb")
+    assert best in candidates
+    assert set(table["schedule"]) == {schedule_name(s) for s in candidates}
+    assert (table.loc[table["rung"] == table["rung"].max(), "rows"] == (years < 2023).sum()).all()